@@ -0,0 +1,96 @@
+"""
+bench_bulk_load.py
+------------------
+Compare the two ways etl_to_dw can load the sale fact table:
+
+- to_sql:  DataFrame.to_sql into a table whose ix_sale_* indexes already exist
+           (the original safe_insert path)
+- bulk:    etl_to_dw.bulk_insert (executemany, one transaction) under
+           load_pragmas, with the indexes built after the data is in
+
+Each run writes to a throwaway database in a temp directory.
+
+Run from the project root:
+    python benchmarks/bench_bulk_load.py --rows 1000000 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics_project import etl_to_dw
+
+
+def synthetic_sales(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 1095, rows), unit="D")
+    return pd.DataFrame(
+        {
+            "transaction_id": np.arange(1, rows + 1),
+            "sale_date": dates.strftime("%Y-%m-%d"),
+            "customer_id": rng.integers(1000, 1200, rows),
+            "product_id": rng.integers(2000, 2100, rows),
+            "store_id": rng.integers(400, 410, rows),
+            "campaign_id": rng.integers(0, 5, rows).astype(float),
+            "sale_amount": rng.gamma(2.0, 500.0, rows).round(2),
+            "discount_pct": rng.integers(0, 30, rows).astype(float),
+            "state_code": rng.choice(["TX", "IL", "KS", "MO", "NE", "IA"], rows),
+        }
+    )
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.executescript(etl_to_dw.SCHEMA_SQL)
+    return conn
+
+
+def time_to_sql(sales: pd.DataFrame, path: Path) -> float:
+    conn = _connect(path)
+    try:
+        etl_to_dw.create_indexes(conn)
+        start = time.perf_counter()
+        with conn:
+            etl_to_dw.safe_insert(conn, "sale", sales, etl_to_dw.SALE_COLS)
+        return time.perf_counter() - start
+    finally:
+        conn.close()
+
+
+def time_bulk(sales: pd.DataFrame, path: Path) -> float:
+    conn = _connect(path)
+    try:
+        start = time.perf_counter()
+        with etl_to_dw.load_pragmas(conn), conn:
+            etl_to_dw.bulk_insert(conn, "sale", sales, etl_to_dw.SALE_COLS)
+            etl_to_dw.create_indexes(conn)
+        return time.perf_counter() - start
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'to_sql s':>10} {'bulk s':>10} {'speedup':>8}")
+    for rows in args.rows:
+        sales = synthetic_sales(rows)
+        with tempfile.TemporaryDirectory() as tmp:
+            slow = time_to_sql(sales, Path(tmp) / "to_sql.db")
+            fast = time_bulk(sales, Path(tmp) / "bulk.db")
+        print(f"{rows:>12,} {slow:>10.2f} {fast:>10.2f} {slow / fast:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+run_benchmarks.py
+-----------------
+Benchmark suite for the scrub -> prepare -> warehouse -> OLAP path on
+synthetic data (see synthetic_data.py) at 10K, 1M or 10M sales rows.
+
+Cases (``--list`` prints them):
+- scrubber.<method>: every DataScrubber method on the raw sales frame,
+- prepare.<table>: each prepare_* main,
+- etl.full / etl.incremental: etl_to_dw.main,
+- olap.*: fact cache build, cube from the warehouse / the sales_cube
+  aggregate / the Arrow cache, and a rollup.
+
+Raw inputs are generated once per scale into ``benchmarks/.data/<scale>/raw``;
+each run works in a temp directory, with settings (and etl_to_dw's paths)
+pointed at it. Every case runs ``--repeat`` times after its untimed setup and
+reports the best and median time.
+
+Results are appended to ``benchmarks/results/results.jsonl``, one line per case,
+tagged with the git commit, so runs on different commits can be compared;
+``--compare`` prints the ratio against the latest run of another commit (or of
+the one given) and flags cases that got slower than ``--threshold``.
+
+Run from the project root:
+    python benchmarks/run_benchmarks.py --scale 10k
+    python benchmarks/run_benchmarks.py --scale 1m --only scrubber --repeat 5
+    python benchmarks/run_benchmarks.py --scale 10k --compare           # vs. previous commit
+    python benchmarks/run_benchmarks.py --scale 10k --compare 8c8cd55 --no-save
+"""
+
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from dataclasses import dataclass
+import importlib
+import io
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from analytics_project import etl_to_dw, settings
+from analytics_project.data_scrubber import DataScrubber
+from analytics_project.schemas import date_format, read_csv
+import synthetic_data
+
+BENCH_DIR = Path(__file__).resolve().parent
+DATA_CACHE = BENCH_DIR / ".data"
+RESULTS_PATH = BENCH_DIR / "results" / "results.jsonl"
+
+
+@dataclass
+class Case:
+    """One timed call; ``setup`` (untimed) builds the argument ``run`` gets.
+
+    ``feeds`` marks cases whose output later cases read (prepared files, the
+    warehouse, the fact cache); they still run once, untimed, when ``--only``
+    leaves them out.
+    """
+
+    name: str
+    run: Callable[[Any], Any]
+    setup: Callable[[], Any] = lambda: None
+    feeds: bool = False
+
+
+# --- inputs ---
+def raw_dir(scale: str, seed: int = 42) -> Path:
+    """Generated raw CSVs for ``scale``, (re)written if missing or from an older generator."""
+    out = DATA_CACHE / scale / "raw"
+    stamp = out / "GENERATOR"
+    expected = f"{synthetic_data.GENERATOR_VERSION}:{seed}"
+    if not stamp.exists() or stamp.read_text() != expected:
+        print(f"[bench] generating {scale} raw data in {out} ...")
+        synthetic_data.write_raw(out, synthetic_data.SCALES[scale], seed)
+        stamp.write_text(expected)
+    return out
+
+
+@contextmanager
+def workspace(raw: Path) -> Iterator[Path]:
+    """Point settings and etl_to_dw at a temp prepared/ and dw/ fed from ``raw``."""
+    saved_settings = {k: getattr(settings, k) for k in dir(settings) if k.isupper()}
+    saved_etl = (etl_to_dw.PREPARED_DIR, etl_to_dw.DW_PATH)
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        root = Path(tmp)
+        prepared, dw = root / "prepared", root / "dw"
+        prepared.mkdir()
+        dw.mkdir()
+        for name in ("customers", "products", "sales"):
+            setattr(settings, f"{name.upper()}_RAW", raw / f"{name}_data.csv")
+            setattr(settings, f"{name.upper()}_PREP", prepared / f"{name}_data_prepared.csv")
+        settings.RAW_DIR, settings.PREPARED_DIR = raw, prepared
+        settings.DW_PATH = dw / "smart_sales.db"
+        settings.FACT_CACHE_PATH = dw / "sales_fact.arrow"
+        etl_to_dw.PREPARED_DIR, etl_to_dw.DW_PATH = prepared, settings.DW_PATH
+        try:
+            yield root
+        finally:
+            for k, v in saved_settings.items():
+                setattr(settings, k, v)
+            etl_to_dw.PREPARED_DIR, etl_to_dw.DW_PATH = saved_etl
+
+
+# --- cases ---
+# raw header -> snake_case name (standardize_columns matches the raw names)
+SALES_MAPPING = {
+    "TransactionID": "transaction_id",
+    "SaleDate": "sale_date",
+    "CustomerID": "customer_id",
+    "ProductID": "product_id",
+    "StoreID": "store_id",
+    "CampaignID": "campaign_id",
+    "SaleAmount": "sale_amount",
+    "DiscountPct": "discount_pct",
+    "StateCode": "state_code",
+}
+
+# the prepare_sales plan, on the benchmark's column names
+SALES_PLAN = [
+    {"step": "standardize_columns", "mapping": SALES_MAPPING},
+    {"step": "trim_whitespace"},
+    {"step": "normalize_categories", "columns": ["state_code"], "case": "upper"},
+    {"step": "to_datetime", "columns": ["sale_date"], "format": "%m/%d/%Y"},
+    {"step": "to_numeric", "columns": ["sale_amount", "discount_pct"]},
+    {"step": "drop_empty_rows"},
+    {"step": "drop_duplicates"},
+    {
+        "step": "fill_missing",
+        "strategies": {
+            "discount_pct": {"method": "constant", "value": 0},
+            "state_code": {"method": "mode"},
+        },
+    },
+    {"step": "remove_outliers_iqr", "columns": ["sale_amount"], "factor": 1.5},
+]
+
+
+def scrubber_cases() -> List[Case]:
+    scrub = DataScrubber()
+
+    def raw_sales() -> pd.DataFrame:
+        return read_csv(settings.SALES_RAW, parse_dates=False)
+
+    def standardized() -> pd.DataFrame:
+        return scrub.standardize_columns(raw_sales(), mapping=SALES_MAPPING)
+
+    def typed() -> pd.DataFrame:
+        df = scrub.to_numeric(standardized(), ["sale_amount", "discount_pct"], inplace=True)
+        return scrub.normalize_categories(df, ["state_code"], case="upper", inplace=True)
+
+    def chunked(_: Any) -> int:
+        steps = [s for s in SALES_PLAN if s["step"] != "drop_duplicates"]
+        out = Path(settings.PREPARED_DIR) / "chunked.csv"
+        return scrub.scrub_csv_in_chunks(settings.SALES_RAW, out, steps, chunksize=250_000)
+
+    fmt = date_format(settings.SALES_RAW, "SaleDate")
+    return [
+        Case("scrubber.standardize_columns", lambda df: scrub.standardize_columns(df), raw_sales),
+        Case("scrubber.trim_whitespace", scrub.trim_whitespace, standardized),
+        Case(
+            "scrubber.normalize_categories",
+            lambda df: scrub.normalize_categories(df, ["state_code"], case="upper"),
+            standardized,
+        ),
+        Case(
+            "scrubber.to_datetime",
+            lambda df: scrub.to_datetime(df, ["sale_date"], format=fmt),
+            standardized,
+        ),
+        Case(
+            "scrubber.to_numeric",
+            lambda df: scrub.to_numeric(df, ["sale_amount", "discount_pct"]),
+            standardized,
+        ),
+        Case("scrubber.drop_empty_rows", scrub.drop_empty_rows, standardized),
+        Case("scrubber.drop_duplicates", scrub.drop_duplicates, standardized),
+        Case(
+            "scrubber.fill_missing",
+            lambda df: scrub.fill_missing(df, SALES_PLAN[7]["strategies"]),
+            typed,
+        ),
+        Case(
+            "scrubber.remove_outliers_iqr",
+            lambda df: scrub.remove_outliers_iqr(df, ["sale_amount"]),
+            typed,
+        ),
+        Case(
+            "scrubber.validate_schema",
+            lambda df: scrub.validate_schema(df, {"sale_amount": "float64", "store_id": "string"}),
+            typed,
+        ),
+        Case("scrubber.apply_steps", lambda df: scrub.apply_steps(df, SALES_PLAN), raw_sales),
+        Case("scrubber.run_plan", lambda df: scrub.run_plan(df, SALES_PLAN), raw_sales),
+        Case("scrubber.scrub_csv_in_chunks", chunked),
+    ]
+
+
+def _main_of(module: str) -> Callable[[Any], None]:
+    main = importlib.import_module(module).main
+    return lambda _: main()
+
+
+def pipeline_cases() -> List[Case]:
+    prepare = "analytics_project.data_preparation"
+    from analytics_project.olap import Cube
+    from analytics_project.olap.fact_cache import build_fact_cache
+
+    cases = [
+        Case(f"prepare.{name}", _main_of(f"{prepare}.prepare_{name}_data"), feeds=True)
+        for name in ("customers", "products", "sales")
+    ]
+    cases += [
+        Case("etl.full", lambda _: etl_to_dw.main(), feeds=True),
+        # nothing new past the high-water mark: the cost of a no-op refresh
+        Case("etl.incremental", lambda _: etl_to_dw.main(incremental=True)),
+        Case("olap.cube_from_warehouse", lambda _: Cube.from_warehouse(settings.DW_PATH)),
+        Case("olap.cube_from_sales_cube", lambda _: Cube.from_sales_cube(settings.DW_PATH)),
+    ]
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("[bench] pyarrow not installed: skipping Arrow fact cache cases")
+        return cases
+    return cases + [
+        Case(
+            "olap.fact_cache_build",
+            lambda _: build_fact_cache(settings.DW_PATH, settings.FACT_CACHE_PATH),
+            feeds=True,
+        ),
+        Case("olap.cube_from_arrow", lambda _: Cube.from_arrow(settings.FACT_CACHE_PATH)),
+        Case(
+            "olap.rollup",
+            lambda cube: cube.rollup(["category", "state_code", "month"], "sale_amount"),
+            lambda: Cube.from_arrow(settings.FACT_CACHE_PATH),
+        ),
+    ]
+
+
+def all_cases() -> List[Case]:
+    return scrubber_cases() + pipeline_cases()
+
+
+# --- running ---
+def time_case(case: Case, repeat: int, quiet: bool = True) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        arg = case.setup()
+        # the prepare/ETL mains print their counts; keep the table readable
+        with redirect_stdout(io.StringIO()) if quiet else nullcontext():
+            start = time.perf_counter()
+            case.run(arg)
+            times.append(time.perf_counter() - start)
+        del arg
+    return {"best": min(times), "median": statistics.median(times)}
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def machine() -> Dict[str, Any]:
+    return {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_suite(
+    scale: str, repeat: int, only: Sequence[str] = (), seed: int = 42
+) -> List[Dict[str, Any]]:
+    """Time every selected case at ``scale``; return one result record per case."""
+    raw = raw_dir(scale, seed)
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no", "--", "src"))
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    results = []
+    with workspace(raw):
+        cases = all_cases()
+        for i, case in enumerate(cases):
+            if only and not any(o in case.name for o in only):
+                wanted_later = any(any(o in c.name for o in only) for c in cases[i + 1 :])
+                if case.feeds and wanted_later:
+                    with redirect_stdout(io.StringIO()):
+                        case.run(case.setup())
+                continue
+            timing = time_case(case, repeat)
+            print(f"{case.name:<34} best {timing['best']:9.3f}s  median {timing['median']:9.3f}s")
+            results.append(
+                {
+                    "case": case.name,
+                    "scale": scale,
+                    "rows": synthetic_data.SCALES[scale],
+                    "repeat": repeat,
+                    **{k: round(v, 6) for k, v in timing.items()},
+                    "commit": commit,
+                    "dirty": dirty,
+                    "at": stamp,
+                    "machine": machine(),
+                }
+            )
+    return results
+
+
+def save_results(results: Sequence[Dict[str, Any]], path: Path = RESULTS_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for rec in results:
+            f.write(json.dumps(rec) + "\n")
+
+
+def load_results(path: Path = RESULTS_PATH) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(
+    current: Sequence[Dict[str, Any]],
+    history: Sequence[Dict[str, Any]],
+    ref: Optional[str] = None,
+    threshold: float = 1.10,
+) -> pd.DataFrame:
+    """Best times now vs. the latest earlier run of ``ref`` (default: any other commit).
+
+    Only runs from the same host are compared. ``ratio`` > 1 means slower now.
+    """
+    if not current:
+        return pd.DataFrame()
+    host, commit = current[0]["machine"]["host"], current[0]["commit"]
+    base: Dict[tuple, Dict[str, Any]] = {}
+    for rec in history:  # file order is run order, so later runs win
+        if rec["machine"]["host"] != host:
+            continue
+        if (ref and not rec["commit"].startswith(ref)) or (not ref and rec["commit"] == commit):
+            continue
+        base[(rec["scale"], rec["case"])] = rec
+    rows = []
+    for rec in current:
+        old = base.get((rec["scale"], rec["case"]))
+        if old is None:
+            continue
+        ratio = rec["best"] / old["best"] if old["best"] else float("nan")
+        rows.append(
+            {
+                "case": rec["case"],
+                "scale": rec["scale"],
+                "base_commit": old["commit"],
+                "base_best": old["best"],
+                "best": rec["best"],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > threshold,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Time the scrub/prepare/ETL/OLAP path.")
+    parser.add_argument("--scale", nargs="+", choices=list(synthetic_data.SCALES), default=["10k"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", default=[], help="run cases containing any of these")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument(
+        "--compare", nargs="?", const="", default=None, metavar="COMMIT", help="compare runs"
+    )
+    parser.add_argument("--threshold", type=float, default=1.10, help="regression ratio")
+    parser.add_argument("--no-save", action="store_true", help="don't append to results")
+    parser.add_argument("--results", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.list:
+        with workspace(DATA_CACHE / "none"):
+            print("\n".join(c.name for c in all_cases()))
+        return
+
+    history = load_results(args.results)
+    results = [
+        rec for scale in args.scale for rec in run_suite(scale, args.repeat, args.only, args.seed)
+    ]
+    if not args.no_save:
+        save_results(results, args.results)
+        print(f"[bench] appended {len(results)} results to {args.results}")
+    if args.compare is not None:
+        table = compare(results, history, args.compare or None, args.threshold)
+        print("\n=== COMPARISON (ratio > 1 is slower now) ===")
+        print(table.to_string(index=False) if not table.empty else "(no earlier runs to compare)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+synthetic_data.py
+-----------------
+Deterministic generator for raw customers/products/sales CSVs at benchmark
+scale, in the same layout as data/raw (same file names, headers and date
+format, so the schema registry and prepare scripts read them unchanged).
+
+The data is dirty the way the real extract is:
+- text with stray whitespace and mixed case ("tx", " IL", "west "),
+- blanks in optional columns, "?" and negative amounts in SaleAmount,
+  unparseable dates, and a tail of outlier amounts and prices,
+- exact duplicate rows (about 1%),
+- sales whose CustomerID or ProductID has no dimension row (FK orphans).
+
+Sales are written in blocks of ``BLOCK_ROWS`` with one seeded generator per
+block, so 10M rows never sit in memory at once and the same seed always gives
+byte-identical files.
+
+Run from the project root:
+    python benchmarks/synthetic_data.py --rows 1000000 --out benchmarks/.data/1m/raw
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Bump when the generated data changes, so cached benchmark inputs are rebuilt.
+GENERATOR_VERSION = 1
+
+SCALES: Dict[str, int] = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+BLOCK_ROWS = 1_000_000
+DUPLICATE_RATE = 0.01
+CUSTOMER_ORPHAN_RATE = 0.02
+PRODUCT_ORPHAN_RATE = 0.01
+
+REGIONS = ["West", "East", "Central", "North", "South"]
+CONTACTS = ["Email", "SMS", "Phone"]
+CATEGORIES = ["Electronics", "Clothing", "Sports", "Home", "Office"]
+SUPPLIERS = ["Acme", "BlueSky", "NorthPeak", "Zenith"]
+STATES = ["TX", "IL", "KS", "MO", "NE", "IA", "CA", "MD", "UT"]
+FIRST_NAMES = ["Robert", "John", "Mark", "David", "Maria", "Linda", "Ana", "Wei", "Omar", "Sara"]
+LAST_NAMES = ["Gomez", "Silva", "Marshall", "Brennan", "Nguyen", "Patel", "Smith", "Khan"]
+
+CUSTOMER_ID_START = 1000
+PRODUCT_ID_START = 2000
+
+
+def customer_count(sales_rows: int) -> int:
+    return max(200, sales_rows // 10)
+
+
+def product_count(sales_rows: int) -> int:
+    return max(100, sales_rows // 1000)
+
+
+def _day_strings(start: str, days: int) -> np.ndarray:
+    """m/d/YYYY strings for ``days`` consecutive days (formatted once, then indexed)."""
+    dates = pd.date_range(start, periods=days, freq="D")
+    return np.array([f"{d.month}/{d.day}/{d.year}" for d in dates], dtype=object)
+
+
+def _dirty_text(rng: np.random.Generator, values: np.ndarray, rate: float = 0.05) -> np.ndarray:
+    """Randomly lower-case, upper-case or pad about ``rate`` of the values."""
+    out = values.astype(object)
+    n = len(out)
+    for variant in (str.lower, str.upper, lambda s: f" {s}", lambda s: f"{s}  "):
+        idx = np.flatnonzero(rng.random(n) < rate / 4)
+        out[idx] = [variant(v) for v in out[idx]]
+    return out
+
+
+def _blank(rng: np.random.Generator, values: np.ndarray, rate: float) -> np.ndarray:
+    out = values.astype(object)
+    out[rng.random(len(out)) < rate] = None
+    return out
+
+
+def _duplicate_rows(rng: np.random.Generator, df: pd.DataFrame) -> pd.DataFrame:
+    """Overwrite about DUPLICATE_RATE of the rows with copies of earlier rows."""
+    n = len(df)
+    targets = np.flatnonzero(rng.random(n) < DUPLICATE_RATE)
+    targets = targets[targets > 0]
+    if len(targets):
+        sources = (rng.random(len(targets)) * targets).astype(np.int64)
+        df.iloc[targets] = df.iloc[sources].to_numpy()
+    return df
+
+
+def customers_frame(count: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, 1])
+    names = np.char.add(
+        np.char.add(rng.choice(FIRST_NAMES, count).astype(str), " "),
+        rng.choice(LAST_NAMES, count).astype(str),
+    )
+    join = _day_strings("2019-01-01", 2190)[rng.integers(0, 2190, count)]
+    join[rng.random(count) < 0.002] = "13/45/2020"  # unparseable
+    points = rng.integers(0, 2000, count).astype(float)
+    points[rng.random(count) < 0.01] = 250_000  # outlier
+    df = pd.DataFrame(
+        {
+            "CustomerID": np.arange(CUSTOMER_ID_START, CUSTOMER_ID_START + count),
+            "Name": names.astype(object),
+            "Region": _blank(rng, _dirty_text(rng, rng.choice(REGIONS, count)), 0.01),
+            "JoinDate": _blank(rng, join, 0.01),
+            "LoyaltyPointsPts": _blank(rng, points, 0.02),
+            "PreferredContact": _blank(rng, _dirty_text(rng, rng.choice(CONTACTS, count)), 0.02),
+        }
+    )
+    return _duplicate_rows(rng, df)
+
+
+def products_frame(count: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, 2])
+    category = rng.choice(CATEGORIES, count)
+    price = rng.gamma(2.0, 200.0, count).round(2)
+    price[rng.random(count) < 0.01] *= 100  # outliers
+    df = pd.DataFrame(
+        {
+            "ProductID": np.arange(PRODUCT_ID_START, PRODUCT_ID_START + count),
+            "ProductName": [f"{c}-{i}" for c, i in zip(category, range(count), strict=True)],
+            "Category": _dirty_text(rng, category),
+            "UnitPrice": _blank(rng, price, 0.01),
+            "CurrentDiscountPct": _blank(rng, rng.integers(0, 60, count).astype(float), 0.05),
+            "Supplier": _blank(rng, _dirty_text(rng, rng.choice(SUPPLIERS, count)), 0.02),
+        }
+    )
+    return _duplicate_rows(rng, df)
+
+
+def sales_block(
+    start: int, rows: int, customers: int, products: int, block: int, seed: int = 42
+) -> pd.DataFrame:
+    """Sales rows ``start+1 .. start+rows`` (TransactionID), from their own seeded generator."""
+    rng = np.random.default_rng([seed, 3, block])
+    customer = rng.integers(CUSTOMER_ID_START, CUSTOMER_ID_START + customers, rows)
+    orphan = rng.random(rows) < CUSTOMER_ORPHAN_RATE
+    customer[orphan] += customers + 10_000  # no such customer
+    product = rng.integers(PRODUCT_ID_START, PRODUCT_ID_START + products, rows)
+    orphan = rng.random(rows) < PRODUCT_ORPHAN_RATE
+    product[orphan] += products + 10_000
+
+    amount = rng.gamma(2.0, 500.0, rows).round(2).astype(object)
+    u = rng.random(rows)
+    amount[u < 0.005] = "?"
+    amount[(u >= 0.005) & (u < 0.01)] = None
+    amount[(u >= 0.01) & (u < 0.012)] = -1.0
+    big = (u >= 0.012) & (u < 0.017)
+    amount[big] = [round(a * 100, 2) for a in amount[big]]
+
+    dates = _day_strings("2023-01-01", 1095)[rng.integers(0, 1095, rows)]
+    dates[rng.random(rows) < 0.001] = "2/30/2024"  # unparseable
+
+    df = pd.DataFrame(
+        {
+            "TransactionID": np.arange(start + 1, start + rows + 1),
+            "SaleDate": _blank(rng, dates, 0.002),
+            "CustomerID": customer,
+            "ProductID": product,
+            "StoreID": rng.integers(400, 410, rows),
+            "CampaignID": _blank(rng, rng.integers(0, 4, rows).astype(float), 0.1),
+            "SaleAmount": amount,
+            "DiscountPct": _blank(rng, rng.integers(0, 30, rows).astype(float), 0.3),
+            "StateCode": _blank(rng, _dirty_text(rng, rng.choice(STATES, rows), 0.1), 0.1),
+        }
+    )
+    return _duplicate_rows(rng, df)
+
+
+def write_raw(out_dir: Path | str, sales_rows: int, seed: int = 42) -> Dict[str, Path]:
+    """Write customers_data.csv, products_data.csv and sales_data.csv to ``out_dir``."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    customers, products = customer_count(sales_rows), product_count(sales_rows)
+    paths = {
+        "customers": out_dir / "customers_data.csv",
+        "products": out_dir / "products_data.csv",
+        "sales": out_dir / "sales_data.csv",
+    }
+    customers_frame(customers, seed).to_csv(paths["customers"], index=False)
+    products_frame(products, seed).to_csv(paths["products"], index=False)
+    for block, start in enumerate(range(0, sales_rows, BLOCK_ROWS)):
+        rows = min(BLOCK_ROWS, sales_rows - start)
+        sales_block(start, rows, customers, products, block, seed).to_csv(
+            paths["sales"], mode="w" if block == 0 else "a", header=block == 0, index=False
+        )
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic raw CSVs.")
+    parser.add_argument("--rows", type=int, default=SCALES["10k"], help="sales rows")
+    parser.add_argument("--out", type=Path, required=True, help="output directory")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    for name, path in write_raw(args.out, args.rows, args.seed).items():
+        print(f"{name:<10} {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,8 @@ Identify the most profitable (category, country) combination in the latest year
 and analyze its monthly trend.
 
 This script:
-- Loads prepared sales, customer, and product data
-- Converts all required fields to numeric / datetime
-- Computes net sales using saleamount and discountpct
+- Loads the ETL's sales_cube aggregate into an analytics_project.olap.Cube
+  (net sales = saleamount * (1 - discountpct / 100))
 - Slices to most recent year
 - Dices by category + country
 - Finds the top-performing pair
@@ -19,80 +18,39 @@ This script:
 - Saves all results to:  olap/figures/
 """
 
-import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+from analytics_project.olap import Cube
+
 # -------------------------------------------------------------------
 # File paths (Windows-friendly)
 # -------------------------------------------------------------------
 ROOT = Path(__file__).resolve().parents[1]
-DATA = ROOT / "data" / "prepared"
+DW = ROOT / "data" / "dw" / "smart_sales.db"
 OUT = ROOT / "olap" / "figures"
 OUT.mkdir(parents=True, exist_ok=True)
 
-sales_path = DATA / "sales_data_prepared.csv"
-customers_path = DATA / "customers_data_prepared.csv"
-products_path = DATA / "products_data_prepared.csv"
-
 # -------------------------------------------------------------------
-# Load data
+# Load the cube (category x country x state x month cells kept by the ETL)
 # -------------------------------------------------------------------
-print("Loading data...")
-
-sales = pd.read_csv(sales_path)
-customers = pd.read_csv(customers_path)
-products = pd.read_csv(products_path)
-
-# -------------------------------------------------------------------
-# Clean and prepare data
-# -------------------------------------------------------------------
-
-# Normalize column names
-sales.columns = [c.lower() for c in sales.columns]
-customers.columns = [c.lower() for c in customers.columns]
-products.columns = [c.lower() for c in products.columns]
+print("Loading cube...")
 
-# Convert saleamount / discountpct to numeric
-sales["saleamount"] = pd.to_numeric(sales["saleamount"], errors="coerce").fillna(0)
-sales["discountpct"] = pd.to_numeric(sales.get("discountpct", 0), errors="coerce").fillna(0)
-
-# Compute net sales
-sales["net_sales"] = sales["saleamount"] * (1 - sales["discountpct"] / 100.0)
-
-# Parse datetime column
-if "saledate" in sales.columns:
-    sales["saledate"] = pd.to_datetime(sales["saledate"], errors="coerce")
-else:
-    raise KeyError("Your sales CSV must include a 'saledate' column.")
-
-# Extract year & month
-sales["year"] = sales["saledate"].dt.year
-sales["month"] = sales["saledate"].dt.to_period("M").astype(str)
-
-# Merge with products and customers
-sales = sales.merge(products[["productid", "category"]], on="productid", how="left")
-sales = sales.merge(
-    customers[["customer_id", "country"]], left_on="customerid", right_on="customer_id", how="left"
-)
+cube = Cube.from_sales_cube(DW)
 
 # -------------------------------------------------------------------
 # Slice: latest year only
 # -------------------------------------------------------------------
-latest_year = int(sales["year"].max())
-df_year = sales[sales["year"] == latest_year].copy()
+latest_year = int(max(cube.members("year")))
+year_cube = cube.slice(year=latest_year)
 
 print(f"\nLatest Year Detected: {latest_year}")
-print(f"Rows in latest year: {len(df_year):,}")
+print(f"Sales in latest year: {len(year_cube):,}")
 
 # -------------------------------------------------------------------
 # Slice: totals by category
 # -------------------------------------------------------------------
-category_totals = (
-    df_year.groupby("category", as_index=False)["net_sales"]
-    .sum()
-    .sort_values("net_sales", ascending=False)
-)
+category_totals = year_cube.top_k(["category"], measure="net_sales")
 
 top_category = category_totals.iloc[0]["category"]
 print(f"\nTop Category: {top_category}")
@@ -100,12 +58,10 @@ print(f"\nTop Category: {top_category}")
 # -------------------------------------------------------------------
 # Dice: within top category, compare countries
 # -------------------------------------------------------------------
-df_top_category = df_year[df_year["category"] == top_category]
+top_category_cube = year_cube.slice(category=top_category)
 
-country_totals = (
-    df_top_category.groupby("country", as_index=False)["net_sales"]
-    .sum()
-    .sort_values("net_sales", ascending=False)
+country_totals = top_category_cube.top_k(["region"], measure="net_sales").rename(
+    columns={"region": "country"}
 )
 
 top_country = country_totals.iloc[0]["country"]
@@ -114,15 +70,13 @@ print(f"Top Country for this category: {top_country}")
 # -------------------------------------------------------------------
 # Drilldown: monthly trend for (top category, top country)
 # -------------------------------------------------------------------
-df_top_pair = df_top_category[df_top_category["country"] == top_country]
-
-monthly_trend = df_top_pair.groupby("month", as_index=False)["net_sales"].sum().sort_values("month")
+monthly_trend = top_category_cube.slice(region=top_country).rollup(["month"], "net_sales")
 
 # -------------------------------------------------------------------
 # VISUAL 1 — Category totals (bar chart)
 # -------------------------------------------------------------------
 plt.figure(figsize=(10, 6))
-plt.bar(category_totals["category"], category_totals["net_sales"])
+plt.bar(category_totals["category"].astype(str), category_totals["net_sales"])
 plt.title(f"Total Net Sales by Category ({latest_year})")
 plt.xlabel("Category")
 plt.ylabel("Net Sales")
@@ -135,7 +89,7 @@ plt.close()
 # VISUAL 2 — Country totals for top category
 # -------------------------------------------------------------------
 plt.figure(figsize=(10, 6))
-plt.bar(country_totals["country"], country_totals["net_sales"], color="teal")
+plt.bar(country_totals["country"].astype(str), country_totals["net_sales"], color="teal")
 plt.title(f"Net Sales for Top Category '{top_category}' by Country ({latest_year})")
 plt.xlabel("Country")
 plt.ylabel("Net Sales")
@@ -148,7 +102,7 @@ plt.close()
 # VISUAL 3 — Monthly trend for the top combination
 # -------------------------------------------------------------------
 plt.figure(figsize=(12, 6))
-plt.plot(monthly_trend["month"], monthly_trend["net_sales"], marker="o", color="purple")
+plt.plot(monthly_trend["month"].astype(str), monthly_trend["net_sales"], marker="o", color="purple")
 plt.title(f"Monthly Trend - {top_category} in {top_country} ({latest_year})")
 plt.xlabel("Month")
 plt.ylabel("Net Sales")
@@ -1,93 +1,50 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+from analytics_project.olap import Cube
+
 # ---------- PATHS ----------
-DATA = Path("data/prepared")
+DW = Path("data/dw/smart_sales.db")
 OUT = Path("olap/figures")
 OUT.mkdir(parents=True, exist_ok=True)
 
-# ---------- LOAD DATA ----------
-clean_path = DATA / "sales_data_prepared_clean.csv"
-raw_path = DATA / "sales_data_prepared.csv"
-
-if clean_path.exists():
-    sales = pd.read_csv(clean_path)
-else:
-    sales = pd.read_csv(raw_path)
-
-products = pd.read_csv(DATA / "products_data_prepared.csv")
-customers = pd.read_csv(DATA / "customers_data_prepared.csv")
-
-# some projects have "customer_id", some "customerid"
-if "customer_id" in customers.columns and "customerid" not in customers.columns:
-    customers = customers.rename(columns={"customer_id": "customerid"})
-
-# ---------- CLEAN & PREPARE ----------
-# choose the best date column
-if "SaleDate.1" in sales.columns:
-    date_col = "SaleDate.1"
-elif "saledate" in sales.columns:
-    date_col = "saledate"
-else:
-    raise ValueError("Could not find a usable date column in sales_data_prepared.")
-
-sales[date_col] = pd.to_datetime(sales[date_col], errors="coerce")
-
-if "saleamount" not in sales.columns:
-    raise ValueError("Could not find 'saleamount' column in sales data.")
-
-sales["saleamount"] = pd.to_numeric(sales["saleamount"], errors="coerce")
-
-# drop bad rows
-sales = sales.dropna(subset=[date_col, "saleamount"])
-
-# ---------- MERGE FACT + DIMENSIONS ----------
-df = sales.merge(products, on="productid", how="left")
-
-if "customerid" in sales.columns and "customerid" in customers.columns:
-    df = df.merge(
-        customers[["customerid", "country", "signup_date"]],
-        on="customerid",
-        how="left",
-    )
-
-# build time hierarchy
-df["Year"] = df[date_col].dt.year
-df["Month"] = df[date_col].dt.to_period("M").astype(str)
-
-# ---------- BUILD OLAP CUBE ----------
-cube = (
-    df.groupby(["category", "statecode", "Year", "Month"], as_index=False)["saleamount"]
-    .sum()
-    .rename(columns={"saleamount": "total_sales"})
-)
-
-cube.to_csv(OUT / "cube_category_state_year_month.csv", index=False)
+# ---------- LOAD OLAP CUBE ----------
+# etl_to_dw keeps the category x state x month aggregate in sales_cube, so this
+# reads a few rows per month instead of the sale fact; queries below run in memory.
+cube = Cube.from_sales_cube(DW)
+
+cells = cube.rollup(["category", "state_code", "year", "month"], "sale_amount")
+cells.rename(
+    columns={
+        "state_code": "statecode",
+        "year": "Year",
+        "month": "Month",
+        "sale_amount": "total_sales",
+    }
+).to_csv(OUT / "cube_category_state_year_month.csv", index=False)
 
 # ---------- BUSINESS GOAL: find top category ----------
-total_by_cat = cube.groupby("category")["total_sales"].sum().sort_values(ascending=False)
-top_category = total_by_cat.index[0]
+top_category = cube.top_k(["category"], k=1)["category"].iloc[0]
 
 print("\nTop Category:", top_category)
 
 # ---------- SLICE: only that category ----------
-slice_df = cube[cube["category"] == top_category]
+slice_cube = cube.slice(category=top_category)
 
 # ---------- DICE: category x state ----------
-dice = (
-    slice_df.groupby("statecode", as_index=False)["total_sales"]
-    .sum()
-    .sort_values("total_sales", ascending=False)
+dice = slice_cube.top_k(["state_code"]).rename(
+    columns={"state_code": "statecode", "sale_amount": "total_sales"}
 )
 dice.to_csv(OUT / "dice_top_category_by_state.csv", index=False)
 
 # ---------- DRILLDOWN: monthly trend ----------
-drill = slice_df.groupby("Month", as_index=False)["total_sales"].sum().sort_values("Month")
+drill = slice_cube.rollup(["month"]).rename(
+    columns={"month": "Month", "sale_amount": "total_sales"}
+)
 
 # ---------- VISUAL 1: Dice (bar chart by state) ----------
 plt.figure(figsize=(10, 5))
-plt.bar(dice["statecode"], dice["total_sales"])
+plt.bar(dice["statecode"].astype(str), dice["total_sales"])
 plt.title(f"Total Sales for Top Category '{top_category}' by State")
 plt.xlabel("State Code")
 plt.ylabel("Total Sales")
@@ -97,7 +54,7 @@ plt.close()
 
 # ---------- VISUAL 2: Drilldown (line chart by month) ----------
 plt.figure(figsize=(12, 5))
-plt.plot(drill["Month"], drill["total_sales"], marker="o")
+plt.plot(drill["Month"].astype(str), drill["total_sales"], marker="o")
 plt.title(f"Monthly Sales Trend for Top Category '{top_category}'")
 plt.xlabel("Month")
 plt.ylabel("Total Sales")
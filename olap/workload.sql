@@ -0,0 +1,36 @@
+-- OLAP workload for the index advisor (python -m analytics_project.index_advisor).
+-- One statement per query, named by the "-- name:" line above it.
+
+-- name: revenue_by_region_and_category
+SELECT * FROM v_sales_by_region_and_category;
+
+-- name: category_by_month
+SELECT p.category, s.date_key / 100 AS month, SUM(s.sale_amount) AS total_sales
+FROM sale s
+JOIN product p ON p.product_id = s.product_id
+GROUP BY p.category, month;
+
+-- name: state_by_month_2025
+SELECT s.state_code, s.date_key / 100 AS month, SUM(s.sale_amount) AS total_sales
+FROM sale s
+WHERE s.date_key BETWEEN 20250101 AND 20251231
+GROUP BY s.state_code, month;
+
+-- name: one_state_daily_2025
+SELECT s.sale_date, SUM(s.sale_amount) AS total_sales, COUNT(*) AS orders
+FROM sale s
+WHERE s.state_code = 'TX' AND s.sale_date >= '2025-01-01'
+GROUP BY s.sale_date;
+
+-- name: one_product_quarter
+SELECT SUM(s.sale_amount) AS total_sales
+FROM sale s
+WHERE s.product_id = 2001 AND s.sale_date BETWEEN '2025-01-01' AND '2025-03-31';
+
+-- name: top_customers_2025
+SELECT s.customer_id, SUM(s.sale_amount) AS total_sales
+FROM sale s
+WHERE s.sale_date >= '2025-01-01'
+GROUP BY s.customer_id
+ORDER BY total_sales DESC
+LIMIT 10;
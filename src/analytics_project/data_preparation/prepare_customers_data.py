@@ -1,7 +1,10 @@
 # src/analytics_project/data_preparation/prepare_customers_data.py
 import pandas as pd
-from ..utils.logger import get_logger
-from .. import settings
+from analytics_project.utils.logger import get_logger
+from analytics_project import settings
+from analytics_project.prepared_io import write_prepared
+from analytics_project.profiling import file_bytes, profile_step
+from analytics_project.schemas import date_format, read_csv
 from analytics_project.data_scrubber import DataScrubber
 
 log = get_logger("prepare_customers")
@@ -14,7 +17,9 @@ def main() -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     log.info(f"Reading raw file: {raw_path}")
-    df = pd.read_csv(raw_path)
+    with profile_step("prepare_customers.read", bytes_read=file_bytes(raw_path)) as rec:
+        df = read_csv(raw_path, parse_dates=False)  # registry dtypes; dates parsed below
+        rec["rows_out"] = len(df)
     raw_count = len(df)
 
     scrub = DataScrubber()
@@ -54,32 +59,39 @@ def main() -> None:
         if old in df.columns and new not in df.columns:
             df = df.rename(columns={old: new})
 
-    # 3) Strings / categories
-    df = scrub.trim_whitespace(df)
-    cols_to_norm = [c for c in ["country", "preferred_contact"] if c in df.columns]
-    if cols_to_norm:
-        df = scrub.normalize_categories(df, cols_to_norm, case="lower")
-    else:
-        print("WARNING: no 'country' or 'preferred_contact' column found; skipping normalization")
-
-    # 4) Types (guarded)
-    if "signup_date" in df.columns:
-        df = scrub.to_datetime(df, ["signup_date"])
-    else:
-        print("WARNING: no 'signup_date' column found; skipping date parsing")
-
-    if "loyalty_points" in df.columns:
-        df = scrub.to_numeric(df, ["loyalty_points"])
-    else:
-        print("WARNING: no 'loyalty_points' column found; skipping numeric cast")
-
-    # --- sanity check AFTER types (TEMP: remove later) ---
-    # print("AFTER TYPES dtypes:")
-    # try:
-    # print(df[["signup_date", "loyalty_points"]].dtypes)
-    # xcept KeyError:
-    # If either column doesn't exist, show what's there
-    # print("Available columns:", list(df.columns))
+    # 3-7) Strings, types, empties/duplicates, missing values and outliers run as
+    # one fused plan, in place (df is ours), each column visited once per pass.
+    # Steps naming a column the file doesn't have are skipped (strict=False).
+    for col in ("country", "preferred_contact", "signup_date", "loyalty_points"):
+        if col not in df.columns:
+            print(f"WARNING: no '{col}' column found; skipping its cleanup steps")
+
+    plan = [
+        {"step": "trim_whitespace"},
+        {
+            "step": "normalize_categories",
+            "columns": ["country", "preferred_contact"],
+            "case": "lower",
+        },
+        {
+            "step": "to_datetime",
+            "columns": ["signup_date"],
+            "format": date_format(raw_path, "JoinDate"),
+        },
+        {"step": "to_numeric", "columns": ["loyalty_points"]},
+        {"step": "drop_empty_rows"},
+        {"step": "drop_duplicates"},
+        {
+            "step": "fill_missing",
+            "strategies": {
+                "country": {"method": "mode"},
+                "preferred_contact": {"method": "mode"},
+                "loyalty_points": {"method": "constant", "value": 0},
+            },
+        },
+        {"step": "remove_outliers_iqr", "columns": ["loyalty_points"], "factor": 1.5},
+    ]
+    df = scrub.run_plan(df, plan, strict=False, inplace=True)
 
     # Optional safety assertions (will raise if types are wrong)
     if "signup_date" in df.columns:
@@ -89,25 +101,6 @@ def main() -> None:
     if "loyalty_points" in df.columns:
         assert pd.api.types.is_float_dtype(df["loyalty_points"]), "loyalty_points is not float"
 
-    # 5) Drop empties & duplicates
-    df = scrub.drop_empty_rows(df)
-    df = scrub.drop_duplicates(df)
-
-    # 6) Fill missing values
-    fill_plan = {}
-    if "country" in df.columns:
-        fill_plan["country"] = {"method": "mode"}
-    if "preferred_contact" in df.columns:
-        fill_plan["preferred_contact"] = {"method": "mode"}
-    if "loyalty_points" in df.columns:
-        fill_plan["loyalty_points"] = {"method": "constant", "value": 0}
-    if fill_plan:
-        df = scrub.fill_missing(df, fill_plan)
-
-    # 7) (Optional) outliers
-    if "loyalty_points" in df.columns:
-        df = scrub.remove_outliers_iqr(df, ["loyalty_points"], factor=1.5)
-
     # 8) Validate schema (only for columns that exist)
     required = {
         "customer_id": "string",
@@ -122,8 +115,10 @@ def main() -> None:
         scrub.validate_schema(df, required_subset)
 
     # 9) Write
-    df.to_csv(out_path, index=False)
-    log.info(f"Wrote cleaned file to {out_path}")
+    with profile_step("prepare_customers.write", df) as rec:
+        written = write_prepared(df, out_path)
+        rec["bytes_written"] = file_bytes(written)
+    log.info(f"Wrote cleaned file to {written}")
     print(f"Customers raw count: {raw_count}")
     print(f"Customers prepared count: {len(df)}")
 
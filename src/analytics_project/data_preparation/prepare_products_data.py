@@ -4,8 +4,11 @@ import numpy as np
 from typing import Iterable
 
 # bring in the logger adapter and settings file
-from ..utils.logger import get_logger
-from .. import settings
+from analytics_project.utils.logger import get_logger
+from analytics_project import settings
+from analytics_project.prepared_io import write_prepared
+from analytics_project.profiling import file_bytes, profile_step
+from analytics_project.schemas import read_csv
 from analytics_project.data_scrubber import DataScrubber
 
 # initialize a logger specific to this script
@@ -54,7 +57,9 @@ def main() -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     log.info(f"Reading raw file: {raw_path}")
-    df = pd.read_csv(raw_path)
+    with profile_step("prepare_products.read", bytes_read=file_bytes(raw_path)) as rec:
+        df = read_csv(raw_path)  # dtypes from the schema registry
+        rec["rows_out"] = len(df)
     raw_count = len(df)
 
     # 0) reusable scrubber
@@ -70,24 +75,19 @@ def main() -> None:
         # "Category": "category",
     }
 
-    # 1) columns & strings
-    df = scrub.standardize_columns(df, mapping=mapping)  # -> snake_case headers
+    # 1-5) columns, strings, types, dedupe, missing values, outliers: one fused plan
+    plan = [
+        {"step": "standardize_columns", "mapping": mapping},  # -> snake_case headers
+        {"step": "trim_whitespace"},
+        {"step": "normalize_categories", "columns": ["category"], "case": "lower"},  # optional
+        {"step": "to_numeric", "columns": ["unit_price"]},
+        {"step": "drop_empty_rows"},
+        {"step": "drop_duplicates"},
+        {"step": "fill_missing", "strategies": {"category": {"method": "mode"}}},
+        {"step": "remove_outliers_iqr", "columns": ["unit_price"], "factor": 1.5},  # optional
+    ]
+    df = scrub.run_plan(df, plan, inplace=True)
     print("Columns after standardize:", list(df.columns))  # TEMP: remove later
-    df = scrub.trim_whitespace(df)
-    df = scrub.normalize_categories(df, ["category"], case="lower")  # optional
-
-    # 2) types
-    df = scrub.to_numeric(df, ["unit_price"])
-
-    # 3) dedupe & empties
-    df = scrub.drop_empty_rows(df)
-    df = scrub.drop_duplicates(df)
-
-    # 4) missing values
-    df = scrub.fill_missing(df, {"category": {"method": "mode"}})
-
-    # 5) (optional) outliers
-    df = scrub.remove_outliers_iqr(df, ["unit_price"], factor=1.5)
 
     # 6) schema (only include columns that really exist)
     required = {
@@ -96,8 +96,10 @@ def main() -> None:
     scrub.validate_schema(df, required)
 
     # 7) write
-    df.to_csv(out_path, index=False)
-    log.info(f"Wrote cleaned file to {out_path}")
+    with profile_step("prepare_products.write", df) as rec:
+        written = write_prepared(df, out_path)
+        rec["bytes_written"] = file_bytes(written)
+    log.info(f"Wrote cleaned file to {written}")
     print(f"Products raw count: {raw_count}")
     print(f"Products prepared count: {len(df)}")
 
@@ -1,7 +1,9 @@
 # src/analytics_project/data_preparation/prepare_sales_data.py
-import pandas as pd
-from ..utils.logger import get_logger
-from .. import settings
+from analytics_project.utils.logger import get_logger
+from analytics_project import settings
+from analytics_project.prepared_io import write_prepared
+from analytics_project.profiling import file_bytes, profile_step
+from analytics_project.schemas import date_format, read_csv
 from analytics_project.data_scrubber import DataScrubber
 
 log = get_logger("prepare_sales")
@@ -14,7 +16,9 @@ def main() -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     log.info(f"Reading raw file: {raw_path}")
-    df = pd.read_csv(raw_path)
+    with profile_step("prepare_sales.read", bytes_read=file_bytes(raw_path)) as rec:
+        df = read_csv(raw_path, parse_dates=False)  # registry dtypes; dates parsed below
+        rec["rows_out"] = len(df)
     raw_count = len(df)
 
     scrub = DataScrubber()
@@ -32,40 +36,32 @@ def main() -> None:
         "statecode": "state_code",
     }
 
-    # 2️⃣ Standardize columns
-    df = scrub.standardize_columns(df, mapping=mapping)
+    # 2️⃣-7️⃣ Columns, strings, types, empties/duplicates, missing values and outliers
+    # as one fused plan; steps for columns the file doesn't have are skipped.
+    plan = [
+        {"step": "standardize_columns", "mapping": mapping},
+        {"step": "trim_whitespace"},
+        {"step": "normalize_categories", "columns": ["state_code"], "case": "upper"},
+        {
+            "step": "to_datetime",
+            "columns": ["order_date"],
+            "format": date_format(raw_path, "SaleDate"),
+        },
+        {"step": "to_numeric", "columns": ["sale_amount", "discount_pct"]},
+        {"step": "drop_empty_rows"},
+        {"step": "drop_duplicates"},
+        {
+            "step": "fill_missing",
+            "strategies": {
+                "discount_pct": {"method": "constant", "value": 0},
+                "state_code": {"method": "mode"},
+            },
+        },
+        {"step": "remove_outliers_iqr", "columns": ["sale_amount"], "factor": 1.5},
+    ]
+    df = scrub.run_plan(df, plan, strict=False, inplace=True)
     # print("Sales columns after standardize:", list(df.columns))  # TEMP debug
 
-    # 3️⃣ Clean strings and normalize state codes
-    df = scrub.trim_whitespace(df)
-    if "state_code" in df.columns:
-        df["state_code"] = df["state_code"].astype(str).str.strip().str.upper()
-
-    # 4️⃣ Convert types
-    if "order_date" in df.columns:
-        df = scrub.to_datetime(df, ["order_date"])
-    if "sale_amount" in df.columns:
-        df = scrub.to_numeric(df, ["sale_amount"])
-    if "discount_pct" in df.columns:
-        df = scrub.to_numeric(df, ["discount_pct"])
-
-    # 5️⃣ Drop empties & duplicates
-    df = scrub.drop_empty_rows(df)
-    df = scrub.drop_duplicates(df)
-
-    # 6️⃣ Fill missing values
-    fill_plan = {}
-    if "discount_pct" in df.columns:
-        fill_plan["discount_pct"] = {"method": "constant", "value": 0}
-    if "state_code" in df.columns:
-        fill_plan["state_code"] = {"method": "mode"}
-    if fill_plan:
-        df = scrub.fill_missing(df, fill_plan)
-
-    # 7️⃣ (Optional) Outlier handling
-    if "sale_amount" in df.columns:
-        df = scrub.remove_outliers_iqr(df, ["sale_amount"], factor=1.5)
-
     # 8️⃣ Derived metrics (optional)
     if "discount_pct" in df.columns and "sale_amount" in df.columns:
         df["net_sale_amount"] = df["sale_amount"] * (1 - (df["discount_pct"].fillna(0) / 100))
@@ -88,8 +84,10 @@ def main() -> None:
         scrub.validate_schema(df, required_subset)
 
     # 🔟 Write cleaned data
-    df.to_csv(out_path, index=False)
-    log.info(f"Wrote cleaned file to {out_path}")
+    with profile_step("prepare_sales.write", df) as rec:
+        written = write_prepared(df, out_path)
+        rec["bytes_written"] = file_bytes(written)
+    log.info(f"Wrote cleaned file to {written}")
     print(f"Sales raw count: {raw_count}")
     print(f"Sales prepared count: {len(df)}")
 
@@ -1,17 +1,219 @@
 # src/analytics_project/data_scrubber.py
 from __future__ import annotations
 import re
-from typing import Dict, List, Optional, Union
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 
+from analytics_project.profiling import profile_step, profiled
+from analytics_project.quantile_sketch import ExactQuantiles, QuantileSketch
+
 StrOrList = Union[str, List[str]]
 
+# A scrub step is a dict naming a DataScrubber method plus its keyword arguments,
+# e.g. {"step": "to_numeric", "columns": ["sale_amount"]}.
+Step = Dict[str, Any]
+
+# Steps that only look at the rows they are given, so they can run chunk by chunk.
+# fill_missing with median/mean/mode and remove_outliers_iqr without precomputed
+# quartiles need whole-column stats; streaming mode gathers those in an extra pass
+# over the source before writing anything.
+STREAMABLE_STEPS = frozenset(
+    {
+        "standardize_columns",
+        "trim_whitespace",
+        "to_numeric",
+        "to_datetime",
+        "normalize_categories",
+        "fill_missing",
+        "drop_empty_rows",
+        "remove_outliers_iqr",
+    }
+)
+
+
+# Steps that drop rows (or need every row at once). In a fused plan they end the
+# current column pass; everything between them runs column by column.
+ROW_STEPS = frozenset({"drop_duplicates", "drop_empty_rows", "remove_outliers_iqr"})
+
+# Column ops queued by a fused plan: (kind, kwargs), run in plan order per column.
+ColumnOp = Tuple[str, Dict[str, Any]]
+
+# Text columns with at most this many distinct values per non-null row are stored
+# as pandas ``category`` (dictionary-encoded) before string cleanup.
+CATEGORY_MAX_RATIO = 0.5
+
+# Streaming mode fills count each distinct value exactly; past this many distinct
+# values those counts would grow with the file, so a mode fill is refused.
+MODE_MAX_DISTINCT = 100_000
+
 
 def _to_list(x: StrOrList) -> List[str]:
     return [x] if isinstance(x, str) else list(x)
 
 
+def _split_step(step: Step) -> Tuple[str, Dict[str, Any]]:
+    spec = dict(step)
+    try:
+        name = spec.pop("step")
+    except KeyError:
+        raise ValueError(f"Scrub step is missing its 'step' name: {step}") from None
+    return name, spec
+
+
+def _needs_fill_stats(strategies: Dict[str, Dict]) -> bool:
+    return any(spec.get("method", "constant").lower() != "constant" for spec in strategies.values())
+
+
+def _needs_stats(name: str, kwargs: Dict[str, Any]) -> bool:
+    if name == "fill_missing":
+        return _needs_fill_stats(kwargs["strategies"])
+    return name == "remove_outliers_iqr" and kwargs.get("quartiles") is None
+
+
+def _add_counts(total: Optional[pd.Series], counts: pd.Series) -> pd.Series:
+    if isinstance(counts.index, pd.CategoricalIndex):
+        # chunks categorize independently; count by value, not by category code
+        counts = counts[counts > 0]
+        counts.index = counts.index.astype(object)
+    return counts if total is None else total.add(counts, fill_value=0)
+
+
+def _mode_from_counts(counts: pd.Series) -> Any:
+    if counts.empty:
+        return None
+    top = counts[counts == counts.max()]
+    # pandas' Series.mode() sorts ties, and fill_missing takes the first one
+    return top.sort_index().index[0]
+
+
+def _working_frame(df: pd.DataFrame, inplace: bool) -> pd.DataFrame:
+    """Frame a scrub method may write to: ``df`` itself when ``inplace``, else a copy.
+
+    Under pandas Copy-on-Write a shallow copy is enough, because column writes on it
+    never reach ``df``; otherwise the copy has to be deep.
+    """
+    if inplace:
+        return df
+    if pd.options.mode.copy_on_write is True:
+        return df.copy(deep=False)
+    return df.copy()
+
+
+def _is_text(ser: pd.Series) -> bool:
+    return pd.api.types.is_string_dtype(ser) or ser.dtype == "object"
+
+
+def _is_category(ser: pd.Series) -> bool:
+    return isinstance(ser.dtype, pd.CategoricalDtype)
+
+
+def _as_category(ser: pd.Series, max_ratio: float) -> pd.Series:
+    """``ser`` as a sorted ``category`` column if it is low-cardinality text, else as is."""
+    if _is_category(ser) or not _is_text(ser):
+        return ser
+    try:
+        codes, uniques = pd.factorize(ser, sort=True)
+    except TypeError:  # mixed types that can't be sorted
+        return ser
+    if len(uniques) > max_ratio * max(int((codes >= 0).sum()), 1):
+        return ser
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=uniques), index=ser.index, name=ser.name
+    )
+
+
+# String transforms take and return a "string" Series of distinct values.
+TextFunc = Callable[[pd.Series], pd.Series]
+
+
+def _collapse(values: pd.Series) -> pd.Series:
+    return values.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+_CASES: Dict[str, TextFunc] = {
+    "lower": lambda values: values.str.lower(),
+    "upper": lambda values: values.str.upper(),
+    "title": lambda values: values.str.title(),
+}
+
+
+# Rows sampled to guess whether a text column repeats enough to factorize.
+_CARDINALITY_SAMPLE = 10_000
+
+
+def _mostly_unique(ser: pd.Series) -> bool:
+    head = ser.iloc[:_CARDINALITY_SAMPLE]
+    return len(ser) > len(head) and head.nunique() > len(head) // 2
+
+
+def _text_transform(ser: pd.Series, funcs: List[TextFunc]) -> pd.Series:
+    """Run string transforms once per distinct value and map the results back to rows.
+
+    Categorical columns stay categorical (categories that become equal merge); other
+    text comes back as "string" dtype. A column the transforms leave unchanged is
+    returned without rebuilding it.
+    """
+    if _is_category(ser):
+        codes, values = ser.cat.codes.to_numpy(), ser.cat.categories
+    elif _mostly_unique(ser):  # factorizing would not save any work
+        out = ser.astype("string")
+        for func in funcs:
+            out = func(out)
+        return out
+    else:
+        codes, values = pd.factorize(ser)
+    old = pd.Series(values, dtype="string")
+    new = old
+    for func in funcs:
+        new = func(new)
+    if new.equals(old) and (_is_category(ser) or ser.dtype == "string"):
+        return ser
+    if not _is_category(ser):
+        return pd.Series(new.array.take(codes, allow_fill=True), index=ser.index, name=ser.name)
+    categories, remap = np.unique(new.to_numpy(dtype=object), return_inverse=True)
+    codes = np.where(codes >= 0, remap[codes], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=categories), index=ser.index, name=ser.name
+    )
+
+
+def _collapse_whitespace(ser: pd.Series) -> pd.Series:
+    return _text_transform(ser, [_collapse])
+
+
+def _fillna(ser: pd.Series, value: Any) -> pd.Series:
+    if _is_category(ser) and not pd.isna(value) and value not in ser.cat.categories:
+        ser = ser.cat.add_categories([value])
+    return ser.fillna(value)
+
+
+def _fill_value(ser: pd.Series, spec: Dict, col: str) -> Tuple[bool, Any]:
+    """Return (found, value) for one fill_missing strategy on one column."""
+    method = spec.get("method", "constant").lower()
+    if method == "constant":
+        return True, spec.get("value")
+    if method == "median":
+        return True, ser.median()
+    if method == "mean":
+        return True, ser.mean()
+    if method == "mode":
+        mode_series = ser.mode(dropna=True)
+        return len(mode_series) > 0, mode_series.iloc[0] if len(mode_series) > 0 else None
+    raise ValueError(f"Unsupported fill method: {method} for column {col}")
+
+
 class DataScrubber:
+    def __init__(self, categorize: bool = True, category_max_ratio: float = CATEGORY_MAX_RATIO):
+        # categorize: store low-cardinality text columns as ``category`` when they are
+        # cleaned, so whitespace/case fixes run once per distinct value
+        self.categorize = categorize
+        self.category_max_ratio = category_max_ratio
+
+    def _text_column(self, ser: pd.Series) -> pd.Series:
+        return _as_category(ser, self.category_max_ratio) if self.categorize else ser
+
     @staticmethod
     def _snake(s: str) -> str:
         s = s.strip()
@@ -19,14 +221,12 @@ class DataScrubber:
         s = re.sub(r"_+", "_", s)
         return s.strip("_").lower()
 
-    def standardize_columns(
-        self, df: pd.DataFrame, mapping: Optional[Dict[str, str]] = None, snake_case: bool = True
-    ) -> pd.DataFrame:
-        df = df.copy()
-        if mapping:
-            df = df.rename(columns=mapping)
+    def _standard_names(
+        self, columns: Iterable[str], mapping: Optional[Dict[str, str]], snake_case: bool
+    ) -> List[str]:
         new_cols, seen = [], {}
-        for c in df.columns:
+        for c in columns:
+            c = mapping.get(c, c) if mapping else c
             nc = self._snake(c) if snake_case else c
             base, i = nc, seen.get(nc, 0)
             while nc in new_cols:
@@ -34,16 +234,32 @@ class DataScrubber:
                 nc = f"{base}_{i}"
             seen[base] = i
             new_cols.append(nc)
-        df.columns = new_cols
+        return new_cols
+
+    # Every method takes ``inplace``: when True it writes into ``df`` and returns that
+    # same frame (so ``df = scrub.x(df, inplace=True)`` still chains), instead of
+    # working on a copy.
+    @profiled()
+    def standardize_columns(
+        self,
+        df: pd.DataFrame,
+        mapping: Optional[Dict[str, str]] = None,
+        snake_case: bool = True,
+        inplace: bool = False,
+    ) -> pd.DataFrame:
+        df = _working_frame(df, inplace)
+        df.columns = self._standard_names(df.columns, mapping, snake_case)
         return df
 
-    def trim_whitespace(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
+    @profiled()
+    def trim_whitespace(self, df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        df = _working_frame(df, inplace)
         for c in df.columns:
-            if pd.api.types.is_string_dtype(df[c]) or df[c].dtype == "object":
-                df[c] = df[c].astype("string").str.replace(r"\s+", " ", regex=True).str.strip()
+            if _is_text(df[c]):
+                df[c] = _collapse_whitespace(self._text_column(df[c]))
         return df
 
+    @profiled()
     def to_datetime(
         self,
         df: pd.DataFrame,
@@ -51,81 +267,378 @@ class DataScrubber:
         dayfirst: bool = False,
         utc: bool = False,
         errors: str = "coerce",
+        format: Optional[str] = None,
+        inplace: bool = False,
     ) -> pd.DataFrame:
-        df = df.copy()
+        # format: explicit strftime format (see schemas.date_format); skips inference
+        df = _working_frame(df, inplace)
         for c in _to_list(columns):
-            df[c] = pd.to_datetime(df[c], dayfirst=dayfirst, utc=utc, errors=errors)
+            df[c] = pd.to_datetime(df[c], dayfirst=dayfirst, utc=utc, errors=errors, format=format)
         return df
 
+    @profiled()
     def to_numeric(
-        self, df: pd.DataFrame, columns: StrOrList, errors: str = "coerce"
+        self, df: pd.DataFrame, columns: StrOrList, errors: str = "coerce", inplace: bool = False
     ) -> pd.DataFrame:
-        df = df.copy()
+        df = _working_frame(df, inplace)
         for c in _to_list(columns):
             df[c] = pd.to_numeric(df[c], errors=errors)
         return df
 
-    def drop_duplicates(self, df: pd.DataFrame, subset: Optional[List[str]] = None) -> pd.DataFrame:
-        return df.drop_duplicates(subset=subset).reset_index(drop=True)
+    @profiled()
+    def drop_duplicates(
+        self, df: pd.DataFrame, subset: Optional[List[str]] = None, inplace: bool = False
+    ) -> pd.DataFrame:
+        if not inplace:
+            return df.drop_duplicates(subset=subset).reset_index(drop=True)
+        df.drop_duplicates(subset=subset, inplace=True)
+        df.reset_index(drop=True, inplace=True)
+        return df
 
-    def drop_empty_rows(self, df: pd.DataFrame) -> pd.DataFrame:
-        return df.dropna(how="all").reset_index(drop=True)
+    @profiled()
+    def drop_empty_rows(self, df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        if not inplace:
+            return df.dropna(how="all").reset_index(drop=True)
+        df.dropna(how="all", inplace=True)
+        df.reset_index(drop=True, inplace=True)
+        return df
 
-    def fill_missing(self, df: pd.DataFrame, strategies: Dict[str, Dict]) -> pd.DataFrame:
-        df = df.copy()
+    @profiled()
+    def fill_missing(
+        self, df: pd.DataFrame, strategies: Dict[str, Dict], inplace: bool = False
+    ) -> pd.DataFrame:
+        df = _working_frame(df, inplace)
         for col, spec in strategies.items():
-            method = spec.get("method", "constant").lower()
-            if method == "constant":
-                df[col] = df[col].fillna(spec.get("value"))
-            elif method == "median":
-                df[col] = df[col].fillna(df[col].median())
-            elif method == "mean":
-                df[col] = df[col].fillna(df[col].mean())
-            elif method == "mode":
-                mode_series = df[col].mode(dropna=True)
-                if len(mode_series) > 0:
-                    df[col] = df[col].fillna(mode_series.iloc[0])
-            else:
-                raise ValueError(f"Unsupported fill method: {method} for column {col}")
+            found, value = _fill_value(df[col], spec, col)
+            if found:
+                df[col] = _fillna(df[col], value)
         return df
 
+    @profiled()
     def normalize_categories(
-        self, df: pd.DataFrame, columns: StrOrList, case: str = "lower"
+        self, df: pd.DataFrame, columns: StrOrList, case: str = "lower", inplace: bool = False
     ) -> pd.DataFrame:
-        df = df.copy()
+        df = _working_frame(df, inplace)
         for c in _to_list(columns):
-            if pd.api.types.is_string_dtype(df[c]) or df[c].dtype == "object":
-                ser = df[c].astype("string").str.replace(r"\s+", " ", regex=True).str.strip()
-                if case == "lower":
-                    ser = ser.str.lower()
-                elif case == "upper":
-                    ser = ser.str.upper()
-                elif case == "title":
-                    ser = ser.str.title()
-                df[c] = ser
+            if _is_text(df[c]):
+                funcs = [_collapse, *([_CASES[case]] if case in _CASES else [])]
+                df[c] = _text_transform(self._text_column(df[c]), funcs)
         return df
 
+    @profiled()
     def remove_outliers_iqr(
-        self, df: pd.DataFrame, columns: StrOrList, factor: float = 1.5
+        self,
+        df: pd.DataFrame,
+        columns: StrOrList,
+        factor: float = 1.5,
+        quartiles: Optional[Dict[str, Tuple[float, float]]] = None,
+        inplace: bool = False,
     ) -> pd.DataFrame:
-        df = df.copy()
+        # quartiles: precomputed {column: (q1, q3)}, e.g. from sketch_quartiles over
+        # a whole chunked file; columns missing from it are left alone.
         mask = pd.Series(True, index=df.index)
         for c in _to_list(columns):
             if not pd.api.types.is_numeric_dtype(df[c]):
                 continue
-            q1, q3 = df[c].quantile(0.25), df[c].quantile(0.75)
+            if quartiles is None:
+                q1, q3 = df[c].quantile(0.25), df[c].quantile(0.75)
+            elif c in quartiles:
+                q1, q3 = quartiles[c]
+            else:
+                continue
             iqr = q3 - q1
             low, high = q1 - factor * iqr, q3 + factor * iqr
             mask &= df[c].between(low, high) | df[c].isna()
-        return df.loc[mask].reset_index(drop=True)
+        if not inplace:
+            return df.loc[mask].reset_index(drop=True)
+        df.drop(index=df.index[~mask.to_numpy()], inplace=True)
+        df.reset_index(drop=True, inplace=True)
+        return df
 
+    @profiled()
     def validate_schema(self, df: pd.DataFrame, required_cols: Dict[str, str]) -> None:
         missing = [c for c in required_cols if c not in df.columns]
         if missing:
             raise ValueError(f"Missing required columns: {missing}")
-        tmp = df.copy()
+        # check one column at a time; the trial casts are thrown away
         for c, dt in required_cols.items():
+            if str(df[c].dtype) == dt:
+                continue
             if dt.startswith("datetime64"):
-                tmp[c] = pd.to_datetime(tmp[c], errors="raise")
+                pd.to_datetime(df[c], errors="raise")
+            else:
+                df[c].astype(dt)
+
+    # --- fused plans ---
+    @profiled()
+    def run_plan(
+        self, df: pd.DataFrame, plan: Iterable[Step], strict: bool = True, inplace: bool = False
+    ) -> pd.DataFrame:
+        """Run a declarative list of scrub steps as fused column passes.
+
+        The frame is copied once (not at all with ``inplace=True``). Between
+        row-level steps (see ``ROW_STEPS``) each column is visited once and runs
+        its whole chain of queued steps, and steps that would not change the
+        column (already numeric, no missing values, whitespace already collapsed)
+        are skipped. With ``strict=False`` steps that name a column the frame
+        does not have are ignored instead of raising.
+        """
+        df = _working_frame(df, inplace)
+        pending: Dict[str, List[ColumnOp]] = {}
+
+        def queue(col: str, kind: str, **kwargs: Any) -> None:
+            if col not in df.columns:
+                if strict:
+                    raise KeyError(col)
+                return
+            pending.setdefault(col, []).append((kind, kwargs))
+
+        for step in plan:
+            name, kwargs = _split_step(step)
+            if name == "standardize_columns":
+                self._run_column_ops(df, pending)
+                df.columns = self._standard_names(
+                    df.columns, kwargs.get("mapping"), kwargs.get("snake_case", True)
+                )
+            elif name in ROW_STEPS or name == "validate_schema":
+                self._run_column_ops(df, pending)
+                if not strict and "columns" in kwargs:
+                    kwargs["columns"] = [c for c in _to_list(kwargs["columns"]) if c in df.columns]
+                if name == "validate_schema":
+                    self.validate_schema(df, **kwargs)
+                else:
+                    df = getattr(self, name)(df, inplace=True, **kwargs)
+            elif name == "trim_whitespace":
+                for c in df.columns:
+                    queue(c, "trim")
+            elif name == "normalize_categories":
+                for c in _to_list(kwargs["columns"]):
+                    queue(c, "case", case=kwargs.get("case", "lower"))
+            elif name in ("to_numeric", "to_datetime"):
+                opts = {k: v for k, v in kwargs.items() if k != "columns"}
+                for c in _to_list(kwargs["columns"]):
+                    queue(c, name, **opts)
+            elif name == "fill_missing":
+                for c, spec in kwargs["strategies"].items():
+                    queue(c, "fill", spec=spec)
+            else:
+                raise ValueError(f"Unknown scrub step: {name}")
+        self._run_column_ops(df, pending)
+        return df
+
+    def _run_column_ops(self, df: pd.DataFrame, pending: Dict[str, List[ColumnOp]]) -> None:
+        for col, ops in pending.items():
+            # one record per column: its queued steps run fused, so they share a timing
+            with profile_step(
+                f"DataScrubber.column_pass:{col}", df, ops=[kind for kind, _ in ops]
+            ) as rec:
+                self._run_ops(df, col, ops)
+                rec["rows_out"] = len(df)
+        pending.clear()
+
+    def _run_ops(self, df: pd.DataFrame, col: str, ops: List[ColumnOp]) -> None:
+        ser = orig = df[col]
+        clean = False  # whitespace already collapsed in this pass
+        funcs: List[TextFunc] = []  # queued string transforms, run in one pass
+        for kind, kwargs in ops:
+            if kind in ("trim", "case"):
+                if not _is_text(ser):
+                    continue
+                if not clean:
+                    ser, clean = self._text_column(ser), True
+                    funcs.append(_collapse)
+                if kind == "case" and kwargs["case"] in _CASES:
+                    funcs.append(_CASES[kwargs["case"]])
+                continue
+            if funcs:
+                ser, funcs = _text_transform(ser, funcs), []
+            if kind == "to_numeric":
+                if pd.api.types.is_numeric_dtype(ser) and not pd.api.types.is_bool_dtype(ser):
+                    continue
+                ser, clean = pd.to_numeric(ser, errors=kwargs.get("errors", "coerce")), False
+            elif kind == "to_datetime":
+                if pd.api.types.is_datetime64_dtype(ser) and not kwargs.get("utc", False):
+                    continue
+                ser = pd.to_datetime(
+                    ser,
+                    dayfirst=kwargs.get("dayfirst", False),
+                    utc=kwargs.get("utc", False),
+                    errors=kwargs.get("errors", "coerce"),
+                    format=kwargs.get("format"),
+                )
+                clean = False
+            elif kind == "fill":
+                if not ser.isna().any():
+                    continue
+                found, value = _fill_value(ser, kwargs["spec"], col)
+                if found:
+                    ser = _fillna(ser, value)
+                    clean = clean and kwargs["spec"].get("method", "constant") != "constant"
+        if funcs:
+            ser = _text_transform(ser, funcs)
+        if ser is not orig:
+            df[col] = ser
+
+    # --- streaming mode ---
+    @profiled()
+    def apply_steps(
+        self, df: pd.DataFrame, steps: Iterable[Step], inplace: bool = False
+    ) -> pd.DataFrame:
+        for step in steps:
+            name, kwargs = _split_step(step)
+            if name == "validate_schema":
+                self.validate_schema(df, **kwargs)
+                continue
+            df = getattr(self, name)(df, inplace=inplace, **kwargs)
+        return df
+
+    def scrub_chunks(
+        self, chunks: Iterable[pd.DataFrame], steps: List[Step], inplace: bool = False
+    ) -> Iterator[pd.DataFrame]:
+        """Run row-local scrub steps over an iterator of chunks, one chunk at a time."""
+        for step in steps:
+            name, kwargs = _split_step(step)
+            if name not in STREAMABLE_STEPS:
+                raise ValueError(f"Step '{name}' cannot run in streaming mode")
+            if _needs_stats(name, kwargs):
+                raise ValueError(
+                    f"Step '{name}' needs whole-column stats from a re-readable source; "
+                    "use scrub_csv_in_chunks"
+                )
+        for chunk in chunks:
+            yield self.apply_steps(chunk, steps, inplace=inplace)
+
+    @profiled(rows_out=lambda rows: rows)
+    def scrub_csv_in_chunks(
+        self,
+        src: Union[str, Path],
+        dest: Union[str, Path],
+        steps: List[Step],
+        chunksize: int = 100_000,
+        quantile_error: Optional[float] = 0.01,
+        **read_kwargs: Any,
+    ) -> int:
+        """Scrub a CSV chunk by chunk and append each cleaned chunk to ``dest``.
+
+        Peak memory is bounded by ``chunksize`` rather than the file size. Steps that
+        need whole-column stats are resolved with extra read-only passes over ``src``.
+        Outlier quartiles and median fills come from a ``QuantileSketch`` with rank
+        error ``quantile_error``; pass ``None`` for exact values (keeps those columns
+        in memory). Mode fills count values exactly, so they are for low-cardinality
+        columns: more than ``MODE_MAX_DISTINCT`` distinct values raise ValueError.
+        Returns the number of rows written.
+        """
+
+        def open_chunks() -> Iterator[pd.DataFrame]:
+            return pd.read_csv(src, chunksize=chunksize, **read_kwargs)
+
+        resolved = self._resolve_streaming_steps(open_chunks, steps, quantile_error)
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        rows = 0
+        for i, chunk in enumerate(self.scrub_chunks(open_chunks(), resolved, inplace=True)):
+            chunk.to_csv(dest, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            rows += len(chunk)
+        if rows == 0 and not dest.exists():
+            dest.touch()
+        return rows
+
+    def sketch_quartiles(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        columns: StrOrList,
+        error: Optional[float] = 0.01,
+    ) -> Dict[str, Union[QuantileSketch, ExactQuantiles]]:
+        """Summarise columns over chunks for ``remove_outliers_iqr(quartiles=...)``.
+
+        ``error=None`` keeps exact values. The summaries pickle and ``merge``, so
+        shards can be sketched in worker processes and combined afterwards.
+        """
+        cols = _to_list(columns)
+        sketches = {
+            c: ExactQuantiles() if error is None else QuantileSketch(error=error) for c in cols
+        }
+        for chunk in chunks:
+            for c in cols:
+                if pd.api.types.is_numeric_dtype(chunk[c]):
+                    sketches[c].update(chunk[c])
+        return sketches
+
+    def _resolve_streaming_steps(
+        self,
+        open_chunks: Callable[[], Iterator[pd.DataFrame]],
+        steps: List[Step],
+        quantile_error: Optional[float] = 0.01,
+    ) -> List[Step]:
+        """Replace stat-dependent steps with resolved ones, one stats pass per such step."""
+        resolved: List[Step] = []
+        for step in steps:
+            name, kwargs = _split_step(step)
+            if name not in STREAMABLE_STEPS:
+                raise ValueError(f"Step '{name}' cannot run in streaming mode")
+            if not _needs_stats(name, kwargs):
+                resolved.append(step)
+                continue
+            chunks = self.scrub_chunks(open_chunks(), resolved, inplace=True)
+            if name == "fill_missing":
+                kwargs["strategies"] = self._fill_values(
+                    chunks, kwargs["strategies"], quantile_error
+                )
+            else:
+                sketches = self.sketch_quartiles(chunks, kwargs["columns"], quantile_error)
+                kwargs["quartiles"] = {
+                    c: (sk.quantile(0.25), sk.quantile(0.75)) for c, sk in sketches.items() if sk.n
+                }
+            resolved.append({"step": name, **kwargs})
+        return resolved
+
+    def _fill_values(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        strategies: Dict[str, Dict],
+        quantile_error: Optional[float] = 0.01,
+    ) -> Dict[str, Dict]:
+        sums: Dict[str, float] = {}
+        sizes: Dict[str, int] = {}
+        medians: Dict[str, Union[QuantileSketch, ExactQuantiles]] = {}
+        counts: Dict[str, Optional[pd.Series]] = {}
+        for chunk in chunks:
+            for col, spec in strategies.items():
+                method = spec.get("method", "constant").lower()
+                if method == "mean":
+                    sums[col] = sums.get(col, 0.0) + chunk[col].sum()
+                    sizes[col] = sizes.get(col, 0) + int(chunk[col].count())
+                elif method == "median":
+                    if col not in medians:
+                        medians[col] = (
+                            ExactQuantiles()
+                            if quantile_error is None
+                            else QuantileSketch(error=quantile_error)
+                        )
+                    medians[col].update(chunk[col])
+                elif method == "mode":
+                    counts[col] = _add_counts(counts.get(col), chunk[col].value_counts())
+                    if len(counts[col]) > MODE_MAX_DISTINCT:
+                        raise ValueError(
+                            f"Mode fill for column {col} needs exact counts of more than "
+                            f"{MODE_MAX_DISTINCT:,} distinct values in streaming mode; "
+                            "use median, mean or a constant for this column"
+                        )
+
+        constants: Dict[str, Dict] = {}
+        for col, spec in strategies.items():
+            method = spec.get("method", "constant").lower()
+            if method == "constant":
+                constants[col] = spec
+                continue
+            if method == "mean":
+                value = sums[col] / sizes[col] if sizes.get(col) else None
+            elif method == "median":
+                value = medians[col].quantile(0.5) if col in medians and medians[col].n else None
+            elif method == "mode":
+                value = _mode_from_counts(counts[col]) if counts.get(col) is not None else None
             else:
-                tmp[c] = tmp[c].astype(dt)
+                raise ValueError(f"Unsupported fill method: {method} for column {col}")
+            if value is not None:
+                constants[col] = {"method": "constant", "value": value}
+        return constants
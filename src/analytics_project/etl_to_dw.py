@@ -1,7 +1,15 @@
+import argparse
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
 import sqlite3
 from pathlib import Path
 
+from analytics_project import settings
+from analytics_project.prepared_io import prepared_path, read_prepared
+from analytics_project.profiling import file_bytes, profile_step, profiled
+from analytics_project.quality import run_checks
+
 # --- paths ---
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 PREPARED_DIR = PROJECT_ROOT / "data" / "prepared"
@@ -9,13 +17,56 @@ DW_PATH = PROJECT_ROOT / "data" / "dw" / "smart_sales.db"
 DW_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 # --- schema ---
-SCHEMA_SQL = """
+# Full rebuilds run DROP_SQL + CREATE_SQL; incremental loads only CREATE_SQL, which
+# is a no-op once the tables exist. etl_load is never dropped: it is the load log.
+# (A partitioned sale is a view; create_schema drops it and its partitions first.)
+DROP_SQL = """
 DROP VIEW  IF EXISTS v_sales_by_region_and_category;
+DROP TABLE IF EXISTS sales_cube;
 DROP TABLE IF EXISTS sale;
 DROP TABLE IF EXISTS customer;
 DROP TABLE IF EXISTS product;
+DROP TABLE IF EXISTS date_dim;
+"""
 
-CREATE TABLE customer (
+# The fact table, or (partitioned warehouses) one month of it; date_key is YYYYMMDD.
+SALE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    sale_id INTEGER PRIMARY KEY,
+    transaction_id INTEGER,
+    sale_date TEXT,
+    date_key INTEGER,
+    customer_id INTEGER,
+    product_id INTEGER,
+    store_id INTEGER,
+    campaign_id INTEGER,
+    sale_amount REAL,
+    discount_pct REAL,
+    state_code TEXT,
+    FOREIGN KEY (customer_id) REFERENCES customer (customer_id),
+    FOREIGN KEY (product_id)  REFERENCES product (product_id),
+    FOREIGN KEY (date_key)    REFERENCES date_dim (date_key)
+);
+"""
+
+# One row per calendar day; loads add the years their sales fall in (ensure_date_dim).
+# week is the ISO 8601 week number and dow the ISO weekday (1 = Monday).
+DATE_DIM_SQL = """
+CREATE TABLE IF NOT EXISTS date_dim (
+    date_key INTEGER PRIMARY KEY,
+    full_date TEXT,
+    year INTEGER,
+    quarter INTEGER,
+    month INTEGER,
+    week INTEGER,
+    dow INTEGER,
+    is_weekend INTEGER
+);
+"""
+
+CREATE_SQL = (
+    """
+CREATE TABLE IF NOT EXISTS customer (
     customer_id INTEGER PRIMARY KEY,
     name TEXT,
     country TEXT,
@@ -24,7 +75,7 @@ CREATE TABLE customer (
     preferred_contact TEXT
 );
 
-CREATE TABLE product (
+CREATE TABLE IF NOT EXISTS product (
     product_id INTEGER PRIMARY KEY,
     product_name TEXT,
     category TEXT,
@@ -33,26 +84,11 @@ CREATE TABLE product (
     supplier TEXT
 );
 
-CREATE TABLE sale (
-    sale_id INTEGER PRIMARY KEY,
-    transaction_id INTEGER,
-    sale_date TEXT,
-    customer_id INTEGER,
-    product_id INTEGER,
-    store_id INTEGER,
-    campaign_id INTEGER,
-    sale_amount REAL,
-    discount_pct REAL,
-    state_code TEXT,
-    FOREIGN KEY (customer_id) REFERENCES customer (customer_id),
-    FOREIGN KEY (product_id)  REFERENCES product (product_id)
-);
-
-CREATE INDEX IF NOT EXISTS ix_sale_customer_id ON sale(customer_id);
-CREATE INDEX IF NOT EXISTS ix_sale_product_id  ON sale(product_id);
-CREATE INDEX IF NOT EXISTS ix_sale_date        ON sale(sale_date);
-
-CREATE VIEW v_sales_by_region_and_category AS
+"""
+    + DATE_DIM_SQL
+    + SALE_TABLE_SQL.format(table="sale")
+    + """
+CREATE VIEW IF NOT EXISTS v_sales_by_region_and_category AS
 SELECT
     c.country AS region,
     p.category,
@@ -62,8 +98,98 @@ FROM sale s
 JOIN customer c ON c.customer_id = s.customer_id
 JOIN product  p ON p.product_id  = s.product_id
 GROUP BY c.country, p.category;
+
+-- materialized category x state x region x month aggregate, kept by the ETL
+CREATE TABLE IF NOT EXISTS sales_cube (
+    category TEXT,
+    state_code TEXT,
+    region TEXT,
+    year INTEGER,
+    month INTEGER,
+    total_sales REAL,
+    net_sales REAL,
+    sale_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_sales_cube_month ON sales_cube(year, month);
+
+CREATE TABLE IF NOT EXISTS etl_load (
+    load_id INTEGER PRIMARY KEY,
+    loaded_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    mode TEXT,
+    sales_inserted INTEGER,
+    max_transaction_id INTEGER
+);
+"""
+)
+
+SCHEMA_SQL = DROP_SQL + CREATE_SQL
+
+# One sales_cube partition per sale month, keyed YYYYMM.
+_SALE_MONTH_KEY = "s.date_key / 100"
+CUBE_INSERT_SQL = """
+INSERT INTO sales_cube
+    (category, state_code, region, year, month, total_sales, net_sales, sale_count)
+SELECT
+    p.category,
+    s.state_code,
+    c.country,
+    d.year,
+    d.month,
+    SUM(s.sale_amount),
+    SUM(s.sale_amount * (1 - COALESCE(s.discount_pct, 0) / 100.0)),
+    COUNT(*)
+FROM sale s
+JOIN      date_dim d ON d.date_key    = s.date_key
+LEFT JOIN product  p ON p.product_id  = s.product_id
+LEFT JOIN customer c ON c.customer_id = s.customer_id
+WHERE 1 {partitions}
+GROUP BY 1, 2, 3, 4, 5
 """
 
+# Built after a full load (cheaper than maintaining them row by row while loading);
+# incremental loads create them up front if missing. {table} is sale or a partition.
+SALE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_{table}_customer_id ON {table}(customer_id)",
+    "CREATE INDEX IF NOT EXISTS ix_{table}_product_id  ON {table}(product_id)",
+    "CREATE INDEX IF NOT EXISTS ix_{table}_date        ON {table}(sale_date)",
+    "CREATE INDEX IF NOT EXISTS ix_{table}_date_key    ON {table}(date_key)",
+]
+
+# Load-window tuning: ~200 MB page cache, temp b-trees (index builds) in RAM, and
+# one exclusive lock for the whole load instead of per-transaction locking.
+LOAD_PRAGMAS = {"cache_size": -200_000, "temp_store": "MEMORY", "locking_mode": "EXCLUSIVE"}
+BULK_BATCH_ROWS = 100_000
+
+CUSTOMER_COLS = [
+    "customer_id",
+    "name",
+    "country",
+    "signup_date",
+    "loyalty_points",
+    "preferred_contact",
+]
+PRODUCT_COLS = [
+    "product_id",
+    "product_name",
+    "category",
+    "unit_price",
+    "current_discount_pct",
+    "supplier",
+]
+SALE_COLS = [
+    "sale_id",
+    "transaction_id",
+    "sale_date",
+    "date_key",
+    "customer_id",
+    "product_id",
+    "store_id",
+    "campaign_id",
+    "sale_amount",
+    "discount_pct",
+    "state_code",
+]
+
 
 # --- DB helpers ---
 def connect_db():
@@ -74,8 +200,344 @@ def connect_db():
     return conn
 
 
-def create_schema(conn):
-    conn.executescript(SCHEMA_SQL)
+def create_schema(conn, drop=True, partition_by_month=False):
+    """Create the star schema; ``drop`` rebuilds it, optionally with a partitioned sale."""
+    if not drop:
+        conn.executescript(CREATE_SQL)
+        _add_date_key(conn)
+        create_indexes(conn)
+        return
+    drop_sale(conn)
+    conn.executescript(DROP_SQL)
+    if partition_by_month:
+        conn.execute(PARTITION_CATALOG_SQL)
+        _ensure_partition(conn, UNDATED_MONTH)
+        _rebuild_sale_view(conn)
+    conn.executescript(CREATE_SQL)  # CREATE TABLE IF NOT EXISTS sale skips the view
+
+
+@profiled("etl.create_indexes")
+def create_indexes(conn):
+    for table in sale_tables(conn):
+        for stmt in SALE_INDEXES:
+            conn.execute(stmt.format(table=table))
+
+
+def _add_date_key(conn):
+    """Bring a warehouse built before date_dim up to date: fill date_dim for the
+    sales already loaded and add + backfill sale.date_key if it is missing.
+    """
+    bounds = [
+        conn.execute(f"SELECT MIN(sale_date), MAX(sale_date) FROM {table}").fetchone()
+        for table in sale_tables(conn)
+    ]
+    ensure_date_dim(conn, date_keys([d for pair in bounds for d in pair]))
+    if is_partitioned(conn):
+        return
+    if "date_key" not in {r[1] for r in conn.execute("PRAGMA table_info(sale)")}:
+        conn.execute("ALTER TABLE sale ADD COLUMN date_key INTEGER REFERENCES date_dim (date_key)")
+        with conn:
+            conn.execute("UPDATE sale SET date_key = CAST(replace(sale_date, '-', '') AS INTEGER)")
+
+
+def date_keys(dates):
+    """YYYYMMDD integer keys (Int64, <NA> where missing) for YYYY-MM-DD strings."""
+    digits = pd.Series(dates).astype("string").str.replace("-", "", regex=False)
+    return pd.to_numeric(digits, errors="coerce").astype("Int64")
+
+
+def date_dim_rows(first_year, last_year):
+    """date_dim rows for every day of ``first_year``..``last_year``."""
+    days = pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31", freq="D")
+    dow = days.dayofweek + 1
+    return pd.DataFrame(
+        {
+            "date_key": days.year * 10000 + days.month * 100 + days.day,
+            "full_date": days.strftime("%Y-%m-%d"),
+            "year": days.year,
+            "quarter": days.quarter,
+            "month": days.month,
+            "week": days.isocalendar().week.to_numpy(),
+            "dow": dow,
+            "is_weekend": (dow >= 6).astype(int),
+        }
+    )
+
+
+def ensure_date_dim(conn, keys):
+    """Extend date_dim to whole calendar years covering ``keys`` (YYYYMMDD) and the
+    days it already has, so it never has gaps. Returns the rows added.
+    """
+    keys = pd.Series(keys, dtype="Int64").dropna()
+    if keys.empty:
+        return 0
+    lo, hi = int(keys.min()), int(keys.max())
+    low, high = conn.execute("SELECT MIN(date_key), MAX(date_key) FROM date_dim").fetchone()
+    if low is not None:
+        if low <= lo and hi <= high:
+            return 0
+        lo, hi = min(lo, low), max(hi, high)
+    rows = date_dim_rows(lo // 10000, hi // 10000)
+    before = _count_rows(conn, "date_dim")
+    conn.executemany(
+        f"INSERT OR IGNORE INTO date_dim ({', '.join(rows.columns)}) "
+        f"VALUES ({', '.join('?' * len(rows.columns))})",
+        rows.itertuples(index=False, name=None),
+    )
+    return _count_rows(conn, "date_dim") - before
+
+
+@contextmanager
+def load_pragmas(conn):
+    """Apply LOAD_PRAGMAS for the duration of a load, then restore the old values."""
+    saved = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in LOAD_PRAGMAS}
+    for name, value in LOAD_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    try:
+        yield conn
+    finally:
+        for name, value in saved.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1")  # releases the exclusive lock
+
+
+# --- month partitions ---
+# A partitioned warehouse keeps each sale month in its own table (sale_YYYYMM, and
+# sale_000000 for undated rows) and ``sale`` becomes a UNION ALL view over the live
+# ones, so readers don't change. Filters on date_key are pushed into every branch
+# of the view and answered from each partition's date_key index; warehouse.sale_source
+# goes further and only names the partitions a date range touches.
+PARTITION_CATALOG_SQL = """
+CREATE TABLE IF NOT EXISTS sale_partition (
+    month_key INTEGER PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    row_count INTEGER,
+    min_date_key INTEGER,
+    max_date_key INTEGER,
+    fingerprint TEXT,
+    archived_to TEXT,
+    loaded_at TEXT DEFAULT CURRENT_TIMESTAMP
+)
+"""
+UNDATED_MONTH = 0
+# sale_id = month_key * PARTITION_ID_SPAN + row number in the month: unique across
+# partitions, and rewriting one month never renumbers another.
+PARTITION_ID_SPAN = 10**9
+
+
+def partition_table(month_key):
+    return f"sale_{int(month_key):06d}"
+
+
+def is_partitioned(conn):
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sale_partition'"
+        ).fetchone()
+        is not None
+    )
+
+
+def sale_tables(conn):
+    """Tables holding fact rows: sale, or the live (not archived) month partitions."""
+    if not is_partitioned(conn):
+        return ["sale"]
+    return [
+        r[0]
+        for r in conn.execute(
+            "SELECT table_name FROM sale_partition WHERE archived_to IS NULL ORDER BY month_key"
+        )
+    ]
+
+
+def drop_sale(conn):
+    """Drop the fact table, or the sale view with every partition and the catalog."""
+    if is_partitioned(conn):
+        for (table,) in conn.execute("SELECT table_name FROM sale_partition").fetchall():
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute("DROP TABLE sale_partition")
+    kind = conn.execute("SELECT type FROM sqlite_master WHERE name='sale'").fetchone()
+    if kind:
+        conn.execute(f"DROP {kind[0].upper()} sale")
+
+
+def _ensure_partition(conn, month_key):
+    table = partition_table(month_key)
+    conn.execute(SALE_TABLE_SQL.format(table=table))
+    conn.execute(
+        "INSERT OR IGNORE INTO sale_partition (month_key, table_name) VALUES (?, ?)",
+        (int(month_key), table),
+    )
+    return table
+
+
+def _rebuild_sale_view(conn):
+    cols = ", ".join(SALE_COLS)
+    branches = "\nUNION ALL\n".join(f"SELECT {cols} FROM {t}" for t in sale_tables(conn))
+    conn.execute("DROP VIEW IF EXISTS sale")
+    conn.execute(f"CREATE VIEW sale AS\n{branches}")
+
+
+def _fingerprint(part, base=None):
+    """Row count + order-independent hash of a month's rows (sale_id excluded).
+
+    Numeric columns are hashed as float64 so a dtype change elsewhere in the
+    extract (ints becoming floats next to a blank) doesn't look like new data.
+    Counts and hash sums add up, so ``base`` (the fingerprint of rows already in
+    the month) extended by appended rows equals the fingerprint of all of them.
+    """
+    cols = [c for c in SALE_COLS if c != "sale_id" and c in part.columns]
+    frame = part[cols].astype(
+        {c: "float64" for c in cols if pd.api.types.is_numeric_dtype(part[c])}
+    )
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    rows, total = len(part), int(hashes.sum(dtype=np.uint64))
+    if base:
+        base_rows, base_total = base.split(":")
+        rows, total = rows + int(base_rows), (total + int(base_total, 16)) % 2**64
+    return f"{rows}:{total:016x}"
+
+
+def _key_or_none(value):
+    return None if pd.isna(value) else int(value)
+
+
+def _month_keys(sales):
+    return (sales["date_key"] // 100).fillna(UNDATED_MONTH).astype("int64").to_numpy()
+
+
+@profiled("etl.write_partitions", rows_out=lambda result: result[0])
+def write_partitions(conn, sales, changed_only=False):
+    """Write validated sales into their month partitions; return (rows, months) written.
+
+    Every month written is emptied and rewritten whole. With ``changed_only``,
+    months whose fingerprint matches the catalog, and archived months, are skipped.
+    """
+    months = _month_keys(sales)
+    catalog = {
+        m: (fingerprint, archived)
+        for m, fingerprint, archived in conn.execute(
+            "SELECT month_key, fingerprint, archived_to FROM sale_partition"
+        )
+    }
+    rows, written = 0, []
+    for month, part in sales.groupby(months, sort=True):
+        month = int(month)
+        fingerprint = _fingerprint(part)
+        known, archived = catalog.get(month, (None, None))
+        if changed_only and (archived or known == fingerprint):
+            continue
+        table = _ensure_partition(conn, month)
+        conn.execute(f"DELETE FROM {table}")
+        part = part.assign(sale_id=month * PARTITION_ID_SPAN + np.arange(1, len(part) + 1))
+        rows += bulk_insert(conn, table, part, SALE_COLS)
+        conn.execute(
+            "UPDATE sale_partition SET row_count = ?, min_date_key = ?, max_date_key = ?, "
+            "fingerprint = ?, archived_to = NULL, loaded_at = CURRENT_TIMESTAMP "
+            "WHERE month_key = ?",
+            (
+                len(part),
+                _key_or_none(part["date_key"].min()),
+                _key_or_none(part["date_key"].max()),
+                fingerprint,
+                month,
+            ),
+        )
+        written.append(month)
+    if any(m not in catalog for m in written):
+        _rebuild_sale_view(conn)
+    return rows, written
+
+
+@profiled("etl.append_partitions", rows_out=lambda result: result[0])
+def append_partitions(conn, sales):
+    """Append validated sales to their month partitions; return (rows, months) written.
+
+    Rows already in a month are kept: new sale_ids continue after its last one
+    and its catalog row (count, date range, fingerprint) is extended. Sales for
+    archived months are skipped with a warning.
+    """
+    months = _month_keys(sales)
+    catalog = {
+        m: (fingerprint, archived, lo, hi)
+        for m, fingerprint, archived, lo, hi in conn.execute(
+            "SELECT month_key, fingerprint, archived_to, min_date_key, max_date_key "
+            "FROM sale_partition"
+        )
+    }
+    rows, written, skipped = 0, [], 0
+    for month, part in sales.groupby(months, sort=True):
+        month = int(month)
+        fingerprint, archived, lo, hi = catalog.get(month, (None, None, None, None))
+        if archived:
+            skipped += len(part)
+            continue
+        table = _ensure_partition(conn, month)
+        last = conn.execute(f"SELECT MAX(sale_id) FROM {table}").fetchone()[0]
+        first = (last or month * PARTITION_ID_SPAN) + 1
+        part = part.assign(sale_id=first + np.arange(len(part)))
+        rows += bulk_insert(conn, table, part, SALE_COLS)
+        dated = part["date_key"].dropna()
+        keys = [k for k in (lo, hi) if k is not None]
+        keys += [int(dated.min()), int(dated.max())] if len(dated) else []
+        conn.execute(
+            "UPDATE sale_partition SET row_count = COALESCE(row_count, 0) + ?, "
+            "min_date_key = ?, max_date_key = ?, fingerprint = ?, "
+            "loaded_at = CURRENT_TIMESTAMP WHERE month_key = ?",
+            (
+                len(part),
+                min(keys, default=None),
+                max(keys, default=None),
+                _fingerprint(part, base=fingerprint),
+                month,
+            ),
+        )
+        written.append(month)
+    if skipped:
+        print(f"[WARN] Skipped {skipped} new sales in archived month partitions.")
+    if any(m not in catalog for m in written):
+        _rebuild_sale_view(conn)
+    return rows, written
+
+
+def archive_partitions(conn, before_month, archive_dir=None):
+    """Move month partitions older than ``before_month`` (YYYYMM) into their own files.
+
+    Each goes to ``archive_dir/sale_YYYYMM.db`` as table ``sale`` and leaves the
+    sale view and sales_cube; its catalog row stays, with ``archived_to`` set, and
+    incremental loads skip it. A full rebuild loads every month again. Commits any
+    open transaction first; returns the archive files written.
+    """
+    archive_dir = Path(archive_dir or DW_PATH.parent / "archive")
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    months = conn.execute(
+        "SELECT month_key, table_name FROM sale_partition "
+        "WHERE archived_to IS NULL AND month_key > ? AND month_key < ? ORDER BY month_key",
+        (UNDATED_MONTH, before_month),
+    ).fetchall()
+    conn.commit()  # ATTACH / DETACH can't run inside a transaction
+    paths = []
+    for _, table in months:
+        path = archive_dir / f"{table}.db"
+        path.unlink(missing_ok=True)
+        conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+        try:
+            conn.execute(f"CREATE TABLE archive.sale AS SELECT * FROM main.{table}")
+        finally:
+            conn.execute("DETACH DATABASE archive")
+        paths.append(path)
+    if months:
+        with conn:
+            for (month, table), path in zip(months, paths, strict=True):
+                conn.execute(f"DROP TABLE {table}")
+                conn.execute(
+                    "UPDATE sale_partition SET archived_to = ? WHERE month_key = ?",
+                    (str(path), month),
+                )
+            _rebuild_sale_view(conn)
+            refresh_sales_cube(conn, months=[m for m, _ in months])
+            record_load(conn, "archive", 0)
+    return paths
 
 
 # --- CSV loader ---
@@ -85,36 +547,41 @@ def _normalize_cols(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+# prepared-file column -> warehouse column
+PRODUCT_RENAMES = {
+    "productid": "product_id",
+    "productname": "product_name",
+    "currentdiscountpct": "current_discount_pct",
+}
+SALE_RENAMES = {
+    "transactionid": "transaction_id",
+    "saledate": "sale_date",
+    "customerid": "customer_id",
+    "productid": "product_id",
+    "storeid": "store_id",
+    "campaignid": "campaign_id",
+    "saleamount": "sale_amount",
+    "discountpct": "discount_pct",
+    "statecode": "state_code",
+}
+
+
 def load_csvs():
-    customers = pd.read_csv(PREPARED_DIR / "customers_data_prepared.csv")
-    products = pd.read_csv(PREPARED_DIR / "products_data_prepared.csv")
-    sales = pd.read_csv(PREPARED_DIR / "sales_data_prepared.csv")
+    # Parquet/Feather when settings.PREPARED_FORMAT says so, else CSV; either way
+    # only the columns the warehouse stores are read.
+    customers = read_prepared(PREPARED_DIR / "customers_data_prepared.csv", CUSTOMER_COLS)
+    products = read_prepared(
+        PREPARED_DIR / "products_data_prepared.csv", [*PRODUCT_COLS, *PRODUCT_RENAMES]
+    )
+    sales = read_prepared(PREPARED_DIR / "sales_data_prepared.csv", [*SALE_COLS, *SALE_RENAMES])
 
     customers = _normalize_cols(customers)
     products = _normalize_cols(products)
     sales = _normalize_cols(sales)
 
     # Rename to match schema
-    products = products.rename(
-        columns={
-            "productid": "product_id",
-            "productname": "product_name",
-            "currentdiscountpct": "current_discount_pct",
-        }
-    )
-    sales = sales.rename(
-        columns={
-            "transactionid": "transaction_id",
-            "saledate": "sale_date",
-            "customerid": "customer_id",
-            "productid": "product_id",
-            "storeid": "store_id",
-            "campaignid": "campaign_id",
-            "saleamount": "sale_amount",
-            "discountpct": "discount_pct",
-            "statecode": "state_code",
-        }
-    )
+    products = products.rename(columns=PRODUCT_RENAMES)
+    sales = sales.rename(columns=SALE_RENAMES)
 
     # Normalize data
     if "signup_date" in customers:
@@ -137,22 +604,95 @@ def load_csvs():
 
 
 # --- validation helpers ---
-def filter_sales_with_valid_fks(sales, customers, products):
-    """Keep only sales with customer_id and product_id existing in dim tables."""
-    cust_ids = set(customers["customer_id"].dropna().astype(int))
-    prod_ids = set(products["product_id"].dropna().astype(int))
-    s = sales.copy()
-    for col in ("customer_id", "product_id"):
-        if col in s.columns:
-            s[col] = pd.to_numeric(s[col], errors="coerce")
-    valid_mask = s["customer_id"].isin(cust_ids) & s["product_id"].isin(prod_ids)
-    kept = s.loc[valid_mask].copy()
-    rejects = s.loc[~valid_mask].copy()
-    dropped = len(s) - len(kept)
-    if dropped > 0:
+# sale FK column -> (dimension table, key column). Dimensions whose table doesn't
+# exist yet (store, campaign) are skipped until the schema grows them.
+SALE_FKS = {
+    "customer_id": ("customer", "customer_id"),
+    "product_id": ("product", "product_id"),
+    "store_id": ("store", "store_id"),
+    "campaign_id": ("campaign", "campaign_id"),
+}
+
+# Use a dense bitmap when the key range is at most this many times the key count.
+BITMAP_MAX_SPREAD = 8
+
+
+class KeyIndex:
+    """Membership test over one dimension's integer keys, built once per load.
+
+    Compact key ranges (the usual 1000..1199 style ids) become a boolean bitmap
+    indexed by ``key - min``; sparse ones fall back to a sorted array and
+    ``searchsorted``. Either way ``contains`` is a single vectorized pass.
+    """
+
+    def __init__(self, keys):
+        arr = pd.to_numeric(pd.Series(keys), errors="coerce").dropna().to_numpy()
+        self.keys = np.unique(arr.astype(np.int64))
+        self.bitmap = None
+        if len(self.keys):
+            self.lo = int(self.keys[0])
+            span = int(self.keys[-1]) - self.lo + 1
+            if span <= BITMAP_MAX_SPREAD * len(self.keys):
+                self.bitmap = np.zeros(span, dtype=bool)
+                self.bitmap[self.keys - self.lo] = True
+
+    def contains(self, values):
+        """Boolean mask: value is a whole number present in the index (NaN -> False)."""
+        vals = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64")
+        mask = np.isfinite(vals)
+        mask[mask] = vals[mask] == np.floor(vals[mask])
+        if not len(self.keys):
+            return np.zeros(len(vals), dtype=bool)
+        ints = vals[mask].astype(np.int64)
+        if self.bitmap is not None:
+            pos = ints - self.lo
+            inside = (pos >= 0) & (pos < len(self.bitmap))
+            found = np.zeros(len(ints), dtype=bool)
+            found[inside] = self.bitmap[pos[inside]]
+        else:
+            pos = np.searchsorted(self.keys, ints).clip(max=len(self.keys) - 1)
+            found = self.keys[pos] == ints
+        mask[mask] = found
+        return mask
+
+
+def load_key_indexes(conn, fks=SALE_FKS):
+    """Build a KeyIndex per FK column from the dimension tables that exist."""
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    return {
+        col: KeyIndex([r[0] for r in conn.execute(f"SELECT {key} FROM {table}")])
+        for col, (table, key) in fks.items()
+        if table in tables
+    }
+
+
+def fk_valid_mask(sales, indexes):
+    """One vectorized pass over every FK column; True where all keys resolve."""
+    valid = np.ones(len(sales), dtype=bool)
+    for col, index in indexes.items():
+        if col in sales.columns:
+            valid &= index.contains(sales[col])
+    return valid
+
+
+def _warn_dropped(kept, total):
+    if kept < total:
         print(
-            f"[WARN] Dropped {dropped} sale rows with missing customer/product keys (kept {len(kept)} / {len(s)})."
+            f"[WARN] Dropped {total - kept} sale rows with missing customer/product keys "
+            f"(kept {kept} / {total})."
         )
+
+
+def filter_sales_with_valid_fks(sales, customers, products):
+    """Keep only sales with customer_id and product_id existing in dim tables."""
+    indexes = {
+        "customer_id": KeyIndex(customers["customer_id"]),
+        "product_id": KeyIndex(products["product_id"]),
+    }
+    valid_mask = fk_valid_mask(sales, indexes)
+    kept = sales.loc[valid_mask]
+    rejects = sales.loc[~valid_mask]
+    _warn_dropped(len(kept), len(sales))
     return kept, rejects
 
 
@@ -165,98 +705,265 @@ def safe_insert(conn, table, df, cols):
     df.loc[:, use].to_sql(table, conn, if_exists="append", index=False)
 
 
-def insert_all(conn, customers, products, sales):
-    # dims
-    safe_insert(
-        conn,
-        "customer",
-        customers,
-        ["customer_id", "name", "country", "signup_date", "loyalty_points", "preferred_contact"],
-    )
-    safe_insert(
-        conn,
-        "product",
-        products,
-        [
-            "product_id",
-            "product_name",
-            "category",
-            "unit_price",
-            "current_discount_pct",
-            "supplier",
-        ],
-    )
+def _db_rows(df, cols, batch_rows=BULK_BATCH_ROWS):
+    """Yield plain-Python row tuples (NaN -> None) for sqlite3 executemany.
 
-    # facts
-    sales_clean, rejects_fk = filter_sales_with_valid_fks(sales, customers, products)
-    amt_bad_mask = (sales_clean["sale_amount"].isna()) | (sales_clean["sale_amount"] < 0)
-    rejects_amt = sales_clean.loc[amt_bad_mask].copy()
-    sales_final = sales_clean.loc[~amt_bad_mask].copy()
+    Rows are converted a batch at a time so the object copy stays small.
+    """
+    for start in range(0, len(df), batch_rows):
+        part = df.iloc[start : start + batch_rows]
+        columns = []
+        for c in cols:
+            ser = part[c]
+            if ser.hasnans:
+                ser = ser.astype(object).where(ser.notna(), None)
+            columns.append(ser.tolist())
+        yield from zip(*columns, strict=True)
+
+
+def bulk_insert(conn, table, df, cols):
+    """Stream rows into ``table`` with one prepared INSERT via executemany.
+
+    Runs in the caller's transaction; returns the number of rows inserted.
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError(f"{table}: expected a pandas.DataFrame, got {type(df).__name__}")
+    use = [c for c in cols if c in df.columns]
+    if not use:
+        raise ValueError(f"{table}: no matching columns found. CSV columns: {df.columns.tolist()}")
+    sql = f"INSERT INTO {table} ({', '.join(use)}) VALUES ({', '.join('?' * len(use))})"
+    with profile_step(f"etl.bulk_insert:{table}", df) as rec:
+        rec["rows_out"] = conn.executemany(sql, _db_rows(df, use)).rowcount
+    return rec["rows_out"]
+
+
+@profiled("etl.upsert_dim", rows_out=lambda written: written)
+def upsert_dim(conn, table, df, cols, key):
+    """Insert new dimension rows and update changed ones; return rows written."""
+    use = [c for c in cols if c in df.columns]
+    if key not in use:
+        raise ValueError(f"{table}: key column '{key}' not found. Columns: {df.columns.tolist()}")
+    rest = [c for c in use if c != key]
+    sql = f"INSERT INTO {table} ({', '.join(use)}) VALUES ({', '.join('?' * len(use))})"
+    if rest:
+        sql += (
+            f" ON CONFLICT({key}) DO UPDATE SET "
+            + ", ".join(f"{c} = excluded.{c}" for c in rest)
+            + " WHERE "
+            + " OR ".join(f"{table}.{c} IS NOT excluded.{c}" for c in rest)
+        )
+    else:
+        sql += f" ON CONFLICT({key}) DO NOTHING"
+    return conn.executemany(sql, _db_rows(df.dropna(subset=[key]), use)).rowcount
+
+
+@profiled("etl.validate_facts")
+def validate_facts(conn, sales, customers, products):
+    """Drop sales with unknown keys or bad amounts, saving both reject sets.
+
+    FKs are checked against the dimension tables already loaded in ``conn``
+    (``customers``/``products`` are used only when those tables are missing),
+    and each output frame is materialized once from boolean masks. Kept sales
+    get their date_key, and date_dim is extended to cover them.
+    """
+    indexes = load_key_indexes(conn)
+    for col, dim, key in (
+        ("customer_id", customers, "customer_id"),
+        ("product_id", products, "product_id"),
+    ):
+        indexes.setdefault(col, KeyIndex(dim[key]))
+    fk_ok = fk_valid_mask(sales, indexes)
+    amount = pd.to_numeric(sales["sale_amount"], errors="coerce").to_numpy(dtype="float64")
+    amt_bad = np.isnan(amount) | (amount < 0)
+    _warn_dropped(int(fk_ok.sum()), len(sales))
+
+    rejects_fk = sales.loc[~fk_ok]
+    rejects_amt = sales.loc[fk_ok & amt_bad]
+    sales_final = sales.loc[fk_ok & ~amt_bad]
+    text_keys = [
+        col
+        for col in indexes
+        if col in sales_final.columns and not pd.api.types.is_numeric_dtype(sales_final[col])
+    ]
+    if text_keys:  # assign, not setitem: sales_final is a slice of the caller's frame
+        sales_final = sales_final.assign(
+            **{col: pd.to_numeric(sales_final[col], errors="coerce") for col in text_keys}
+        )
+    if "sale_date" in sales_final.columns:
+        sales_final = sales_final.assign(date_key=date_keys(sales_final["sale_date"]))
+        ensure_date_dim(conn, sales_final["date_key"])
 
     # save rejects
     if not rejects_fk.empty:
         rejects_fk.to_sql("rejects_sale_fk", conn, if_exists="replace", index=False)
     if not rejects_amt.empty:
         rejects_amt.to_sql("rejects_sale_amount", conn, if_exists="replace", index=False)
+    return sales_final
+
+
+def insert_all(conn, customers, products, sales):
+    # dims
+    bulk_insert(conn, "customer", customers, CUSTOMER_COLS)
+    bulk_insert(conn, "product", products, PRODUCT_COLS)
+
+    # facts, then indexes once the data is in
+    sales_final = validate_facts(conn, sales, customers, products)
+    if is_partitioned(conn):
+        inserted, _ = write_partitions(conn, sales_final)
+    else:
+        inserted = bulk_insert(conn, "sale", sales_final, SALE_COLS)
+    create_indexes(conn)
+    refresh_sales_cube(conn)
+    return inserted
+
+
+def sale_high_water_mark(conn):
+    """Largest transaction_id already in the fact table (None when it is empty)."""
+    return conn.execute("SELECT MAX(transaction_id) FROM sale").fetchone()[0]
+
+
+def insert_incremental(conn, customers, products, sales, snapshot=False):
+    """Upsert dimensions and append only sales past the high-water mark.
+
+    On a partitioned warehouse the new sales are appended to their months. With
+    ``snapshot`` the sales are taken to be the whole fact instead: the months
+    whose rows differ from the last load (by fingerprint) are rewritten from
+    them, and the rows written are returned. Dimension rows missing from the
+    CSVs are kept, not deleted; run a full rebuild to drop them.
+    """
+    dims_changed = False
+    for table, df, cols, key in (
+        ("customer", customers, CUSTOMER_COLS, "customer_id"),
+        ("product", products, PRODUCT_COLS, "product_id"),
+    ):
+        before = _count_rows(conn, table)
+        written = upsert_dim(conn, table, df, cols, key)
+        # rows written beyond the ones added were updates to existing keys
+        dims_changed |= written > _count_rows(conn, table) - before
+
+    partitioned = is_partitioned(conn)
+    if partitioned and snapshot:
+        return _rewrite_changed_months(conn, customers, products, sales, dims_changed)
+
+    hwm = sale_high_water_mark(conn)
+    if hwm is not None:
+        sales = sales.loc[pd.to_numeric(sales["transaction_id"], errors="coerce") > hwm]
+    inserted = 0
+    if sales.empty:
+        print(f"[INFO] No new sales past transaction_id {hwm}.")
+    elif partitioned:
+        sales_final = validate_facts(conn, sales, customers, products)
+        inserted, _ = append_partitions(conn, sales_final)
+        create_indexes(conn)  # for months that got their first partition
+    else:
+        sales_final = validate_facts(conn, sales, customers, products)
+        inserted = bulk_insert(conn, "sale", sales_final, SALE_COLS)
+
+    # changed categories/countries can move old sales between cube cells, and a
+    # warehouse built before sales_cube existed has an empty one to backfill
+    if dims_changed or (hwm is not None and not _count_rows(conn, "sales_cube")):
+        refresh_sales_cube(conn)
+    elif inserted:
+        refresh_sales_cube(conn, since_transaction_id=hwm)
+    return inserted
 
-    # insert fact
-    safe_insert(
-        conn,
-        "sale",
-        sales_final,
-        [
-            "sale_id",
-            "transaction_id",
-            "sale_date",
-            "customer_id",
-            "product_id",
-            "store_id",
-            "campaign_id",
-            "sale_amount",
-            "discount_pct",
-            "state_code",
-        ],
+
+def _rewrite_changed_months(conn, customers, products, sales, dims_changed):
+    """Snapshot load of a partitioned warehouse: rewrite only months that changed."""
+    sales_final = validate_facts(conn, sales, customers, products)
+    inserted, months = write_partitions(conn, sales_final, changed_only=True)
+    if not months:
+        print("[INFO] No sale partitions changed.")
+    create_indexes(conn)
+    if dims_changed or not _count_rows(conn, "sales_cube"):
+        refresh_sales_cube(conn)
+    elif months:
+        refresh_sales_cube(conn, months=months)
+    return inserted
+
+
+def _count_rows(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@profiled("etl.refresh_sales_cube")
+def refresh_sales_cube(conn, since_transaction_id=None, months=None):
+    """Rebuild sales_cube, or only some months (YYYYMM): the given ones or those
+    touched by sales past a transaction_id.
+
+    Touched months are deleted and re-aggregated from ``sale``, so a partial
+    refresh gives the same cells as a full one.
+    """
+    if since_transaction_id is None and months is None:
+        conn.execute("DELETE FROM sales_cube")
+        conn.execute(CUBE_INSERT_SQL.format(partitions=""))
+        return
+    if months is None:
+        months = [
+            r[0]
+            for r in conn.execute(
+                f"SELECT DISTINCT {_SALE_MONTH_KEY} FROM sale s "
+                "WHERE s.transaction_id > ? AND s.sale_date IS NOT NULL",
+                (since_transaction_id,),
+            )
+        ]
+    months = [m for m in months if m != UNDATED_MONTH]
+    if not months:
+        return
+    marks = ", ".join("?" * len(months))
+    conn.execute(f"DELETE FROM sales_cube WHERE year * 100 + month IN ({marks})", months)
+    partitions, params = f"AND {_SALE_MONTH_KEY} IN ({marks})", list(months)
+    if is_partitioned(conn):
+        # a date_key range lets each partition outside it answer from its index
+        partitions += " AND s.date_key BETWEEN ? AND ?"
+        params += [min(months) * 100, max(months) * 100 + 99]
+    conn.execute(CUBE_INSERT_SQL.format(partitions=partitions), params)
+
+
+def record_load(conn, mode, sales_inserted):
+    conn.execute(
+        "INSERT INTO etl_load (mode, sales_inserted, max_transaction_id) VALUES (?, ?, ?)",
+        (mode, sales_inserted, sale_high_water_mark(conn)),
     )
 
 
+@profiled("etl.quality_checks")
 def quality_checks(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM customer")
-    customers_cnt = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM product")
-    products_cnt = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM sale")
-    sales_cnt = cur.fetchone()[0]
-    cur.execute(
-        """SELECT COUNT(*) FROM sale s LEFT JOIN customer c ON c.customer_id=s.customer_id WHERE c.customer_id IS NULL"""
-    )
-    orphan_customers = cur.fetchone()[0]
-    cur.execute(
-        """SELECT COUNT(*) FROM sale s LEFT JOIN product p ON p.product_id=s.product_id WHERE p.product_id IS NULL"""
-    )
-    orphan_products = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM sale WHERE sale_amount IS NULL OR sale_amount < 0")
-    bad_amounts = cur.fetchone()[0]
-    return {
-        "customers": customers_cnt,
-        "products": products_cnt,
-        "sales": sales_cnt,
-        "orphan_customers": orphan_customers,
-        "orphan_products": orphan_products,
-        "bad_amounts": bad_amounts,
-    }
+    """Row counts, FK orphans and bad amounts; one scan of sale (see quality.py)."""
+    return run_checks(conn).results
 
 
 # --- main ---
-def main():
+def main(incremental=False, partition_by_month=None, snapshot=False):
+    """Load the prepared CSVs; full loads partition sale by month when asked to
+    (default: settings.SALE_PARTITIONING == "month"). Incremental loads keep the
+    warehouse's existing layout; ``snapshot`` marks the sales CSV as the whole
+    fact, so a partitioned warehouse rewrites the months that changed.
+    """
+    mode = "incremental" if incremental else "full"
+    if partition_by_month is None:
+        partition_by_month = settings.SALE_PARTITIONING == "month"
     conn = connect_db()
     try:
-        with conn:
-            create_schema(conn)
-            customers, products, sales = load_csvs()
-            insert_all(conn, customers, products, sales)
+        with profile_step(f"etl.load:{mode}") as load_rec, load_pragmas(conn), conn:
+            create_schema(conn, drop=not incremental, partition_by_month=partition_by_month)
+            with profile_step("etl.load_csvs") as rec:
+                customers, products, sales = load_csvs()
+                rec["rows_out"] = len(customers) + len(products) + len(sales)
+                rec["bytes_read"] = file_bytes(
+                    *(
+                        prepared_path(PREPARED_DIR / f"{name}_data_prepared.csv")
+                        for name in ("customers", "products", "sales")
+                    )
+                )
+            if incremental:
+                inserted = insert_incremental(conn, customers, products, sales, snapshot)
+            else:
+                inserted = insert_all(conn, customers, products, sales)
+            record_load(conn, mode, inserted)
+            load_rec["rows_out"] = inserted
         checks = quality_checks(conn)
-        print("=== DATA WAREHOUSE LOAD COMPLETE ===")
+        print(f"=== DATA WAREHOUSE LOAD COMPLETE ({mode}: {inserted} sales inserted) ===")
         for k, v in checks.items():
             print(f"{k}: {v}")
         conn.execute("ANALYZE;")
@@ -264,5 +971,55 @@ def main():
         conn.close()
 
 
+def archive_main(before_month, archive_dir=None):
+    """Archive partitions older than ``before_month``, then VACUUM to give the space back."""
+    conn = connect_db()
+    try:
+        if not is_partitioned(conn):
+            raise SystemExit(
+                f"{DW_PATH} is not partitioned; run a full load with --partition-by-month."
+            )
+        paths = archive_partitions(conn, before_month, archive_dir)
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    print(f"=== ARCHIVED {len(paths)} PARTITION(S) BEFORE {before_month} ===")
+    for path in paths:
+        print(path)
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Load prepared CSVs into smart_sales.db.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="upsert dimensions and append only new sales instead of rebuilding",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="with --incremental: the sales CSV holds every sale; a partitioned "
+        "warehouse rewrites the months whose rows changed instead of appending",
+    )
+    parser.add_argument(
+        "--partition-by-month",
+        action="store_true",
+        default=None,
+        help="full load: one sale table per month behind a sale view (SALE_PARTITIONING=month)",
+    )
+    parser.add_argument(
+        "--archive-before",
+        type=int,
+        metavar="YYYYMM",
+        help="instead of loading, move older month partitions to their own files",
+    )
+    parser.add_argument("--archive-dir", type=Path, default=None, help="default data/dw/archive")
+    args = parser.parse_args()
+    if args.archive_before:
+        archive_main(args.archive_before, args.archive_dir)
+    else:
+        main(
+            incremental=args.incremental,
+            partition_by_month=args.partition_by_month,
+            snapshot=args.snapshot,
+        )
@@ -0,0 +1,469 @@
+"""
+index_advisor.py
+----------------
+Propose (and optionally create) composite covering indexes for a workload of
+OLAP queries against the warehouse, and report before/after timings.
+
+The workload is a SQL file of named statements (see olap/workload.sql):
+
+    -- name: revenue_by_region_and_category
+    SELECT * FROM v_sales_by_region_and_category;
+
+For every query the advisor reads ``EXPLAIN QUERY PLAN``. A step that reads
+a large table through a plain index (a rowid lookup per row) or a full scan
+becomes a candidate index on that table:
+
+1. equality columns: the ones the planner already searches on (``(product_id=?)``)
+   and the ones the query compares with a constant,
+2. one range column, searched on or compared the same way,
+3. the table's GROUP BY columns, when there is no range column,
+4. every other column the query reads from the table, so the index covers it.
+
+When the planner walks a whole index in order (to avoid sorting for a GROUP BY
+or ORDER BY), that index's columns lead instead and the rest are added to cover.
+
+Candidates that an existing index (or a longer candidate) already starts with
+are dropped. All of them are then built inside one transaction and the
+workload is timed again. An index is judged on every query whose new plan
+uses it: it is dropped unless one of them got at least ``min_gain`` faster,
+none got more than ``min_gain`` slower and together they got faster. The
+workload is timed again without the dropped ones (plans change with them)
+until nothing more is dropped; if the whole workload is not faster by then,
+nothing is kept. The transaction is rolled back unless ``apply`` is set, so
+the default run leaves the warehouse as it was.
+
+On a month-partitioned warehouse an index on ``sale`` is built on every
+partition. A full ETL rebuild drops sale and its indexes, so rerun with
+``--apply`` after one.
+
+Run from the project root:
+    python -m analytics_project.index_advisor            # propose, time, roll back
+    python -m analytics_project.index_advisor --apply    # keep the indexes that help
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import settings
+from .etl_to_dw import sale_tables
+
+# tables smaller than this are left alone: scanning them is already cheap
+MIN_ROWS = 10_000
+# a covering index wider than this is not proposed (only its search columns)
+MAX_COLUMNS = 6
+# page cache while timing (KiB, an upper bound). Pages dirtied by building the
+# candidates stay pinned until the transaction ends; with the default 2 MB cache
+# they push table pages out and every query looks slower with the indexes.
+TIMING_CACHE_KIB = 1 << 20
+
+_IDENT = r"[A-Za-z_][A-Za-z0-9_]*"
+_NAME_LINE = re.compile(r"^\s*--\s*name:\s*(\S+)\s*$")
+_SOURCE = re.compile(rf"\b(?:FROM|JOIN)\s+({_IDENT})(?:\s+(?:AS\s+)?({_IDENT}))?", re.IGNORECASE)
+_STEP = re.compile(rf"^(SCAN|SEARCH) ({_IDENT})\b(.*)$")
+_CONSTRAINT = re.compile(rf"({_IDENT})\s*(=|>|<|>=|<=)\s*\?")
+_GROUP_BY = re.compile(
+    r"\bGROUP\s+BY\b(.*?)(?:\bHAVING\b|\bORDER\b|\bLIMIT\b|\bUNION\b|;|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_LITERAL = r"(?:'[^']*'|-?\d[\d.]*|\?|:\w+)"
+_KEYWORDS = {
+    "on", "where", "join", "left", "right", "inner", "outer", "cross", "natural", "group",
+    "order", "limit", "using", "union", "having", "window", "as",
+}  # fmt: skip
+
+
+@dataclass(frozen=True)
+class Query:
+    name: str
+    sql: str
+
+
+@dataclass(frozen=True)
+class IndexProposal:
+    """A composite index on ``table`` (``sale`` means every partition when partitioned)."""
+
+    table: str
+    columns: Tuple[str, ...]
+
+    def name(self, table: Optional[str] = None) -> str:
+        return f"ix_{table or self.table}_cov_" + "_".join(self.columns)
+
+    def sql(self, table: Optional[str] = None) -> str:
+        table = table or self.table
+        return (
+            f"CREATE INDEX IF NOT EXISTS {self.name(table)} ON {table}({', '.join(self.columns)})"
+        )
+
+
+@dataclass
+class QueryTiming:
+    name: str
+    before_seconds: float
+    after_seconds: float
+    before_plan: List[str]
+    after_plan: List[str]
+    indexes: List[str] = field(default_factory=list)  # proposals the new plan uses
+
+    @property
+    def gain(self) -> float:
+        """Fraction of the query's time saved (negative when it got slower)."""
+        if not self.before_seconds:
+            return 0.0
+        return 1 - self.after_seconds / self.before_seconds
+
+
+@dataclass
+class AdvisorReport:
+    proposals: List[IndexProposal] = field(default_factory=list)
+    kept: List[IndexProposal] = field(default_factory=list)
+    queries: List[QueryTiming] = field(default_factory=list)
+    applied: bool = False
+
+
+def read_workload(path: Path) -> List[Query]:
+    """Statements of a workload file, named by a preceding ``-- name:`` line (or q1, q2...)."""
+    queries: List[Query] = []
+    name, lines = None, []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        match = _NAME_LINE.match(line)
+        if match:
+            name = match.group(1)
+            continue
+        if line.strip().startswith("--"):
+            continue
+        lines.append(line)
+        if line.rstrip().endswith(";"):
+            sql = "\n".join(lines).strip().rstrip(";").strip()
+            if sql:
+                queries.append(Query(name or f"q{len(queries) + 1}", sql))
+            name, lines = None, []
+    sql = "\n".join(lines).strip()
+    if sql:
+        queries.append(Query(name or f"q{len(queries) + 1}", sql))
+    return queries
+
+
+def query_plan(conn: sqlite3.Connection, sql: str) -> List[str]:
+    # sqlite3 caches statements by their text, and a cached EXPLAIN keeps the plan
+    # it was prepared with; the schema version in the text re-plans after DDL
+    version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    return [row[-1] for row in conn.execute(f"/* schema {version} */ EXPLAIN QUERY PLAN {sql}")]
+
+
+def _physical(conn: sqlite3.Connection, table: str) -> List[str]:
+    return sale_tables(conn) if table == "sale" else [table]
+
+
+def _expand_views(conn: sqlite3.Connection, sql: str) -> str:
+    """``sql`` followed by the bodies of the views it reads (except sale itself)."""
+    views = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'view'"))
+    seen, text, pending = set(), sql, [sql]
+    while pending:
+        for source, _ in _SOURCE.findall(pending.pop()):
+            if source in views and source != "sale" and source not in seen:
+                seen.add(source)
+                body = re.split(r"\bAS\b", views[source], maxsplit=1, flags=re.IGNORECASE)[1]
+                text += "\n" + body
+                pending.append(body)
+    return text
+
+
+def _sources(conn: sqlite3.Connection, text: str) -> Dict[str, str]:
+    """Plan name (alias, table or partition) -> logical table for every table ``text`` reads."""
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    names: Dict[str, str] = {}
+    for source, alias in _SOURCE.findall(text):
+        if source in tables or source == "sale":
+            names[source] = source
+            if alias and alias.lower() not in _KEYWORDS:
+                names[alias] = source
+    if "sale" in names:
+        names.update(dict.fromkeys(sale_tables(conn), "sale"))
+    return names
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> Tuple[List[str], Optional[str]]:
+    """Columns of ``table`` and its INTEGER PRIMARY KEY (the rowid every index carries)."""
+    info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    rowid = next((r[1] for r in info if r[5] == 1 and r[2].upper() == "INTEGER"), None)
+    if rowid is None and table == "sale":
+        rowid = "sale_id"  # the partitioned sale view reports no primary key
+    return [r[1] for r in info], rowid
+
+
+def _references(text: str, names: Sequence[str], columns: Sequence[str], others: set) -> List[str]:
+    """Columns of one table that ``text`` mentions, in order of first mention.
+
+    ``names`` are the table's aliases; an unqualified column counts unless another
+    table in the query has a column of that name.
+    """
+    text = re.sub(r"'[^']*'", "''", text)
+    qualified = "|".join(re.escape(n) for n in names)
+    found: List[Tuple[int, str]] = []
+    for col in columns:
+        hits = [m.start() for m in re.finditer(rf"\b(?:{qualified})\.{col}\b", text)]
+        if col not in others:
+            hits += [m.start() for m in re.finditer(rf"(?<![.\w]){col}\b", text)]
+        if hits:
+            found.append((min(hits), col))
+    return [col for _, col in sorted(found)]
+
+
+def _filters(text: str, refs: Sequence[str], names: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """(equality, range) columns among ``refs`` compared with a constant in ``text``."""
+    prefix = rf"(?:(?:{'|'.join(re.escape(n) for n in names)})\.)?"
+    equal, ranges = [], []
+    for col in refs:
+        ref = rf"(?<![\w]){prefix}{col}\b"
+        if re.search(rf"{ref}\s*(?:=|==)\s*{_LITERAL}|{ref}\s+IN\s*\(", text, re.IGNORECASE):
+            equal.append(col)
+        elif re.search(
+            rf"{ref}\s*(?:<|>|<=|>=)\s*{_LITERAL}|{ref}\s+BETWEEN\b", text, re.IGNORECASE
+        ):
+            ranges.append(col)
+    return equal, ranges
+
+
+def _candidate(
+    conn: sqlite3.Connection, query: Query, step: str, names: Dict[str, str]
+) -> Optional[IndexProposal]:
+    match = _STEP.match(step)
+    if not match or "COVERING INDEX" in step or "PRIMARY KEY" in step:
+        return None
+    kind, plan_name, detail = match.groups()
+    table = names.get(plan_name)
+    if table is None:
+        return None
+    text = _expand_views(conn, query.sql)
+    columns, rowid = _columns(conn, table)
+    others = set()
+    for other in set(names.values()) - {table}:
+        others.update(_columns(conn, other)[0])
+    aliases = [n for n, t in names.items() if t == table]
+    refs = [c for c in _references(text, aliases, columns, others) if c != rowid]
+    direct = {n for source, alias in _SOURCE.findall(query.sql) for n in (source, alias)}
+    if re.search(r"SELECT\s+\*", query.sql, re.IGNORECASE) and direct & set(aliases):
+        refs = [c for c in columns if c != rowid]  # SELECT * reads every column
+
+    searched = _CONSTRAINT.findall(detail) if kind == "SEARCH" else []
+    equal, ranges = _filters(text, refs, aliases)
+    equal = [c for c, op in searched if op == "="] + equal
+    ranges = [c for c, op in searched if op != "="] + ranges
+    leading = equal + ranges[:1]
+    walked = re.search(rf"^ USING INDEX ({_IDENT})", detail) if kind == "SCAN" else None
+    if walked:  # an ordered scan (for GROUP BY / ORDER BY): keep its order, add coverage
+        leading = [r[2] for r in conn.execute(f"PRAGMA index_info({walked.group(1)})")]
+    order = list(leading)
+    if not ranges and not walked:
+        group = _GROUP_BY.search(text)
+        if group:
+            order += _references(group.group(1), aliases, columns, others)
+    order += refs
+    ordered = [c for i, c in enumerate(order) if c in columns and c != rowid and c not in order[:i]]
+    if len(ordered) > MAX_COLUMNS:
+        ordered = [c for c in ordered if c in leading]
+    if not ordered:
+        return None
+    return IndexProposal(table, tuple(ordered))
+
+
+def _existing_indexes(conn: sqlite3.Connection, table: str) -> List[Tuple[str, ...]]:
+    """Column lists of the indexes on ``table`` (on its first partition when partitioned)."""
+    physical = _physical(conn, table)
+    if not physical:
+        return []
+    return [
+        tuple(r[2] for r in conn.execute(f"PRAGMA index_info({name})"))
+        for _, name, *_ in conn.execute(f"PRAGMA index_list({physical[0]})")
+    ]
+
+
+def _row_count(conn: sqlite3.Connection, table: str) -> int:
+    return sum(
+        conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in _physical(conn, table)
+    )
+
+
+def propose(
+    conn: sqlite3.Connection, queries: Sequence[Query], min_rows: int = MIN_ROWS
+) -> List[IndexProposal]:
+    """Candidate indexes for ``queries``, longest first, none a prefix of another."""
+    proposals: List[IndexProposal] = []
+    sizes: Dict[str, int] = {}
+    for query in queries:
+        names = _sources(conn, _expand_views(conn, query.sql))
+        for step in query_plan(conn, query.sql):
+            proposal = _candidate(conn, query, step, names)
+            if proposal is None:
+                continue
+            if proposal.table not in sizes:
+                sizes[proposal.table] = _row_count(conn, proposal.table)
+            if sizes[proposal.table] >= min_rows and proposal not in proposals:
+                proposals.append(proposal)
+
+    def covered(p: IndexProposal) -> bool:
+        longer = [q.columns for q in proposals if q.table == p.table and q != p]
+        longer += _existing_indexes(conn, p.table)
+        return any(cols[: len(p.columns)] == p.columns for cols in longer)
+
+    return sorted((p for p in proposals if not covered(p)), key=lambda p: -len(p.columns))
+
+
+def _time(conn: sqlite3.Connection, sql: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _timing(
+    conn: sqlite3.Connection,
+    query: Query,
+    before_seconds: float,
+    before_plan: List[str],
+    proposals: Sequence[IndexProposal],
+    repeat: int,
+) -> QueryTiming:
+    after = query_plan(conn, query.sql)
+    used = [
+        p.name()
+        for p in proposals
+        if any(p.name(t) in step for t in _physical(conn, p.table) for step in after)
+    ]
+    return QueryTiming(
+        query.name, before_seconds, _time(conn, query.sql, repeat), before_plan, after, used
+    )
+
+
+def _pays_off(proposal: IndexProposal, timings: Sequence[QueryTiming], min_gain: float) -> bool:
+    """A query using ``proposal`` gained ``min_gain``, none lost more; together they gained."""
+    users = [t for t in timings if proposal.name() in t.indexes]
+    return (
+        bool(users)
+        and max(t.gain for t in users) >= min_gain
+        and min(t.gain for t in users) >= -min_gain
+        and sum(t.after_seconds for t in users) < sum(t.before_seconds for t in users)
+    )
+
+
+def _drop(conn: sqlite3.Connection, proposals: Sequence[IndexProposal]) -> None:
+    for proposal in proposals:
+        for table in _physical(conn, proposal.table):
+            conn.execute(f"DROP INDEX IF EXISTS {proposal.name(table)}")
+
+
+def evaluate(
+    conn: sqlite3.Connection,
+    queries: Sequence[Query],
+    proposals: Sequence[IndexProposal],
+    repeat: int = 3,
+    min_gain: float = 0.1,
+    apply: bool = False,
+) -> AdvisorReport:
+    """Time ``queries`` without and with ``proposals``; keep the helpful ones if ``apply``.
+
+    ``min_gain`` is both the gain an index must bring some query and the most
+    any query using it may lose. The timings reported are those with the kept
+    indexes only. Commits any open transaction first.
+    """
+    conn.commit()
+    report = AdvisorReport(proposals=list(proposals))
+    cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+    conn.execute(f"PRAGMA cache_size = -{TIMING_CACHE_KIB}")
+    isolation, conn.isolation_level = conn.isolation_level, None
+    conn.execute("BEGIN")
+    try:
+        # timed inside the transaction too, so both sides run under the same conditions
+        before = [(q, _time(conn, q.sql, repeat), query_plan(conn, q.sql)) for q in queries]
+        total_before = sum(seconds for _, seconds, _ in before)
+        for proposal in proposals:
+            for table in _physical(conn, proposal.table):
+                conn.execute(proposal.sql(table))
+        kept = list(proposals)
+        while True:
+            report.queries = [_timing(conn, q, s, plan, kept, repeat) for q, s, plan in before]
+            dropped = [p for p in kept if not _pays_off(p, report.queries, min_gain)]
+            slower = sum(t.after_seconds for t in report.queries) >= total_before
+            if kept and not dropped and slower:
+                dropped = kept  # each pays off for its queries, but the workload got slower
+            if not dropped:
+                break
+            _drop(conn, dropped)
+            kept = [p for p in kept if p not in dropped]
+        report.kept = kept
+        if apply:
+            conn.execute("COMMIT")
+            report.applied = True
+        else:
+            conn.execute("ROLLBACK")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.isolation_level = isolation
+        conn.execute(f"PRAGMA cache_size = {cache_size}")
+    return report
+
+
+def main(
+    workload: Optional[Path] = None,
+    db_path: Optional[Path] = None,
+    apply: bool = False,
+    min_gain: float = 0.1,
+    repeat: int = 3,
+) -> AdvisorReport:
+    queries = read_workload(workload or settings.OLAP_WORKLOAD)
+    db_path = Path(db_path or settings.DW_PATH)
+    conn = sqlite3.connect(db_path)
+    try:
+        for query in queries:
+            try:
+                query_plan(conn, query.sql)
+            except sqlite3.Error as exc:
+                raise SystemExit(
+                    f"Workload query '{query.name}' does not run on {db_path}: {exc}. "
+                    "Rebuild it with python -m analytics_project.etl_to_dw first."
+                ) from exc
+        proposals = propose(conn, queries)
+        report = evaluate(conn, queries, proposals, repeat, min_gain, apply)
+    finally:
+        conn.close()
+    print(f"{'query':<36} {'before ms':>10} {'after ms':>10} {'gain':>7}  index")
+    for t in report.queries:
+        index = ", ".join(t.indexes) or "-"
+        print(
+            f"{t.name:<36} {t.before_seconds * 1000:>10.1f} {t.after_seconds * 1000:>10.1f}"
+            f" {t.gain:>7.0%}  {index}"
+        )
+    print()
+    for p in report.proposals:
+        status = ("created" if report.applied else "keep") if p in report.kept else "no gain"
+        print(f"[{status}] {p.sql()};")
+    if not report.proposals:
+        print(f"[INFO] No index proposals: no table of {MIN_ROWS:,}+ rows is read uncovered.")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Propose covering indexes for an OLAP workload.")
+    parser.add_argument("--workload", type=Path, default=None, help="default olap/workload.sql")
+    parser.add_argument("--db", type=Path, default=None, help="warehouse file (default DW_PATH)")
+    parser.add_argument("--apply", action="store_true", help="create the indexes that help")
+    parser.add_argument(
+        "--min-gain",
+        type=float,
+        default=0.1,
+        help="fraction of a query's time an index must save (and the most it may cost one)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per query (best kept)")
+    args = parser.parse_args()
+    main(args.workload, args.db, args.apply, args.min_gain, args.repeat)
@@ -0,0 +1,3 @@
+from .cube import Cube
+
+__all__ = ["Cube"]
@@ -0,0 +1,360 @@
+"""
+cube.py
+-------
+In-memory OLAP cube over the smart_sales.db star schema.
+
+``Cube.from_warehouse()`` joins sale -> product / customer once and keeps the
+result as a single fact frame whose dimension columns are dictionary-encoded
+(pandas ``category`` dtype). ``Cube.load()`` does the same through the
+memory-mapped Arrow cache in ``fact_cache``, so only the first process after
+an ETL load pays for the join. ``Cube.from_sales_cube()`` instead reads the
+``sales_cube`` aggregate the ETL keeps (category x region x state x month), a
+few rows per month however many sales there are, for questions that only need
+those dimensions. Queries never touch SQLite again:
+
+- ``slice`` / ``dice`` return a sub-cube that shares the fact frame and only
+  carries a boolean row mask (no copying).
+- ``rollup`` / ``drilldown`` / ``top_k`` aggregate with ``np.bincount`` over a
+  group index (dense group id per row) that is built once per set of
+  dimensions and cached, so asking the same kind of question again - on the
+  whole cube or any slice of it - skips the grouping work.
+
+    cube = Cube.load()
+    top = cube.top_k(["category"], k=1)["category"].iloc[0]
+    by_state = cube.slice(category=top).top_k(["state_code"])
+
+Run the OLAP scripts from the project root:
+    uv run python olap/goal_top_category_by_state_month.py
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analytics_project import settings
+from analytics_project.warehouse import DateLike, get_pool, sale_source
+
+DIMENSIONS = [
+    "category",
+    "region",
+    "state_code",
+    "year",
+    "quarter",
+    "month",
+    "week",
+    "dow",
+    "is_weekend",
+    "product_id",
+    "customer_id",
+    "store_id",
+    "campaign_id",
+]
+MEASURES = ["sale_amount", "net_sales"]
+SALES_CUBE_DIMENSIONS = ["category", "region", "state_code", "year", "month"]
+AGGREGATES = ("sum", "count", "mean")
+
+# One row per sale with its dimension attributes; net sales matches sales_cube.
+# {source} is sale, or a date-bounded source from warehouse.sale_source. The time
+# attributes replace date_key afterwards (see date_attributes).
+FACT_SQL = """
+SELECT
+    p.category,
+    c.country AS region,
+    s.state_code,
+    s.date_key,
+    s.product_id,
+    s.customer_id,
+    s.store_id,
+    s.campaign_id,
+    s.sale_amount,
+    s.sale_amount * (1 - COALESCE(s.discount_pct, 0) / 100.0) AS net_sales
+FROM {source} s
+LEFT JOIN product  p ON p.product_id  = s.product_id
+LEFT JOIN customer c ON c.customer_id = s.customer_id
+"""
+
+
+# Time dimensions per calendar day; month is labelled "YYYY-MM" here, once per day.
+DATE_DIM_SQL = """
+SELECT
+    date_key,
+    year,
+    quarter,
+    printf('%04d-%02d', year, month) AS month,
+    week,
+    dow,
+    is_weekend
+FROM date_dim
+"""
+TIME_DIMENSIONS = ["year", "quarter", "month", "week", "dow", "is_weekend"]
+
+# The sales_cube aggregate with the fact frame's column names; sale_count is the
+# number of sales behind each cell.
+SALES_CUBE_SQL = """
+SELECT
+    category,
+    region,
+    state_code,
+    year,
+    printf('%04d-%02d', year, month) AS month,
+    total_sales AS sale_amount,
+    net_sales,
+    sale_count
+FROM sales_cube
+"""
+
+
+def date_attributes(date_keys: pd.Series, dates: pd.DataFrame) -> pd.DataFrame:
+    """Time dimensions (category dtype) for each fact's date_key, looked up in date_dim.
+
+    An integer lookup per row instead of date formatting per row; undated facts
+    (or days date_dim lacks) get missing values.
+    """
+    rows = pd.Index(dates["date_key"]).get_indexer(date_keys)
+    columns = {}
+    for dim in TIME_DIMENSIONS:
+        per_day = dates[dim].astype("category")
+        codes = np.where(rows >= 0, per_day.cat.codes.to_numpy()[rows], -1)
+        columns[dim] = pd.Categorical.from_codes(codes, dtype=per_day.dtype)
+    return pd.DataFrame(columns, index=date_keys.index)
+
+
+# (row -> dense group id, -1 where a dimension is missing; per-dimension codes of each group)
+GroupIndex = Tuple[np.ndarray, List[np.ndarray]]
+
+
+class Cube:
+    """Slice / dice / roll up a fact frame with dictionary-encoded dimensions.
+
+    With ``row_count`` each row stands for that many sales (a pre-aggregated
+    cell): ``count``, ``mean`` and ``len`` weight rows by it.
+    """
+
+    def __init__(
+        self,
+        facts: pd.DataFrame,
+        dimensions: Optional[Sequence[str]] = None,
+        row_count: Optional[str] = None,
+    ):
+        dims = [d for d in (dimensions or DIMENSIONS) if d in facts.columns]
+        self.facts = facts.copy(deep=False)  # only re-typed columns are new
+        for dim in dims:
+            if not isinstance(self.facts[dim].dtype, pd.CategoricalDtype):
+                self.facts[dim] = self.facts[dim].astype("category")
+        self.dimensions = dims
+        self.row_count = row_count
+        self._mask: Optional[np.ndarray] = None  # None = every row
+        # shared by every sub-cube of this fact frame
+        self._codes: Dict[str, np.ndarray] = {}
+        self._groups: Dict[Tuple[str, ...], GroupIndex] = {}
+
+    @classmethod
+    def from_warehouse(
+        cls,
+        db_path: Optional[Path] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> Cube:
+        """Load the joined sale fact from the warehouse (read-only) into a cube.
+
+        ``start`` / ``end`` bound the sale dates read; on a month-partitioned
+        warehouse the partitions outside them are never touched.
+        """
+        db_path = Path(db_path or settings.DW_PATH)
+        if not db_path.exists():
+            raise FileNotFoundError(
+                f"{db_path} not found; run python -m analytics_project.etl_to_dw first."
+            )
+        with get_pool(db_path).connection() as conn:
+            source, params = sale_source(conn, start, end)
+            facts = pd.read_sql_query(FACT_SQL.format(source=source), conn, params=params)
+            dates = pd.read_sql_query(DATE_DIM_SQL, conn)
+        at = facts.columns.get_loc("date_key")
+        time_dims = date_attributes(facts["date_key"], dates)
+        return cls(pd.concat([facts.iloc[:, :at], time_dims, facts.iloc[:, at + 1 :]], axis=1))
+
+    @classmethod
+    def from_sales_cube(cls, db_path: Optional[Path] = None) -> Cube:
+        """Cube over the ETL-maintained ``sales_cube`` aggregate instead of the sale fact.
+
+        Only its dimensions (``SALES_CUBE_DIMENSIONS``) and the two measures
+        exist; ``mean`` is the cell totals over ``sale_count``, which also counts
+        sales without an amount.
+        """
+        db_path = Path(db_path or settings.DW_PATH)
+        if not db_path.exists():
+            raise FileNotFoundError(
+                f"{db_path} not found; run python -m analytics_project.etl_to_dw first."
+            )
+        with get_pool(db_path).connection() as conn:
+            cells = pd.read_sql_query(SALES_CUBE_SQL, conn)
+        return cls(cells, SALES_CUBE_DIMENSIONS, row_count="sale_count")
+
+    @classmethod
+    def from_arrow(cls, cache_path: Optional[Path] = None) -> Cube:
+        """Memory-map a fact cache written by ``olap.fact_cache.build_fact_cache``."""
+        from analytics_project.olap.fact_cache import read_fact_cache
+
+        return cls(read_fact_cache(cache_path))
+
+    @classmethod
+    def load(cls, db_path: Optional[Path] = None, cache_path: Optional[Path] = None) -> Cube:
+        """Cube from the Arrow fact cache, (re)building it first if the warehouse changed.
+
+        Without pyarrow this is the same as ``from_warehouse``.
+        """
+        from analytics_project.olap.fact_cache import (
+            build_fact_cache,
+            cached_version,
+            warehouse_version,
+        )
+
+        db_path = Path(db_path or settings.DW_PATH)
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return cls.from_warehouse(db_path)
+        if not db_path.exists():
+            raise FileNotFoundError(
+                f"{db_path} not found; run python -m analytics_project.etl_to_dw first."
+            )
+        cache_path = Path(cache_path or settings.FACT_CACHE_PATH)
+        if cached_version(cache_path) != warehouse_version(db_path):
+            build_fact_cache(db_path, cache_path)
+        return cls.from_arrow(cache_path)
+
+    # --- internals ---
+    def _sub(self, mask: np.ndarray) -> Cube:
+        sub = object.__new__(Cube)
+        sub.__dict__.update(self.__dict__)
+        sub._mask = mask if self._mask is None else (self._mask & mask)
+        return sub
+
+    def _check(self, dims: Sequence[str]) -> None:
+        unknown = [d for d in dims if d not in self.dimensions]
+        if unknown:
+            raise KeyError(f"Unknown dimension(s) {unknown}; cube has {self.dimensions}")
+
+    def _dim_codes(self, dim: str) -> np.ndarray:
+        if dim not in self._codes:
+            self._codes[dim] = self.facts[dim].cat.codes.to_numpy()
+        return self._codes[dim]
+
+    def _member_codes(self, dim: str, values: Sequence[Any]) -> np.ndarray:
+        categories = self.facts[dim].cat.categories
+        codes = categories.get_indexer(pd.Index(list(values)))
+        return codes[codes >= 0]
+
+    def _weights(self) -> Optional[np.ndarray]:
+        if self.row_count is None:
+            return None
+        return self.facts[self.row_count].to_numpy(dtype="float64")
+
+    def _group_index(self, by: Sequence[str]) -> GroupIndex:
+        key = tuple(by)
+        if key not in self._groups:
+            codes = [self._dim_codes(d) for d in by]
+            shape = tuple(max(len(self.facts[d].cat.categories), 1) for d in by)
+            valid = np.logical_and.reduce([c >= 0 for c in codes])
+            flat = np.ravel_multi_index([np.where(valid, c, 0) for c in codes], shape)
+            keys, inverse = np.unique(flat[valid], return_inverse=True)
+            ids = np.full(len(flat), -1, dtype=np.int64)
+            ids[valid] = inverse
+            self._groups[key] = (ids, list(np.unravel_index(keys, shape)))
+        return self._groups[key]
+
+    # --- queries ---
+    def __len__(self) -> int:
+        weights = self._weights()
+        if weights is None:
+            return len(self.facts) if self._mask is None else int(self._mask.sum())
+        return int(weights.sum() if self._mask is None else weights[self._mask].sum())
+
+    def members(self, dim: str) -> List[Any]:
+        """Distinct values of a dimension present in this (sub-)cube, sorted."""
+        self._check([dim])
+        codes = self._dim_codes(dim)
+        if self._mask is not None:
+            codes = codes[self._mask]
+        present = np.unique(codes[codes >= 0])
+        return list(self.facts[dim].cat.categories[present])
+
+    def slice(self, **members: Any) -> Cube:
+        """Fix one or more dimensions to a single value: ``cube.slice(year=2025)``."""
+        return self.dice(**{dim: [value] for dim, value in members.items()})
+
+    def dice(self, **members: Sequence[Any]) -> Cube:
+        """Keep rows whose dimensions fall in the given value sets."""
+        self._check(list(members))
+        mask = np.ones(len(self.facts), dtype=bool)
+        for dim, values in members.items():
+            mask &= np.isin(self._dim_codes(dim), self._member_codes(dim, values))
+        return self._sub(mask)
+
+    def rollup(
+        self, by: Sequence[str], measure: str = "sale_amount", agg: str = "sum"
+    ) -> pd.DataFrame:
+        """Aggregate ``measure`` by the ``by`` dimensions, one row per non-empty cell.
+
+        Rows with a missing value in any ``by`` dimension are left out (as in
+        ``groupby``). ``agg`` is ``sum``, ``count`` (rows) or ``mean``; result
+        rows are ordered by the ``by`` dimensions.
+        """
+        by = list(by)
+        if not by:
+            raise ValueError("rollup needs at least one dimension")
+        self._check(by)
+        if agg not in AGGREGATES:
+            raise ValueError(f"agg must be one of {AGGREGATES}, got {agg!r}")
+        ids, group_codes = self._group_index(by)
+        values = self.facts[measure].to_numpy(dtype="float64", na_value=np.nan)
+        keep = ids >= 0 if self._mask is None else (ids >= 0) & self._mask
+        ids, values = ids[keep], values[keep]
+        weights = self._weights()
+        if weights is not None:
+            weights = weights[keep]
+
+        n_groups = len(group_codes[0])
+        counts = np.bincount(ids, weights=weights, minlength=n_groups)
+        present = counts > 0
+        if agg == "count":
+            result = counts.astype(np.int64)
+        else:
+            observed = ~np.isnan(values)
+            result = np.bincount(ids[observed], weights=values[observed], minlength=n_groups)
+            if agg == "mean":
+                rows = None if weights is None else weights[observed]
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    result = result / np.bincount(ids[observed], rows, minlength=n_groups)
+
+        out = pd.DataFrame(
+            {
+                dim: pd.Categorical.from_codes(codes[present], dtype=self.facts[dim].dtype)
+                for dim, codes in zip(by, group_codes, strict=True)
+            }
+        )
+        out[measure if agg != "count" else "count"] = result[present]
+        return out
+
+    def drilldown(
+        self, by: Sequence[str], into: str, measure: str = "sale_amount", agg: str = "sum"
+    ) -> pd.DataFrame:
+        """Roll up one level finer: ``by`` plus the ``into`` dimension."""
+        return self.rollup([*by, into], measure, agg)
+
+    def top_k(
+        self,
+        by: Sequence[str],
+        k: Optional[int] = None,
+        measure: str = "sale_amount",
+        agg: str = "sum",
+    ) -> pd.DataFrame:
+        """Cells of ``rollup(by)`` ranked by the aggregate, largest first (all if k is None)."""
+        cells = self.rollup(by, measure, agg)
+        column = measure if agg != "count" else "count"
+        ranked = cells.sort_values(column, ascending=False, kind="stable").reset_index(drop=True)
+        return ranked if k is None else ranked.head(k)
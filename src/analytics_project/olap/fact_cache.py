@@ -0,0 +1,91 @@
+"""
+fact_cache.py
+-------------
+Arrow IPC cache of the denormalized sales fact (the rows behind ``Cube``).
+
+``build_fact_cache()`` runs the star-schema join once and writes the result,
+dimensions dictionary-encoded, to an uncompressed Arrow IPC file next to the
+warehouse. ``read_fact_cache()`` memory-maps that file, so every analysis
+process maps the same OS pages instead of re-running the join and holding its
+own copy; numeric columns without nulls and dictionary codes come through
+without copying.
+
+The file records the warehouse generation it was built from (the latest
+``etl_load.load_id`` and the warehouse file's identity); ``Cube.load()``
+rebuilds it after a newer load or when the warehouse file has been replaced.
+
+Run from the project root (after etl_to_dw):
+    uv run python -m analytics_project.olap.fact_cache
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from analytics_project import settings
+from analytics_project.warehouse import get_pool
+
+# schema metadata key holding the warehouse version the cache was built from
+VERSION_KEY = b"warehouse_version"
+
+
+def warehouse_version(db_path: Optional[Path] = None) -> str:
+    """Warehouse generation: latest load id and file identity (warehouse.load_generation)."""
+    return get_pool(db_path).generation()
+
+
+def cached_version(cache_path: Optional[Path] = None) -> Optional[str]:
+    """Warehouse version stored in the cache file, or None if there is no cache."""
+    import pyarrow as pa
+
+    cache_path = Path(cache_path or settings.FACT_CACHE_PATH)
+    if not cache_path.exists():
+        return None
+    with pa.memory_map(str(cache_path), "r") as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    version = metadata.get(VERSION_KEY)
+    return version.decode() if version else None
+
+
+def build_fact_cache(db_path: Optional[Path] = None, cache_path: Optional[Path] = None) -> Path:
+    """Join the star schema and write it as an Arrow IPC file; return the path."""
+    import pyarrow as pa
+
+    from analytics_project.olap.cube import Cube
+
+    db_path = Path(db_path or settings.DW_PATH)
+    cache_path = Path(cache_path or settings.FACT_CACHE_PATH)
+    version = warehouse_version(db_path)
+    facts = Cube.from_warehouse(db_path).facts  # dimensions already category dtype
+    table = pa.Table.from_pandas(facts, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), VERSION_KEY: version.encode()}
+    )
+    # write to a temp name and rename, so readers never map a half-written file
+    tmp = cache_path.with_name(cache_path.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    tmp.replace(cache_path)
+    return cache_path
+
+
+def read_fact_cache(cache_path: Optional[Path] = None) -> pd.DataFrame:
+    """Memory-map the cache and return it as a DataFrame (categories preserved)."""
+    import pyarrow as pa
+
+    cache_path = Path(cache_path or settings.FACT_CACHE_PATH)
+    with pa.memory_map(str(cache_path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def main() -> None:
+    path = build_fact_cache()
+    print(f"[INFO] Wrote sales fact cache ({cached_version(path)}) to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+pipeline.py
+-----------
+Dependency-aware runner for the full refresh: prepare customers, products and
+sales (independent of each other), load the warehouse, then rebuild the
+memory-mapped sales fact cache the OLAP cube reads.
+
+Independent stages run at the same time in a process pool, so a refresh takes
+about as long as the slowest chain of stages instead of the sum of all of them.
+Per-stage wall time is printed at the end.
+
+Stages whose inputs, code and settings are unchanged since their last run are
+skipped (see stage_cache); ``--force`` runs everything anyway.
+
+``--profile`` records every scrub/ETL step in the workers (see profiling) and
+prints a per-step table after the stage summary; ``--profile memory`` also
+traces allocations.
+
+Run from the project root:
+    uv run python -m analytics_project.pipeline
+    # or
+    python -m analytics_project.pipeline --workers 3
+    python -m analytics_project.pipeline --force
+    python -m analytics_project.pipeline --force --profile
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+import importlib
+import multiprocessing
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from analytics_project.profiling import print_summary, read_log
+from analytics_project.stage_cache import StageCache
+
+# stage name -> ("module" or "module:function", names of stages it depends on)
+# A bare module name runs its main().
+Stages = Dict[str, Tuple[str, Tuple[str, ...]]]
+
+PREPARE = "analytics_project.data_preparation"
+STAGES: Stages = {
+    "prepare_customers": (f"{PREPARE}.prepare_customers_data", ()),
+    "prepare_products": (f"{PREPARE}.prepare_products_data", ()),
+    "prepare_sales": (f"{PREPARE}.prepare_sales_data", ()),
+    "profile_raw": ("analytics_project.data_prep", ()),
+    "etl_to_dw": (
+        "analytics_project.etl_to_dw",
+        ("prepare_customers", "prepare_products", "prepare_sales"),
+    ),
+    "fact_cache": ("analytics_project.olap.fact_cache", ("etl_to_dw",)),
+}
+
+
+def _run_stage(target: str) -> float:
+    """Import and call one stage target in a worker; return its wall time in seconds."""
+    module_name, _, func_name = target.partition(":")
+    func = getattr(importlib.import_module(module_name), func_name or "main")
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def stage_order(stages: Stages) -> List[str]:
+    """Return stage names in a valid run order, or raise ValueError for a bad DAG."""
+    order: List[str] = []
+    state: Dict[str, str] = {}  # name -> "visiting" | "done"
+
+    def visit(name: str, path: Tuple[str, ...]) -> None:
+        if name not in stages:
+            raise ValueError(f"Stage '{path[-1]}' depends on unknown stage '{name}'")
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' -> '.join((*path, name))}")
+        state[name] = "visiting"
+        for dep in stages[name][1]:
+            visit(dep, (*path, name))
+        state[name] = "done"
+        order.append(name)
+
+    for name in stages:
+        visit(name, ())
+    return order
+
+
+def run_pipeline(
+    stages: Stages = STAGES,
+    max_workers: Optional[int] = None,
+    cache: Optional[StageCache] = None,
+    force: bool = False,
+) -> Dict[str, float]:
+    """Run every stage once its dependencies finish; return stage -> seconds.
+
+    With a ``cache``, stages it reports as fresh are skipped (0 seconds) unless
+    ``force``; stages that run are recorded and the manifest is saved at the end.
+    If a stage fails, nothing new is started, stages already running are allowed
+    to finish, and a RuntimeError naming the failed stage is raised.
+    """
+    waiting = stage_order(stages)
+    timings: Dict[str, float] = {}
+    running: Dict[Future, str] = {}
+    fingerprints: Dict[str, Optional[str]] = {}
+    skipped: List[str] = []
+    failed: Optional[Tuple[str, BaseException]] = None
+    started = time.perf_counter()
+
+    # spawn (the Windows default) everywhere: forking a process that already has
+    # pandas/arrow threads running can deadlock the child
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as pool:
+        while waiting or running:
+            ready = failed is None
+            while ready:  # a skipped stage can unblock its dependents right away
+                ready = [n for n in waiting if all(d in timings for d in stages[n][1])]
+                for name in ready:
+                    waiting.remove(name)
+                    target = stages[name][0]
+                    fingerprints[name] = cache.fingerprint(name, target) if cache else None
+                    if cache and not force and cache.is_fresh(name, fingerprints[name]):
+                        cache.skip(name)
+                        skipped.append(name)
+                        timings[name] = 0.0
+                        print(f"[pipeline] skipped {name} (unchanged)")
+                        continue
+                    running[pool.submit(_run_stage, target)] = name
+                    print(f"[pipeline] started {name}")
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    timings[name] = fut.result()
+                except Exception as e:  # report after the running stages drain
+                    failed = failed or (name, e)
+                    print(f"[pipeline] FAILED {name}: {e}")
+                else:
+                    print(f"[pipeline] finished {name} in {timings[name]:.2f}s")
+                    if cache:
+                        cache.record(name, fingerprints[name], timings[name])
+
+    if cache:
+        cache.save()
+    _print_summary(timings, time.perf_counter() - started, skipped)
+    if failed is not None:
+        raise RuntimeError(f"Pipeline stage '{failed[0]}' failed") from failed[1]
+    return timings
+
+
+def _print_summary(timings: Dict[str, float], wall: float, skipped: Sequence[str] = ()) -> None:
+    print("\n=== PIPELINE SUMMARY (stage → seconds) ===")
+    for name, secs in timings.items():
+        print(f"{name:<20} {'skipped' if name in skipped else f'{secs:8.2f}':>8}")
+    print(f"{'sum of stages':<20} {sum(timings.values()):8.2f}")
+    print(f"{'wall time':<20} {wall:8.2f}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the full refresh from the command line."""
+    parser = argparse.ArgumentParser(description="Run the prepare + ETL pipeline.")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    parser.add_argument("--force", action="store_true", help="run stages even if unchanged")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="1",
+        choices=["1", "memory"],
+        help="record per-step timings in the workers ('memory' adds tracemalloc)",
+    )
+    args = parser.parse_args(argv)
+    if args.profile:
+        os.environ["PROFILE"] = args.profile  # read by settings in each spawned worker
+    started = time.time()
+    run_pipeline(STAGES, max_workers=args.workers, cache=StageCache(), force=args.force)
+    if args.profile:
+        print_summary(read_log(since=started))
+
+
+if __name__ == "__main__":
+    main()
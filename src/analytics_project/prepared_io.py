@@ -0,0 +1,91 @@
+"""
+prepared_io.py
+--------------
+Read and write the data/prepared layer as CSV or as a typed columnar file.
+
+CSV loses dtypes, so every downstream stage re-parses dates and numbers.
+Parquet and Feather (Arrow IPC) keep datetime, float and category columns as
+they left the scrubber, and let readers load only the columns they need.
+
+CSV copies are read through the schema registry (``schemas.read_csv``), so
+they at least get explicit dtypes and date formats.
+
+The format comes from ``settings.PREPARED_FORMAT`` (``csv`` by default; set the
+``PREPARED_FORMAT`` environment variable to ``parquet`` or ``feather``). Paths
+are always given as the ``.csv`` path from settings; the columnar file sits next
+to it with the same stem. Columnar formats need pyarrow (``pip install
+.[columnar]``).
+
+    write_prepared(df, settings.SALES_PREP)
+    sales = read_prepared(settings.SALES_PREP, columns=["saledate", "saleamount"])
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+from . import settings
+from .schemas import read_csv
+
+SUFFIXES = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+
+def prepared_path(path: Path | str, fmt: Optional[str] = None) -> Path:
+    """Return where ``path`` (a prepared ``.csv`` path) is stored in ``fmt``."""
+    fmt = fmt or settings.PREPARED_FORMAT
+    if fmt not in SUFFIXES:
+        raise ValueError(f"Unknown prepared format {fmt!r}; expected one of {list(SUFFIXES)}")
+    return Path(path).with_suffix(SUFFIXES[fmt])
+
+
+def write_prepared(df: pd.DataFrame, path: Path | str, fmt: Optional[str] = None) -> Path:
+    """Write ``df`` in the prepared format and return the file written."""
+    fmt = fmt or settings.PREPARED_FORMAT
+    out = prepared_path(path, fmt)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "csv":
+        df.to_csv(out, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(out, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(out)
+    return out
+
+
+def _file_columns(path: Path) -> List[str]:
+    if path.suffix == ".csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if path.suffix == ".parquet":
+        return pq.read_schema(path).names
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+def read_prepared(
+    path: Path | str,
+    columns: Optional[Sequence[str]] = None,
+    fmt: Optional[str] = None,
+) -> pd.DataFrame:
+    """Read a prepared dataset, loading only ``columns`` (names not in the file are ignored).
+
+    Uses the ``fmt`` file when it exists and falls back to the CSV, so a fresh
+    checkout (CSV only) still loads.
+    """
+    src = prepared_path(path, fmt)
+    if not src.exists():
+        src = prepared_path(path, "csv")
+    use = None
+    if columns is not None:
+        wanted = set(columns)
+        use = [c for c in _file_columns(src) if c in wanted]
+    if src.suffix == ".csv":
+        return read_csv(src, columns=use)
+    if src.suffix == ".parquet":
+        return pd.read_parquet(src, columns=use)
+    return pd.read_feather(src, columns=use)
@@ -0,0 +1,299 @@
+"""
+profiling.py
+------------
+Opt-in per-step instrumentation for the scrubber, the prepare scripts and the
+ETL load.
+
+Every ``DataScrubber`` method and ETL step is wrapped with ``profiled`` (or an
+inline ``profile_step`` block). When profiling is off the wrapper is a single
+flag check. When it is on, each step appends one JSON line to
+``settings.PROFILE_LOG`` with:
+
+- ``seconds`` (wall time) and ``self_seconds`` (minus nested profiled steps),
+- ``rows_in`` / ``rows_out``,
+- ``bytes_read`` / ``bytes_written``: what the process read/wrote through
+  system calls during the step (``/proc/self/io``, Linux only); steps that know
+  their file sizes report those instead,
+- ``rss_peak_mb`` (process high-water mark after the step),
+- ``mem_peak_mb``: tracemalloc peak above the step's starting allocation, only
+  with memory tracing on (it slows pandas down noticeably).
+
+Turn it on with the ``PROFILE`` environment variable (``PROFILE=memory`` adds
+tracemalloc), ``pipeline --profile``, or ``enable()`` in code. Worker
+processes append to the same file, one line per record.
+
+Run from the project root:
+    PROFILE=1 uv run python -m analytics_project.etl_to_dw
+    uv run python -m analytics_project.profiling           # summary table of the log
+    uv run python -m analytics_project.profiling --last 60 # only the last minute
+"""
+
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager
+import functools
+import json
+import os
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from . import settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+Record = Dict[str, Any]
+
+
+class _State:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.memory = False
+        self.log_path: Optional[Path] = None
+        self.stack: List[Record] = []  # open steps, innermost last
+        # the profiler's own I/O (log lines, /proc reads), kept out of steps' bytes
+        self.own_read = 0
+        self.own_written = 0
+
+
+_state = _State()
+
+
+def enable(log_path: Optional[Path | str] = None, memory: bool = False) -> None:
+    """Start recording steps to ``log_path`` (default ``settings.PROFILE_LOG``)."""
+    _state.enabled = True
+    _state.memory = memory
+    _state.log_path = Path(log_path or settings.PROFILE_LOG)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    """Stop recording (tracemalloc is stopped too if ``enable`` started it)."""
+    if _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.enabled = False
+    _state.memory = False
+
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+def file_bytes(*paths: Path | str) -> int:
+    """Total size of the files that exist among ``paths``."""
+    return sum(Path(p).stat().st_size for p in paths if Path(p).is_file())
+
+
+def _rss_peak_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _io_bytes() -> Optional[Tuple[int, int]]:
+    """(rchar, wchar) of this process, or None where /proc/self/io is missing."""
+    try:
+        with open("/proc/self/io", "rb") as f:
+            data = f.read()
+        _state.own_read += len(data)
+        fields = dict(line.split(b":", 1) for line in data.splitlines())
+        return int(fields[b"rchar"]), int(fields[b"wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _rows(obj: Any) -> Optional[int]:
+    if isinstance(obj, pd.DataFrame):
+        return len(obj)
+    if isinstance(obj, tuple) and obj and all(isinstance(o, pd.DataFrame) for o in obj):
+        return sum(len(o) for o in obj)
+    return None
+
+
+def _write(rec: Record) -> None:
+    path = _state.log_path or Path(settings.PROFILE_LOG)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # one small append per record, so parallel workers don't interleave lines
+    line = (json.dumps(rec, default=str) + "\n").encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(line)
+    _state.own_written += len(line)
+
+
+@contextmanager
+def profile_step(step: str, df: Optional[pd.DataFrame] = None, **fields: Any) -> Iterator[Record]:
+    """Time the block as ``step`` and write its record when it exits.
+
+    ``df`` gives ``rows_in``. The yielded dict can be filled in inside the block
+    (``rows_out``, ``bytes_read``, ``bytes_written`` or any extra field). When
+    profiling is off the dict is thrown away and nothing is measured.
+    """
+    rec: Record = {"step": step, **fields}
+    if not _state.enabled:
+        yield rec
+        return
+    if df is not None:
+        rec.setdefault("rows_in", len(df))
+    tracing = _state.memory and tracemalloc.is_tracing()
+    if tracing:
+        # fold the peak so far into the open steps before resetting it for this one
+        peak = tracemalloc.get_traced_memory()[1]
+        for outer in _state.stack:
+            outer["_peak"] = max(outer["_peak"], peak)
+        tracemalloc.reset_peak()
+        rec["_start_mem"] = tracemalloc.get_traced_memory()[0]
+        rec["_peak"] = 0
+    rec["_children"] = 0.0
+    _state.stack.append(rec)
+    io_start = _io_bytes()
+    own_start = (_state.own_read, _state.own_written)
+    start = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        seconds = time.perf_counter() - start
+        io_end = _io_bytes()
+        if io_start and io_end:
+            # /proc/self/io is text, so its own length can jitter by a byte or two
+            read = io_end[0] - io_start[0] - (_state.own_read - own_start[0])
+            written = io_end[1] - io_start[1] - (_state.own_written - own_start[1])
+            rec.setdefault("bytes_read", max(read, 0))
+            rec.setdefault("bytes_written", max(written, 0))
+        _state.stack.pop()
+        if _state.stack:
+            _state.stack[-1]["_children"] += seconds
+        rec["seconds"] = round(seconds, 6)
+        rec["self_seconds"] = round(seconds - rec.pop("_children"), 6)
+        if tracing:
+            peak = max(rec.pop("_peak"), tracemalloc.get_traced_memory()[1])
+            for outer in _state.stack:
+                outer["_peak"] = max(outer["_peak"], peak)
+            rec["mem_peak_mb"] = round((peak - rec.pop("_start_mem")) / 2**20, 3)
+        rec["rss_peak_mb"] = _rss_peak_mb()
+        rec["depth"] = len(_state.stack)
+        rec["pid"] = os.getpid()
+        rec["ts"] = round(time.time(), 3)
+        _write(rec)
+
+
+def profiled(
+    step: Optional[str] = None, rows_out: Optional[Callable[[Any], Optional[int]]] = None
+) -> Callable:
+    """Decorator form of ``profile_step``.
+
+    ``rows_in`` is the length of the first DataFrame argument and ``rows_out`` the
+    length of a returned DataFrame (or tuple of them); pass ``rows_out`` to derive
+    it from some other return value, e.g. a row count.
+    """
+
+    def wrap(func: Callable) -> Callable:
+        name = step or func.__qualname__
+
+        @functools.wraps(func)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            df = next((a for a in (*args, *kwargs.values()) if isinstance(a, pd.DataFrame)), None)
+            with profile_step(name, df) as rec:
+                result = func(*args, **kwargs)
+                rec["rows_out"] = (rows_out or _rows)(result)
+            return result
+
+        return inner
+
+    return wrap
+
+
+# --- reading the log ---
+def read_log(path: Optional[Path | str] = None, since: Optional[float] = None) -> List[Record]:
+    """Records from a profile log, optionally only those written at or after ``since``."""
+    path = Path(path or settings.PROFILE_LOG)
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if since is None or r.get("ts", 0) >= since]
+
+
+SUMMARY_COLUMNS = [
+    "calls",
+    "self_seconds",
+    "seconds",
+    "share",
+    "rows_in",
+    "rows_out",
+    "bytes_read",
+    "bytes_written",
+    "mem_peak_mb",
+    "rss_peak_mb",
+]
+
+
+def summarize(records: Sequence[Record]) -> pd.DataFrame:
+    """One row per step, sorted by self time (the step's own work, children excluded).
+
+    ``share`` is the step's fraction of all self time; rows and bytes are totals
+    across calls, memory columns are maxima.
+    """
+    if not records:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    df = pd.DataFrame.from_records(records)
+    for col in SUMMARY_COLUMNS[4:]:
+        if col not in df.columns:
+            df[col] = None
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    grouped = df.groupby("step", sort=False)
+    out = grouped.agg(
+        calls=("step", "size"),
+        self_seconds=("self_seconds", "sum"),
+        seconds=("seconds", "sum"),
+        mem_peak_mb=("mem_peak_mb", "max"),
+        rss_peak_mb=("rss_peak_mb", "max"),
+    )
+    for col in ("rows_in", "rows_out", "bytes_read", "bytes_written"):
+        # blank rather than 0 for steps that never report the field
+        out[col] = grouped[col].sum(min_count=1).astype("Int64")
+    total = out["self_seconds"].sum()
+    out["share"] = (out["self_seconds"] / total).round(3) if total else 0.0
+    return out[SUMMARY_COLUMNS].sort_values("self_seconds", ascending=False)
+
+
+def print_summary(records: Sequence[Record], top: Optional[int] = None) -> None:
+    table = summarize(records)
+    print("\n=== PROFILE SUMMARY (by self time) ===")
+    if table.empty:
+        print("(no profiled steps)")
+        return
+    if top is not None:
+        table = table.head(top)
+    # mem_peak_mb is empty unless memory tracing was on
+    print(table.dropna(axis=1, how="all").to_string(float_format=lambda x: f"{x:.3f}"))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Print the summary table of a profile log."""
+    parser = argparse.ArgumentParser(description="Summarize a profile log (JSON lines).")
+    parser.add_argument("--log", type=Path, default=None, help="profile log path")
+    parser.add_argument("--last", type=float, default=None, help="only the last N seconds")
+    parser.add_argument("--top", type=int, default=None, help="show the N slowest steps")
+    args = parser.parse_args(argv)
+    since = time.time() - args.last if args.last is not None else None
+    print_summary(read_log(args.log, since), top=args.top)
+
+
+if settings.PROFILE not in ("", "0", "false", "off"):
+    enable(memory=settings.PROFILE == "memory")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+quantile_sketch.py
+------------------
+Mergeable quantile summaries for columns that arrive in chunks.
+
+``QuantileSketch`` is a KLL-style sketch: a stack of compactors where level ``h``
+holds items standing for ``2**h`` originals. Memory stays around ``k`` items no
+matter how many values are added, and the rank error is about ``error`` (a
+fraction of the item count). ``ExactQuantiles`` keeps every value instead and
+matches ``pandas.Series.quantile``.
+
+Both are picklable and have ``merge``, so worker processes can each summarise a
+shard and the parent combines them:
+
+    sketch = QuantileSketch(error=0.01)
+    for chunk in pd.read_csv(path, chunksize=100_000):
+        sketch.update(chunk["sale_amount"])
+    q1, q3 = sketch.quantile(0.25), sketch.quantile(0.75)
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Shrink factor for lower compactors (the value used in the KLL paper).
+_LEVEL_DECAY = 2 / 3
+# Rank error of a KLL sketch is roughly this constant over k.
+_ERROR_CONSTANT = 1.7
+
+
+def _as_values(values) -> np.ndarray:
+    arr = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64")
+    return arr[~np.isnan(arr)]
+
+
+class QuantileSketch:
+    """Approximate quantiles in bounded memory; see module docstring."""
+
+    def __init__(self, error: float = 0.01, seed: Optional[int] = None):
+        if not 0 < error < 1:
+            raise ValueError(f"error must be between 0 and 1, got {error}")
+        self.error = error
+        self.k = max(8, math.ceil(_ERROR_CONSTANT / error))
+        self.n = 0
+        self._levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, math.ceil(self.k * _LEVEL_DECAY**depth))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self._levels):
+                self._levels.append(np.empty(0))
+            items = np.sort(items)
+            # an odd item out stays behind so total weight is preserved
+            keep = items[:1] if len(items) % 2 else items[:0]
+            pairs = items[len(keep) :]
+            promoted = pairs[self._rng.randint(0, 1) :: 2]
+            self._levels[level] = keep
+            self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level = 0  # capacities shift when a level is added
+
+    def update(self, values) -> QuantileSketch:
+        """Add a batch of values (NaN and non-numeric values are ignored)."""
+        arr = _as_values(values)
+        if len(arr):
+            self.n += len(arr)
+            self._levels[0] = np.concatenate([self._levels[0], arr])
+            self._compress()
+        return self
+
+    def merge(self, other: QuantileSketch) -> QuantileSketch:
+        """Fold another sketch into this one (the tighter error bound wins)."""
+        if other.k > self.k:
+            self.k, self.error = other.k, other.error
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> float:
+        """Estimate the ``q`` quantile, interpolating like pandas' default."""
+        if self.n == 0:
+            return float("nan")
+        values = np.concatenate(self._levels)
+        weights = np.concatenate(
+            [np.full(len(items), 2**level) for level, items in enumerate(self._levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+        # each item covers a run of ranks; place it at the middle of that run
+        positions = np.cumsum(weights) - weights + (weights - 1) / 2
+        return float(np.interp(q * (weights.sum() - 1), positions, values))
+
+
+class ExactQuantiles:
+    """Same interface as ``QuantileSketch`` but keeps every value (exact results)."""
+
+    def __init__(self):
+        self.n = 0
+        self._parts: List[np.ndarray] = []
+
+    def update(self, values) -> ExactQuantiles:
+        arr = _as_values(values)
+        if len(arr):
+            self.n += len(arr)
+            self._parts.append(arr)
+        return self
+
+    def merge(self, other: ExactQuantiles) -> ExactQuantiles:
+        self._parts.extend(other._parts)
+        self.n += other.n
+        return self
+
+    def quantile(self, q: float) -> float:
+        if self.n == 0:
+            return float("nan")
+        if len(self._parts) > 1:
+            self._parts = [np.concatenate(self._parts)]
+        return float(np.quantile(self._parts[0], q))
@@ -0,0 +1,151 @@
+"""
+schemas.py
+----------
+Schema registry for the CSV files the project reads (raw and prepared).
+
+Each entry, keyed by file name, lists the columns in file order with their
+pandas dtype, plus the format of every date column. ``read_csv`` reads a file
+through its entry with the pyarrow CSV engine (C engine if pyarrow is missing),
+explicit dtypes instead of per-column type inference, only the columns asked
+for, and dates parsed with an explicit ``format=``.
+
+Text columns with few distinct values are read as ``category``; ``SaleAmount``
+stays ``object`` because the raw file has junk like "?" that the scrubber
+coerces later. ID columns are nullable ``Int64``: a blank key loads as <NA>
+and is dropped downstream (scrubber, ``etl_to_dw.validate_facts``) instead of
+failing the read.
+
+    from analytics_project.schemas import read_csv
+    sales = read_csv(settings.SALES_RAW, columns=["SaleDate", "SaleAmount"])
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+Schema = Dict[str, Any]  # {"dtype": {column: dtype}, "dates": {column: strftime format}}
+
+_CUSTOMERS_RAW: Schema = {
+    "dtype": {
+        "CustomerID": "Int64",
+        "Name": "string",
+        "Region": "category",
+        "JoinDate": "string",
+        "LoyaltyPointsPts": "float64",
+        "PreferredContact": "category",
+    },
+    "dates": {"JoinDate": "%m/%d/%Y"},
+}
+_PRODUCTS: Schema = {
+    "dtype": {
+        "ProductID": "Int64",
+        "ProductName": "string",
+        "Category": "category",
+        "UnitPrice": "float64",
+        "CurrentDiscountPct": "float64",
+        "Supplier": "category",
+    },
+    "dates": {},
+}
+_SALES_RAW: Schema = {
+    "dtype": {
+        "TransactionID": "Int64",
+        "SaleDate": "string",
+        "CustomerID": "Int64",
+        "ProductID": "Int64",
+        "StoreID": "Int64",
+        "CampaignID": "float64",
+        "SaleAmount": "object",
+        "DiscountPct": "float64",
+        "StateCode": "category",
+    },
+    "dates": {"SaleDate": "%m/%d/%Y"},
+}
+
+
+def _lowered(schema: Schema, renames: Optional[Dict[str, str]] = None) -> Schema:
+    """Schema of a prepared file: the raw columns lower-cased (and renamed)."""
+    renames = renames or {}
+
+    def name(col: str) -> str:
+        return renames.get(col.lower(), col.lower())
+
+    return {
+        "dtype": {name(c): t for c, t in schema["dtype"].items()},
+        "dates": {name(c): f for c, f in schema["dates"].items()},
+    }
+
+
+_CUSTOMERS_PREPARED = _lowered(
+    _CUSTOMERS_RAW,
+    {
+        "customerid": "customer_id",
+        "region": "country",
+        "joindate": "signup_date",
+        "loyaltypointspts": "loyalty_points",
+        "preferredcontact": "preferred_contact",
+    },
+)
+# prepare_customers writes signup_date back out as an ISO date
+_CUSTOMERS_PREPARED["dates"]["signup_date"] = "%Y-%m-%d"
+
+SCHEMAS: Dict[str, Schema] = {
+    "customers_data.csv": _CUSTOMERS_RAW,
+    "products_data.csv": _PRODUCTS,
+    "sales_data.csv": _SALES_RAW,
+    "customers_data_prepared.csv": _CUSTOMERS_PREPARED,
+    "products_data_prepared.csv": _lowered(_PRODUCTS, {"unitprice": "unit_price"}),
+    "sales_data_prepared.csv": _lowered(_SALES_RAW),
+}
+
+
+def schema_for(path: Path | str) -> Schema:
+    """Registry entry for a file (by name), or an empty schema if it has none."""
+    return SCHEMAS.get(Path(path).name, {"dtype": {}, "dates": {}})
+
+
+def date_format(path: Path | str, column: str) -> Optional[str]:
+    """Registered date format of ``column`` in ``path``, if any."""
+    return schema_for(path)["dates"].get(column)
+
+
+def _engine() -> str:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "c"
+    return "pyarrow"
+
+
+def read_csv(
+    path: Path | str,
+    columns: Optional[Sequence[str]] = None,
+    parse_dates: bool = True,
+    **kwargs: Any,
+) -> pd.DataFrame:
+    """Read a CSV through its registry entry.
+
+    ``columns`` limits the read to those columns (names the file doesn't have are
+    ignored when the file is registered). With ``parse_dates`` the registered date
+    columns come back as datetime64 (unparseable values become NaT); otherwise
+    they stay text. Extra ``kwargs`` go to ``pd.read_csv``.
+    """
+    schema = schema_for(path)
+    dtypes: Dict[str, str] = dict(schema["dtype"])
+    usecols: Optional[List[str]] = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = [c for c in dtypes if c in wanted] if dtypes else list(columns)
+        dtypes = {c: t for c, t in dtypes.items() if c in wanted}
+    engine = kwargs.pop("engine", _engine())
+    if engine == "pyarrow":
+        kwargs.pop("low_memory", None)  # C-engine only
+    df = pd.read_csv(path, engine=engine, dtype=dtypes or None, usecols=usecols, **kwargs)
+    if parse_dates:
+        for col, fmt in schema["dates"].items():
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], format=fmt, errors="coerce")
+    return df
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # run scripts from the repo root (C:\Repos\smart-store-larry)
@@ -16,5 +17,23 @@ CUSTOMERS_PREP = PREPARED_DIR / "customers_data_prepared.csv"
 PRODUCTS_PREP = PREPARED_DIR / "products_data_prepared.csv"
 SALES_PREP = PREPARED_DIR / "sales_data_prepared.csv"
 
+# prepared layer file format: "csv", "parquet" or "feather" (see prepared_io)
+PREPARED_FORMAT = os.environ.get("PREPARED_FORMAT", "csv")
+
+# warehouse
+DW_PATH = DATA_DIR / "dw" / "smart_sales.db"
+FACT_CACHE_PATH = DATA_DIR / "dw" / "sales_fact.arrow"  # olap.fact_cache
+# "month" to split sale into per-month tables on full loads (see etl_to_dw)
+SALE_PARTITIONING = os.environ.get("SALE_PARTITIONING", "").strip().lower()
+# OLAP queries the index advisor tunes the warehouse for (see index_advisor)
+OLAP_WORKLOAD = PROJECT_ROOT / "olap" / "workload.sql"
+
+# pipeline stage cache manifest (see stage_cache)
+STAGE_MANIFEST = PROJECT_ROOT / ".stage_cache" / "manifest.json"
+
+# step profiling (see profiling): "1" to record, "memory" to also trace allocations
+PROFILE = os.environ.get("PROFILE", "").strip().lower()
+PROFILE_LOG = LOG_DIR / "profile.jsonl"
+
 # outlier knob (raise to 3.0 if trimming too much)
 OUTLIER_IQR_K = 1.5
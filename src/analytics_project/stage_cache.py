@@ -0,0 +1,195 @@
+"""
+stage_cache.py
+--------------
+Content-hash cache that lets the pipeline skip stages whose inputs have not
+changed since their last successful run.
+
+A stage's fingerprint covers:
+- the content (sha256) of its input files,
+- the source of the code that shapes its output (the stage module plus the
+  shared scrubber / prepared-layer code, which holds the scrub plans),
+- the config knobs that change results (``settings.OUTLIER_IQR_K``,
+  ``settings.PREPARED_FORMAT``).
+
+A stage is skipped when its fingerprint matches the one recorded after its last
+run *and* its outputs are still the files that run wrote (same size/mtime).
+File hashes are memoised by (size, mtime), so a no-op refresh only stats files.
+
+The manifest (``settings.STAGE_MANIFEST``, JSON) keeps per-stage fingerprints,
+output stats, and which stages ran or were skipped in the latest pipeline run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import settings
+from .prepared_io import prepared_path
+
+# Bump to invalidate every cached stage (e.g. after changing fingerprint rules).
+CACHE_VERSION = 1
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+# stage name -> () -> (input files, output files, code files)
+StageFiles = Callable[[], Tuple[List[Path], List[Path], List[Path]]]
+
+_SHARED_PREP_CODE = [
+    PACKAGE_DIR / "data_scrubber.py",
+    PACKAGE_DIR / "prepared_io.py",
+    PACKAGE_DIR / "profiling.py",
+    PACKAGE_DIR / "schemas.py",
+]
+
+
+def _prep(raw: Path, prep: Path, module: str) -> StageFiles:
+    code = [PACKAGE_DIR / "data_preparation" / f"{module}.py", *_SHARED_PREP_CODE]
+    return lambda: ([raw], [prepared_path(prep)], code)
+
+
+def _prepared_inputs() -> List[Path]:
+    return [
+        prepared_path(p)
+        for p in (settings.CUSTOMERS_PREP, settings.PRODUCTS_PREP, settings.SALES_PREP)
+    ]
+
+
+STAGE_FILES: Dict[str, StageFiles] = {
+    "prepare_customers": _prep(
+        settings.CUSTOMERS_RAW, settings.CUSTOMERS_PREP, "prepare_customers_data"
+    ),
+    "prepare_products": _prep(
+        settings.PRODUCTS_RAW, settings.PRODUCTS_PREP, "prepare_products_data"
+    ),
+    "prepare_sales": _prep(settings.SALES_RAW, settings.SALES_PREP, "prepare_sales_data"),
+    "profile_raw": lambda: (
+        sorted(settings.RAW_DIR.glob("*.csv")),
+        [settings.DATA_DIR / "processed" / "_raw_file_shapes.csv"],
+        [PACKAGE_DIR / "data_prep.py", PACKAGE_DIR / "schemas.py"],
+    ),
+    "etl_to_dw": lambda: (
+        _prepared_inputs(),
+        [settings.DW_PATH],
+        [
+            PACKAGE_DIR / "etl_to_dw.py",
+            PACKAGE_DIR / "prepared_io.py",
+            PACKAGE_DIR / "profiling.py",
+            PACKAGE_DIR / "quality.py",
+            PACKAGE_DIR / "schemas.py",
+            PACKAGE_DIR / "warehouse.py",
+        ],
+    ),
+    "fact_cache": lambda: (
+        [settings.DW_PATH],
+        [settings.FACT_CACHE_PATH],
+        [
+            PACKAGE_DIR / "olap" / "fact_cache.py",
+            PACKAGE_DIR / "olap" / "cube.py",
+            PACKAGE_DIR / "warehouse.py",
+        ],
+    ),
+}
+
+
+def config_snapshot() -> Dict[str, Any]:
+    """Settings that change stage outputs without changing any input file."""
+    return {
+        "cache_version": CACHE_VERSION,
+        "outlier_iqr_k": settings.OUTLIER_IQR_K,
+        "prepared_format": settings.PREPARED_FORMAT,
+        "sale_partitioning": settings.SALE_PARTITIONING,
+    }
+
+
+def _stat(path: Path) -> Optional[List[int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class StageCache:
+    """Decide which stages can be skipped and record the ones that ran."""
+
+    def __init__(
+        self,
+        manifest_path: Optional[Path] = None,
+        stage_files: Optional[Dict[str, StageFiles]] = None,
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        self.manifest_path = Path(manifest_path or settings.STAGE_MANIFEST)
+        self.stage_files = STAGE_FILES if stage_files is None else stage_files
+        self.config = config_snapshot() if config is None else config
+        self.manifest: Dict[str, Any] = {"stages": {}, "files": {}, "last_run": {}}
+        if self.manifest_path.exists():
+            try:
+                self.manifest.update(json.loads(self.manifest_path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                pass  # unreadable manifest: start over, every stage runs once
+        self._run: Dict[str, List[str]] = {"ran": [], "skipped": []}
+
+    def file_hash(self, path: Path) -> Optional[str]:
+        """sha256 of ``path`` (None if missing), reusing the manifest entry if unchanged."""
+        stat = _stat(path)
+        if stat is None:
+            return None
+        key = str(path)
+        memo = self.manifest["files"].get(key)
+        if memo and memo["stat"] == stat:
+            return memo["sha256"]
+        with open(path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        self.manifest["files"][key] = {"stat": stat, "sha256": digest}
+        return digest
+
+    def _hash_all(self, paths: Iterable[Path]) -> Dict[str, Optional[str]]:
+        return {str(p): self.file_hash(Path(p)) for p in paths}
+
+    def fingerprint(self, name: str, target: str) -> Optional[str]:
+        """Fingerprint of a stage's inputs, code and config; None if it is not cacheable."""
+        if name not in self.stage_files:
+            return None
+        inputs, _, code = self.stage_files[name]()
+        payload = {
+            "target": target,
+            "config": self.config,
+            "inputs": self._hash_all(inputs),
+            "code": self._hash_all(code),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def is_fresh(self, name: str, fingerprint: Optional[str]) -> bool:
+        """True if the last run had this fingerprint and its outputs are untouched."""
+        entry = self.manifest["stages"].get(name)
+        if fingerprint is None or not entry or entry["fingerprint"] != fingerprint:
+            return False
+        return all(_stat(Path(p)) == stat for p, stat in entry["outputs"].items())
+
+    def record(self, name: str, fingerprint: Optional[str], seconds: float) -> None:
+        """Remember a successful run of ``name`` and the outputs it left behind."""
+        self._run["ran"].append(name)
+        if fingerprint is None:
+            return
+        _, outputs, _ = self.stage_files[name]()
+        self.manifest["stages"][name] = {
+            "fingerprint": fingerprint,
+            "outputs": {str(p): _stat(Path(p)) for p in outputs},
+            "seconds": round(seconds, 3),
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    def skip(self, name: str) -> None:
+        self._run["skipped"].append(name)
+
+    def save(self) -> None:
+        """Write the manifest, including which stages this run skipped."""
+        self.manifest["last_run"] = {"at": time.strftime("%Y-%m-%dT%H:%M:%S"), **self._run}
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=2, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.manifest_path)
@@ -1,8 +1,26 @@
+"""Named file-and-console loggers for the data preparation scripts."""
+
+import logging
 from pathlib import Path
-from .. import settings
+
+from analytics_project import settings
 
 # ensure logs dir exists
 Path(settings.LOG_DIR).mkdir(parents=True, exist_ok=True)
 
-# expose get_logger from your helper
-from ..utils_logger import init_logger as get_logger  # noqa: E402
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a stdlib logger that writes to the console and logs/<name>.log."""
+    log = logging.getLogger(name)
+    if not log.handlers:
+        fmt = logging.Formatter(
+            "%(asctime)s | %(levelname)s | %(name)s | %(message)s", "%Y-%m-%d %H:%M:%S"
+        )
+        for handler in (
+            logging.StreamHandler(),
+            logging.FileHandler(Path(settings.LOG_DIR) / f"{name}.log", encoding="utf-8"),
+        ):
+            handler.setFormatter(fmt)
+            log.addHandler(handler)
+        log.setLevel(logging.INFO)
+    return log
@@ -0,0 +1,339 @@
+"""
+warehouse.py
+------------
+Shared read access to smart_sales.db for reports, dashboards and OLAP code.
+
+``ReadPool`` keeps a few read-only connections open instead of connecting per
+query. Each connection is opened with a ``mode=ro`` URI, ``query_only`` and a
+memory-mapped file window (``mmap_size``). Python's per-connection statement
+cache keeps repeated SQL prepared, so a reused connection skips both the connect
+and the plan cost.
+
+Query results can also be served from an LRU cache keyed by SQL + params. Every
+cached result is tagged with the warehouse *generation*: the latest
+``etl_load.load_id`` (or the file mtimes for a warehouse without a load log)
+plus the file's identity (device, inode, change time). A new ETL load changes
+the generation and clears the cache, so readers never see results from before
+the load. So does replacing the file, even though a rebuilt file numbers its
+loads from 1 again. Checking it is one primary-key lookup on a pooled
+connection and a ``stat``. Pooled connections to a replaced file are dropped
+the next time one is borrowed.
+
+``sale_source`` gives readers a date-bounded fact source: on a warehouse
+partitioned by month (``etl_to_dw --partition-by-month``) it names only the
+partitions the range touches instead of the whole ``sale`` view.
+
+    from analytics_project.warehouse import get_pool
+    pool = get_pool()                       # one pool per warehouse file
+    rows = pool.query("SELECT COUNT(*) FROM sale")
+    by_region = pool.read_frame("SELECT * FROM v_sales_by_region_and_category")
+    with pool.connection() as conn:         # raw access, uncached
+        facts = pd.read_sql_query(FACT_SQL, conn)
+        source, params = sale_source(conn, "2025-01-01", "2025-03-31")
+        q1 = pd.read_sql_query(f"SELECT SUM(sale_amount) FROM {source}", conn, params=params)
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+import os
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import pandas as pd
+
+from . import settings
+
+POOL_SIZE = 4
+MMAP_BYTES = 256 * 2**20
+CACHE_ENTRIES = 128
+STATEMENT_CACHE = 256  # prepared statements kept per connection
+
+Params = Sequence[Any]
+DateLike = Union[int, str, date]
+
+
+def connect_readonly(db_path: Path | str, mmap_bytes: int = MMAP_BYTES) -> sqlite3.Connection:
+    """One read-only connection to ``db_path`` (usable from any thread)."""
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(
+            f"{db_path} not found; run python -m analytics_project.etl_to_dw first."
+        )
+    conn = sqlite3.connect(
+        f"file:{db_path.as_posix()}?mode=ro",
+        uri=True,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE,
+    )
+    conn.execute("PRAGMA query_only=ON")
+    conn.execute(f"PRAGMA mmap_size={int(mmap_bytes)}")
+    return conn
+
+
+def file_identity(db_path: Path | str) -> str:
+    """``dev:ino:ctime`` of the warehouse file.
+
+    load_id starts again at 1 in a rebuilt file, and a new file can get the
+    inode number of the one it replaced, so the change time is part of it too.
+    A checkpoint also moves the change time; that only costs a cache refill.
+    """
+    st = os.stat(db_path)
+    return f"{st.st_dev}:{st.st_ino}:{st.st_ctime_ns}"
+
+
+def load_generation(conn: sqlite3.Connection, db_path: Path | str) -> str:
+    """``load:<id>`` of the latest ETL load (``mtime:...`` without an etl_load table),
+    tagged with the file's identity so a replaced file is a new generation.
+    """
+    try:
+        row = conn.execute("SELECT MAX(load_id) FROM etl_load").fetchone()
+    except sqlite3.OperationalError:  # no etl_load table
+        row = None
+    db_path = Path(db_path)
+    if row and row[0] is not None:
+        return f"load:{row[0]}@{file_identity(db_path)}"
+    wal = db_path.with_name(db_path.name + "-wal")
+    stamps = [p.stat().st_mtime_ns for p in (db_path, wal) if p.exists()]
+    return "mtime:" + ":".join(map(str, stamps)) + f"@{file_identity(db_path)}"
+
+
+def to_date_key(value: DateLike) -> int:
+    """YYYYMMDD integer for a date key, an ISO date string or a date."""
+    if isinstance(value, int):
+        return value
+    return int(pd.Timestamp(value).strftime("%Y%m%d"))
+
+
+def sale_partitions(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+    """``(month_key, table)`` of the live sale partitions; [] when sale is one table."""
+    try:
+        return conn.execute(
+            "SELECT month_key, table_name FROM sale_partition "
+            "WHERE archived_to IS NULL ORDER BY month_key"
+        ).fetchall()
+    except sqlite3.OperationalError:  # no sale_partition table
+        return []
+
+
+def sale_source(
+    conn: sqlite3.Connection, start: Optional[DateLike] = None, end: Optional[DateLike] = None
+) -> Tuple[str, List[int]]:
+    """FROM-clause SQL and params for the sales dated ``start``..``end`` (inclusive).
+
+    Partitions outside the range are left out of the query altogether; months
+    wholly inside it are read without a filter, the edge months through their
+    date_key index. Undated sales are excluded once either bound is given.
+    """
+    if start is None and end is None:
+        return "sale", []
+    lo = to_date_key(start) if start is not None else 0
+    hi = to_date_key(end) if end is not None else 99_999_999
+    partitions = sale_partitions(conn)
+    if not partitions:
+        return "(SELECT * FROM sale WHERE date_key BETWEEN ? AND ?)", [lo, hi]
+    branches, params = [], []
+    for month, table in partitions:
+        first, last = month * 100 + 1, month * 100 + 31
+        if month == 0 or last < lo or first > hi:
+            continue
+        if lo <= first and last <= hi:
+            branches.append(f"SELECT * FROM {table}")
+        else:
+            branches.append(f"SELECT * FROM {table} WHERE date_key BETWEEN ? AND ?")
+            params += [lo, hi]
+    if not branches:
+        return "(SELECT * FROM sale WHERE 0)", []
+    return "(" + " UNION ALL ".join(branches) + ")", params
+
+
+def _key(kind: str, sql: str, params: Params) -> Hashable:
+    return (kind, sql, tuple(params))
+
+
+class ReadPool:
+    """Read-only connections to one warehouse file plus a generation-checked LRU cache."""
+
+    def __init__(
+        self,
+        db_path: Optional[Path | str] = None,
+        size: int = POOL_SIZE,
+        mmap_bytes: int = MMAP_BYTES,
+        cache_entries: int = CACHE_ENTRIES,
+    ):
+        self.db_path = Path(db_path or settings.DW_PATH)
+        self.size = size
+        self.mmap_bytes = mmap_bytes
+        self.cache_entries = cache_entries
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._opened = 0
+        self._file_ids: Dict[int, Tuple[int, int]] = {}  # id(conn) -> (st_dev, st_ino)
+        self._lock = threading.Lock()  # guards _opened and the cache
+        self._cache: OrderedDict[Hashable, Any] = OrderedDict()
+        self._generation: Optional[str] = None
+        self.hits = self.misses = 0
+
+    # --- connections ---
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; blocks while all ``size`` connections are in use."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def _file_id(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        return st.st_dev, st.st_ino
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        conn.close()
+        with self._lock:
+            self._file_ids.pop(id(conn), None)
+            self._opened -= 1
+
+    def _acquire(self) -> sqlite3.Connection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._file_ids.get(id(conn)) == self._file_id():
+                return conn
+            self._discard(conn)  # the warehouse file was replaced
+        with self._lock:
+            grow = self._opened < self.size
+            if grow:
+                self._opened += 1
+        if not grow:
+            return self._idle.get()
+        try:
+            conn = connect_readonly(self.db_path, self.mmap_bytes)
+        except BaseException:
+            with self._lock:
+                self._opened -= 1
+            raise
+        with self._lock:
+            self._file_ids[id(conn)] = self._file_id()
+        return conn
+
+    def close(self) -> None:
+        """Close the idle connections and drop the cache."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            self._cache.clear()
+            self._generation = None
+
+    # --- cached reads ---
+    def generation(self) -> str:
+        """Current warehouse generation (see ``load_generation``)."""
+        with self.connection() as conn:
+            return load_generation(conn, self.db_path)
+
+    def _lookup(self, key: Hashable, generation: str) -> Tuple[bool, Any]:
+        with self._lock:
+            if generation != self._generation:
+                self._cache.clear()
+                self._generation = generation
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return True, self._cache[key]
+            self.misses += 1
+        return False, None
+
+    def _store(self, key: Hashable, value: Any, generation: str) -> None:
+        with self._lock:
+            # another reader may already have seen a newer load; don't mix generations
+            if self.cache_entries <= 0 or generation != self._generation:
+                return
+            self._cache[key] = value
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+    def _read(self, key: Hashable, cache: bool, run: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self.connection() as conn:
+            if not cache:
+                return run(conn)
+            generation = load_generation(conn, self.db_path)
+            hit, value = self._lookup(key, generation)
+            if hit:
+                return value
+            value = run(conn)
+        self._store(key, value, generation)
+        return value
+
+    def query(self, sql: str, params: Params = (), cache: bool = True) -> List[Tuple]:
+        """Rows of ``sql`` as tuples, from the cache when the warehouse hasn't changed."""
+        rows = self._read(
+            _key("rows", sql, params),
+            cache,
+            lambda conn: tuple(conn.execute(sql, tuple(params)).fetchall()),
+        )
+        return list(rows)
+
+    def read_frame(self, sql: str, params: Params = (), cache: bool = True) -> pd.DataFrame:
+        """``pd.read_sql_query`` through the pool; callers get their own copy of a cached frame."""
+        frame = self._read(
+            _key("frame", sql, params),
+            cache,
+            lambda conn: pd.read_sql_query(sql, conn, params=tuple(params)),
+        )
+        return frame.copy() if cache else frame
+
+    def cache_info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._cache),
+                "generation": self._generation,
+                "connections": self._opened,
+            }
+
+
+_pools: Dict[Path, ReadPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Optional[Path | str] = None) -> ReadPool:
+    """The process-wide pool for ``db_path`` (default ``settings.DW_PATH``)."""
+    path = Path(db_path or settings.DW_PATH).resolve()
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = ReadPool(path)
+        return _pools[path]
+
+
+def close_pools() -> None:
+    """Close every shared pool (e.g. before replacing the warehouse file)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
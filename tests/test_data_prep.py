@@ -0,0 +1,72 @@
+"""Test raw CSV ingestion helpers.
+
+Module Information:
+    - Filename: test_data_prep.py
+    - Module: test_data_prep
+    - Location: tests/
+
+These tests verify that:
+    - Concurrent reads return the same frames, in the same order, as serial reads
+    - A file that fails to load is skipped without stopping the others
+    - The lazy scan reports the same shape as loading the file
+"""
+
+import pandas as pd
+import pytest
+
+from analytics_project import data_prep
+from analytics_project.data_prep import count_data_rows, read_all_csvs, scan_csv
+
+
+@pytest.fixture
+def shard_dir(tmp_path):
+    for day in range(6):
+        pd.DataFrame({"day": [day] * 3, "amount": [1.5, 2.5, 3.5]}).to_csv(
+            tmp_path / f"sales_2025-05-0{day + 1}.csv", index=False
+        )
+    (tmp_path / "sales_broken.csv").mkdir()  # matches the glob but cannot be read
+    return tmp_path
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_concurrent_read_matches_serial(shard_dir, processes):
+    """Verify a worker pool reads the same files as the serial loop."""
+    serial = read_all_csvs(shard_dir)
+    pooled = read_all_csvs(shard_dir, workers=3, processes=processes)
+
+    assert list(pooled) == list(serial)
+    assert len(pooled) == 6
+    for name in serial:
+        pd.testing.assert_frame_equal(pooled[name], serial[name])
+    assert "sales_broken.csv" not in pooled
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "a,b\n1,x\n2,y\n",
+        "a,b\n1,x\n\n2,y",  # blank line, no trailing newline
+        "a,b\r\n1,x\r\n\r\n2,y\r\n3,z\r\n",
+        "a,b\n",
+        "h\nb\n\n\nc\n",  # consecutive blank lines
+        "h\r\n\r\n\r\n\r\nb\r\n\n\nc",
+    ],
+)
+def test_scan_matches_full_load(tmp_path, monkeypatch, body):
+    """Verify the newline count and header scan agree with pd.read_csv."""
+    monkeypatch.setattr(data_prep, "SCAN_BLOCK_BYTES", 3)  # force blank lines across blocks
+    path = tmp_path / "t.csv"
+    path.write_bytes(body.encode())
+
+    rows, columns, preview = scan_csv(path, preview_rows=1)
+
+    full = pd.read_csv(path)
+    assert (rows, columns) == (len(full), list(full.columns))
+    assert len(preview) == min(1, len(full))
+
+
+def test_count_data_rows_empty_file(tmp_path):
+    """Verify an empty file has no rows."""
+    path = tmp_path / "empty.csv"
+    path.touch()
+    assert count_data_rows(path) == 0
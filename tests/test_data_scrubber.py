@@ -0,0 +1,227 @@
+"""Test the reusable DataScrubber.
+
+Module Information:
+    - Filename: test_data_scrubber.py
+    - Module: test_data_scrubber
+    - Location: tests/
+
+These tests verify that:
+    - Streaming (chunked) scrubbing matches the in-memory result
+    - Steps that need the whole frame are rejected in streaming mode
+    - Streaming outlier removal matches the in-memory result in exact mode
+    - Streaming median fills use the quantile sketch; mode fills refuse unbounded counts
+    - A fused plan gives the same frame as chaining the methods
+    - inplace=True mutates the given frame and inplace=False leaves it alone
+    - Low-cardinality text columns become category dtype and are cleaned per category
+    - Per-distinct-value string cleanup matches cleaning every row
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics_project import data_scrubber
+from analytics_project.data_scrubber import DataScrubber
+
+
+def _raw_sales() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Sale Amount": ["10.5", " 20 ", None, "x", "40", "12"],
+            "Sale Date": ["5/4/2025", "5/5/2025", "5/6/2025", None, "5/8/2025", "5/9/2025"],
+            "State Code": [" tx", "IL ", None, "tx", "ks", "  il"],
+            "Discount": [1.0, None, 3.0, 3.0, None, 5.0],
+        }
+    )
+
+
+STEPS = [
+    {"step": "standardize_columns"},
+    {"step": "trim_whitespace"},
+    {"step": "to_numeric", "columns": ["sale_amount"]},
+    {"step": "to_datetime", "columns": ["sale_date"]},
+    {"step": "normalize_categories", "columns": ["state_code"], "case": "upper"},
+    {
+        "step": "fill_missing",
+        "strategies": {
+            "sale_amount": {"method": "median"},
+            "state_code": {"method": "mode"},
+            "discount": {"method": "mean"},
+        },
+    },
+]
+
+
+def test_scrub_csv_in_chunks_matches_in_memory(tmp_path):
+    """Verify chunked output equals scrubbing the whole frame at once."""
+    src = tmp_path / "raw.csv"
+    dest = tmp_path / "out" / "prepared.csv"
+    _raw_sales().to_csv(src, index=False)
+    scrub = DataScrubber()
+
+    rows = scrub.scrub_csv_in_chunks(src, dest, STEPS, chunksize=2)
+
+    expected = scrub.apply_steps(pd.read_csv(src), STEPS)
+    expected.to_csv(tmp_path / "expected.csv", index=False)
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(pd.read_csv(dest), pd.read_csv(tmp_path / "expected.csv"))
+
+
+def test_streaming_outlier_removal_exact_and_sketched(tmp_path):
+    """Verify two-pass outlier removal over chunks, exact and approximate."""
+    src = tmp_path / "amounts.csv"
+    amounts = list(range(1, 200)) + [5_000, -4_000]
+    pd.DataFrame({"amount": amounts, "id": range(len(amounts))}).to_csv(src, index=False)
+    steps = [{"step": "remove_outliers_iqr", "columns": ["amount"], "factor": 1.5}]
+    scrub = DataScrubber()
+    expected = scrub.remove_outliers_iqr(pd.read_csv(src), ["amount"])
+
+    scrub.scrub_csv_in_chunks(src, tmp_path / "exact.csv", steps, chunksize=17, quantile_error=None)
+    scrub.scrub_csv_in_chunks(src, tmp_path / "sketch.csv", steps, chunksize=17)
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "exact.csv"), expected)
+    assert pd.read_csv(tmp_path / "sketch.csv")["amount"].between(1, 199).all()
+
+
+def test_streaming_median_fill_is_sketched_and_mode_fill_is_bounded(tmp_path, monkeypatch):
+    """Verify median fills are exact or sketched, and huge mode counts are refused."""
+    src = tmp_path / "amounts.csv"
+    amounts = pd.Series(np.random.default_rng(7).random(5_000) * 100)
+    amounts[::50] = np.nan
+    pd.DataFrame({"amount": amounts, "state": [f"s{i % 8}" for i in range(5_000)]}).to_csv(
+        src, index=False
+    )
+    fill = {"step": "fill_missing", "strategies": {"amount": {"method": "median"}}}
+    scrub = DataScrubber()
+
+    scrub.scrub_csv_in_chunks(
+        src, tmp_path / "exact.csv", [fill], chunksize=400, quantile_error=None
+    )
+    scrub.scrub_csv_in_chunks(src, tmp_path / "sketch.csv", [fill], chunksize=400)
+
+    exact = pd.read_csv(tmp_path / "exact.csv")["amount"][::50]
+    sketched = pd.read_csv(tmp_path / "sketch.csv")["amount"][::50]
+    assert (exact == amounts.median()).all()
+    rank = (amounts < sketched.iloc[0]).sum() / amounts.count()
+    assert abs(rank - 0.5) <= 0.02 and sketched.nunique() == 1
+
+    monkeypatch.setattr(data_scrubber, "MODE_MAX_DISTINCT", 8)
+    mode = {"step": "fill_missing", "strategies": {"state": {"method": "mode"}}}
+    scrub.scrub_csv_in_chunks(src, tmp_path / "mode.csv", [mode], chunksize=400)
+    mode["strategies"]["amount"] = {"method": "mode"}
+    with pytest.raises(ValueError, match="distinct values"):
+        scrub.scrub_csv_in_chunks(src, tmp_path / "mode.csv", [mode], chunksize=400)
+
+
+def test_scrub_chunks_rejects_whole_frame_steps():
+    """Verify steps that need every row at once cannot be streamed."""
+    scrub = DataScrubber()
+    with pytest.raises(ValueError, match="streaming"):
+        list(scrub.scrub_chunks([_raw_sales()], [{"step": "drop_duplicates"}]))
+
+
+def test_run_plan_matches_chained_calls():
+    """Verify the fused plan gives the same frame as calling each method in turn."""
+    plan = STEPS + [
+        {"step": "drop_empty_rows"},
+        {"step": "drop_duplicates"},
+        {"step": "remove_outliers_iqr", "columns": ["sale_amount"], "factor": 1.5},
+    ]
+    scrub = DataScrubber()
+    raw = _raw_sales()
+
+    fused = scrub.run_plan(raw, plan)
+
+    pd.testing.assert_frame_equal(fused, scrub.apply_steps(raw, plan))
+    assert list(raw.columns) == ["Sale Amount", "Sale Date", "State Code", "Discount"]
+
+
+def test_run_plan_skips_missing_columns_when_not_strict():
+    """Verify strict=False ignores steps for columns the frame does not have."""
+    plan = [{"step": "to_numeric", "columns": ["Discount", "no_such_column"]}]
+    scrub = DataScrubber()
+
+    with pytest.raises(KeyError):
+        scrub.run_plan(_raw_sales(), plan)
+    out = scrub.run_plan(_raw_sales(), plan, strict=False)
+    assert "no_such_column" not in out.columns
+
+
+def test_inplace_mutates_and_returns_same_frame():
+    """Verify inplace=True writes into the frame and default calls do not."""
+    scrub = DataScrubber()
+    raw = _raw_sales()
+
+    copied = scrub.normalize_categories(raw, ["State Code"], case="upper")
+    assert raw.loc[0, "State Code"] == " tx"
+    assert copied.loc[0, "State Code"] == "TX"
+
+    same = scrub.remove_outliers_iqr(raw, ["Discount"], inplace=True)
+    assert same is raw
+    same = scrub.normalize_categories(raw, ["State Code"], case="upper", inplace=True)
+    assert same is raw
+    assert raw.loc[0, "State Code"] == "TX"
+
+
+def test_validate_schema_checks_casts_without_changing_frame():
+    """Verify validate_schema raises on bad casts and leaves dtypes untouched."""
+    scrub = DataScrubber()
+    df = pd.DataFrame({"amount": ["1.5", "2"], "day": ["2025-01-01", "not a date"]})
+
+    scrub.validate_schema(df, {"amount": "float64"})
+    assert df["amount"].dtype == object
+    with pytest.raises(ValueError):
+        scrub.validate_schema(df, {"day": "datetime64[ns]"})
+
+
+def test_low_cardinality_text_becomes_category():
+    """Verify repeated text is dictionary-encoded and cleaned once per category."""
+    df = pd.DataFrame(
+        {
+            "state": [" tx", "TX", "tx ", None, "il", "IL", "  ks", "tx"] * 4,
+            "name": [f"name {i}" for i in range(32)],
+        }
+    )
+    scrub = DataScrubber()
+
+    out = scrub.normalize_categories(scrub.trim_whitespace(df), ["state"], case="upper")
+    filled = scrub.fill_missing(out, {"state": {"method": "constant", "value": "ZZ"}})
+
+    assert isinstance(out["state"].dtype, pd.CategoricalDtype)
+    assert list(out["state"].cat.categories) == ["IL", "KS", "TX"]
+    assert out["state"].tolist()[:3] == ["TX", "TX", "TX"]
+    assert out["name"].dtype == "string"
+    assert filled["state"].iloc[3] == "ZZ"
+    assert DataScrubber(categorize=False).trim_whitespace(df)["state"].dtype == "string"
+
+
+def test_categorized_chunks_stream_like_in_memory(tmp_path):
+    """Verify mode fills agree when each chunk picks its own categories."""
+    src = tmp_path / "raw.csv"
+    pd.DataFrame({"state": ["tx", "tx", "il", None, "tx", None, "ks", "ks"]}).to_csv(
+        src, index=False
+    )
+    steps = [
+        {"step": "trim_whitespace"},
+        {"step": "fill_missing", "strategies": {"state": {"method": "mode"}}},
+    ]
+    scrub = DataScrubber()
+
+    scrub.scrub_csv_in_chunks(src, tmp_path / "out.csv", steps, chunksize=4)
+
+    expected = scrub.apply_steps(pd.read_csv(src), steps)
+    assert pd.read_csv(tmp_path / "out.csv")["state"].tolist() == expected["state"].tolist()
+
+
+def test_unique_value_cleanup_matches_row_by_row():
+    """Verify factorized trim/case gives the same strings as the row-wise regex."""
+    values = [" a  b", "A B ", None, 7, "  c", float("nan"), "clean"] * 50
+    df = pd.DataFrame({"mixed": pd.Series(values, dtype=object), "ok": ["x", "y"] * 175})
+    df["ok"] = df["ok"].astype("string")
+    scrub = DataScrubber(categorize=False)
+
+    out = scrub.normalize_categories(df, ["mixed", "ok"], case="lower")
+
+    expected = df["mixed"].astype("string").str.replace(r"\s+", " ", regex=True).str.strip()
+    pd.testing.assert_series_equal(out["mixed"], expected.str.lower())
+    pd.testing.assert_series_equal(out["ok"], df["ok"])
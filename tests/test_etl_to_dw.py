@@ -0,0 +1,304 @@
+"""Test the warehouse loader.
+
+Module Information:
+    - Filename: test_etl_to_dw.py
+    - Module: test_etl_to_dw
+    - Location: tests/
+
+These tests verify that:
+    - A full load inserts valid sales and rejects bad ones
+    - An incremental load appends only new sales and upserts changed dimensions
+    - FK key indexes (bitmap and sorted) agree with a plain set lookup
+    - Object-dtype keys are converted on the kept sales, not on the caller's frame
+    - The sales_cube aggregate stays equal to a full rebuild after a delta load
+    - A month-partitioned load matches the flat one; a delta appends to its months
+      and a snapshot load rewrites only the months that changed
+    - Archived partitions leave the sale view and the cube but keep their rows on disk
+    - Warehouses built before date_key get it added and backfilled
+    - date_dim covers whole calendar years without gaps, with ISO weeks and weekdays
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics_project import etl_to_dw
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    etl_to_dw.create_schema(conn)
+    yield conn
+    conn.close()
+
+
+def _frames(n_sales=4):
+    customers = pd.DataFrame(
+        {"customer_id": [1, 2], "name": ["Ann", "Bo"], "country": ["east", "west"]}
+    )
+    products = pd.DataFrame(
+        {"product_id": [10, 11], "product_name": ["Pen", "Cup"], "category": ["office", "home"]}
+    )
+    sales = pd.DataFrame(
+        {
+            "transaction_id": range(1, n_sales + 1),
+            "sale_date": ["2025-01-0%d" % (i % 9 + 1) for i in range(n_sales)],
+            "customer_id": [1, 2] * (n_sales // 2),
+            "product_id": [10, 11] * (n_sales // 2),
+            "sale_amount": [5.0 + i for i in range(n_sales)],
+        }
+    )
+    return customers, products, sales
+
+
+def _count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_full_load_rejects_orphans_and_bad_amounts(conn):
+    """Verify orphan keys and negative amounts never reach the fact table."""
+    customers, products, sales = _frames()
+    sales.loc[0, "customer_id"] = 99
+    sales.loc[1, "sale_amount"] = -1.0
+
+    inserted = etl_to_dw.insert_all(conn, customers, products, sales)
+
+    assert inserted == 2
+    assert _count(conn, "sale") == 2
+    assert _count(conn, "rejects_sale_fk") == 1
+    assert _count(conn, "rejects_sale_amount") == 1
+
+
+def test_incremental_load_appends_new_sales_and_upserts_dims(conn):
+    """Verify a delta load only adds rows past the high-water mark."""
+    customers, products, sales = _frames(4)
+    etl_to_dw.insert_all(conn, customers, products, sales.head(2))
+
+    customers.loc[0, "name"] = "Ann Lee"
+    inserted = etl_to_dw.insert_incremental(conn, customers, products, sales)
+
+    assert inserted == 2
+    assert _count(conn, "sale") == 4
+    assert etl_to_dw.sale_high_water_mark(conn) == 4
+    assert (
+        conn.execute("SELECT name FROM customer WHERE customer_id = 1").fetchone()[0] == "Ann Lee"
+    )
+    assert etl_to_dw.insert_incremental(conn, customers, products, sales) == 0
+
+
+@pytest.mark.parametrize("keys", [range(1000, 1200), [5, 90_000, 7, 3_000_000]])
+def test_key_index_matches_set_lookup(keys):
+    """Verify bitmap and sorted-array indexes give the same answer as a set."""
+    index = etl_to_dw.KeyIndex(keys)
+    values = pd.Series([1000, 1199, 1200, 999, 5, 7.0, 7.5, None, "90000", 3_000_000, -1])
+
+    expected = [
+        v in set(keys) for v in (1000, 1199, 1200, 999, 5, 7, None, None, 90000, 3_000_000, -1)
+    ]
+    assert index.contains(values).tolist() == expected
+    assert (index.bitmap is not None) == isinstance(keys, range)
+
+
+def test_validate_facts_checks_new_dimensions_once_they_exist(conn):
+    """Verify store_id is checked as soon as a store table is present."""
+    customers, products, sales = _frames()
+    etl_to_dw.bulk_insert(conn, "customer", customers, etl_to_dw.CUSTOMER_COLS)
+    etl_to_dw.bulk_insert(conn, "product", products, etl_to_dw.PRODUCT_COLS)
+    sales["store_id"] = [400, 401, 402, 400]
+
+    assert len(etl_to_dw.validate_facts(conn, sales, customers, products)) == 4
+
+    conn.execute("CREATE TABLE store (store_id INTEGER PRIMARY KEY)")
+    conn.executemany("INSERT INTO store VALUES (?)", [(400,), (401,)])
+    kept = etl_to_dw.validate_facts(conn, sales, customers, products)
+    assert np.array_equal(kept["store_id"].to_numpy(), [400, 401, 400])
+
+
+@pytest.mark.filterwarnings("error::pandas.errors.SettingWithCopyWarning")
+def test_validate_facts_converts_object_keys_without_touching_the_input(conn):
+    """Verify object-dtype keys come back numeric and the caller's frame is left as it was."""
+    customers, products, sales = _frames()
+    etl_to_dw.bulk_insert(conn, "customer", customers, etl_to_dw.CUSTOMER_COLS)
+    etl_to_dw.bulk_insert(conn, "product", products, etl_to_dw.PRODUCT_COLS)
+    sales = sales.astype({"customer_id": object})
+    sales.loc[3, "sale_amount"] = -1.0
+
+    kept = etl_to_dw.validate_facts(conn, sales, customers, products)
+
+    assert kept["customer_id"].tolist() == [1, 2, 1]
+    assert kept["customer_id"].dtype == "int64"
+    assert sales["customer_id"].dtype == object
+
+
+def _cube(conn):
+    rows = conn.execute(
+        "SELECT category, region, year, month, ROUND(total_sales, 6), sale_count FROM sales_cube"
+    ).fetchall()
+    return sorted(rows, key=str)
+
+
+def test_incremental_load_refreshes_only_touched_cube_months(conn):
+    """Verify the partial cube refresh matches rebuilding it from scratch."""
+    customers, products, sales = _frames(8)
+    sales["sale_date"] = ["2025-01-05", "2025-01-06", "2025-02-01", "2025-02-02"] * 2
+    etl_to_dw.insert_all(conn, customers, products, sales.head(4))
+    assert sum(r[-1] for r in _cube(conn)) == 4
+
+    etl_to_dw.insert_incremental(conn, customers, products, sales)
+    partial = _cube(conn)
+    etl_to_dw.refresh_sales_cube(conn)
+
+    assert partial == _cube(conn)
+    assert sum(r[-1] for r in partial) == 8
+
+
+def _monthly_frames():
+    customers, products, sales = _frames(8)
+    sales["sale_date"] = ["2025-01-05", "2025-02-06", "2025-03-01", None] * 2
+    return customers, products, sales
+
+
+def _partitioned(conn):
+    etl_to_dw.create_schema(conn, partition_by_month=True)
+    return conn
+
+
+def _sales(conn):
+    rows = conn.execute(
+        "SELECT transaction_id, sale_date, date_key, sale_amount FROM sale ORDER BY transaction_id"
+    )
+    return rows.fetchall()
+
+
+def test_partitioned_load_matches_the_flat_load(conn, tmp_path):
+    """Verify month partitions hold the same sales and cube as the single table."""
+    customers, products, sales = _monthly_frames()
+    etl_to_dw.insert_all(conn, customers, products, sales)
+    part = _partitioned(sqlite3.connect(tmp_path / "dw.db"))
+    etl_to_dw.insert_all(part, customers, products, sales)
+
+    assert etl_to_dw.sale_tables(part) == [
+        "sale_000000",
+        "sale_202501",
+        "sale_202502",
+        "sale_202503",
+    ]
+    assert _sales(part) == _sales(conn)
+    assert _sales(part)[0][2] == 20250105
+    assert _cube(part) == _cube(conn)
+    plan = " ".join(
+        r[-1]
+        for r in part.execute(
+            "EXPLAIN QUERY PLAN SELECT SUM(sale_amount) FROM sale "
+            "WHERE date_key BETWEEN 20250201 AND 20250228"
+        )
+    )
+    assert "ix_sale_202502_date_key" in plan
+    part.close()
+
+
+def test_partitioned_delta_load_appends_to_its_months(conn, tmp_path):
+    """Verify a delta past the high-water mark keeps loaded sales, as on a flat table."""
+    customers, products, sales = _monthly_frames()
+    part = _partitioned(sqlite3.connect(tmp_path / "dw.db"))
+    for db in (conn, part):
+        etl_to_dw.insert_all(db, customers, products, sales.head(5))
+
+    delta = sales.iloc[3:]  # overlaps the rows already loaded, like a nightly extract
+    assert etl_to_dw.insert_incremental(part, customers, products, delta) == 3
+    etl_to_dw.insert_incremental(conn, customers, products, delta)
+
+    assert _sales(part) == _sales(conn)
+    assert _count(part, "sale") == 8
+    sale_ids = part.execute("SELECT sale_id FROM sale_202502 ORDER BY sale_id").fetchall()
+    assert sale_ids == [(202502000000001,), (202502000000002,)]  # one loaded, one appended
+    assert part.execute("SELECT SUM(row_count) FROM sale_partition").fetchone()[0] == 8
+    partial = _cube(part)
+    etl_to_dw.refresh_sales_cube(part)
+    assert partial == _cube(part) == _cube(conn)
+    # appended months carry the fingerprint of all their rows: a snapshot sees no change
+    assert etl_to_dw.insert_incremental(part, customers, products, sales, snapshot=True) == 0
+    part.close()
+
+
+def test_partitioned_snapshot_rewrites_only_changed_months(conn):
+    """Verify a snapshot load rewrites the months whose rows changed and nothing else."""
+    customers, products, sales = _monthly_frames()
+    _partitioned(conn)
+    etl_to_dw.insert_all(conn, customers, products, sales)
+    untouched = conn.execute(
+        "SELECT loaded_at, fingerprint FROM sale_partition WHERE month_key = 202501"
+    )
+
+    assert etl_to_dw.insert_incremental(conn, customers, products, sales, snapshot=True) == 0
+
+    sales.loc[2, "sale_amount"] = 100.0  # March
+    sales.loc[8] = [9, "2025-04-02", 1, 10, 1.0]
+    assert etl_to_dw.insert_incremental(conn, customers, products, sales, snapshot=True) == 3
+    assert (
+        conn.execute(
+            "SELECT loaded_at, fingerprint FROM sale_partition WHERE month_key = 202501"
+        ).fetchall()
+        == untouched.fetchall()
+    )
+    assert _count(conn, "sale") == 9
+    partial = _cube(conn)
+    etl_to_dw.refresh_sales_cube(conn)
+    assert partial == _cube(conn)
+
+
+def test_archived_partitions_leave_the_view(conn, tmp_path):
+    """Verify archiving moves old months to files, out of sale and sales_cube."""
+    customers, products, sales = _monthly_frames()
+    _partitioned(conn)
+    etl_to_dw.insert_all(conn, customers, products, sales)
+
+    paths = etl_to_dw.archive_partitions(conn, 202503, tmp_path)
+
+    assert [p.name for p in paths] == ["sale_202501.db", "sale_202502.db"]
+    assert etl_to_dw.sale_tables(conn) == ["sale_000000", "sale_202503"]
+    assert _count(conn, "sale") == 4
+    assert {r[3] for r in _cube(conn)} == {3}
+    archived = sqlite3.connect(paths[0])
+    assert archived.execute("SELECT COUNT(*), MIN(date_key) FROM sale").fetchone() == (2, 20250105)
+    archived.close()
+    assert etl_to_dw.insert_incremental(conn, customers, products, sales) == 0
+
+
+def test_date_key_is_backfilled_in_older_warehouses(conn):
+    """Verify opening a warehouse without sale.date_key adds and fills it and date_dim."""
+    old_sale = (
+        etl_to_dw.SALE_TABLE_SQL.format(table="sale")
+        .replace("date_key INTEGER,", "")
+        .replace(",\n    FOREIGN KEY (date_key)    REFERENCES date_dim (date_key)", "")
+    )
+    conn.execute("DROP TABLE sale")
+    conn.execute(old_sale)
+    conn.execute("INSERT INTO sale (transaction_id, sale_date) VALUES (1, '2024-12-31'), (2, NULL)")
+
+    etl_to_dw.create_schema(conn, drop=False)
+
+    assert conn.execute("SELECT date_key FROM sale ORDER BY sale_id").fetchall() == [
+        (20241231,),
+        (None,),
+    ]
+    assert conn.execute("SELECT MIN(date_key), MAX(date_key) FROM date_dim").fetchone() == (
+        20240101,
+        20241231,
+    )
+
+
+def test_date_dim_covers_whole_years_without_gaps(conn):
+    """Verify date_dim grows by whole years, never leaves a gap and has the right attributes."""
+    assert etl_to_dw.ensure_date_dim(conn, pd.Series([20240615, None], dtype="Int64")) == 366
+    assert etl_to_dw.ensure_date_dim(conn, [20240101, 20241231]) == 0
+    assert etl_to_dw.ensure_date_dim(conn, [20260301]) == 365 * 2
+
+    assert _count(conn, "date_dim") == 366 + 365 * 2
+    assert conn.execute(
+        "SELECT full_date, year, quarter, month, week, dow, is_weekend FROM date_dim "
+        "WHERE date_key IN (20241230, 20250503) ORDER BY date_key"
+    ).fetchall() == [("2024-12-30", 2024, 4, 12, 1, 1, 0), ("2025-05-03", 2025, 2, 5, 18, 6, 1)]
@@ -0,0 +1,150 @@
+"""Test the workload-driven covering index advisor.
+
+Module Information:
+    - Filename: test_index_advisor.py
+    - Module: test_index_advisor
+    - Location: tests/
+
+These tests verify that:
+    - Workload files split into named statements, and the shipped workload runs
+    - Proposals lead with equality filters, then one range, then cover the query
+    - A trial run rolls its indexes back; apply keeps them and the plans use them
+    - An index that speeds up one query but slows down another beyond min_gain is dropped
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from analytics_project import etl_to_dw as etl
+from analytics_project import index_advisor, settings
+from analytics_project.index_advisor import Query, evaluate, propose, query_plan, read_workload
+
+STATE_DAILY = Query(
+    "state_daily",
+    "SELECT s.sale_date, SUM(s.sale_amount) FROM sale s "
+    "WHERE s.state_code = 'TX' AND s.sale_date >= '2025-01-01' GROUP BY s.sale_date",
+)
+PRODUCT_RANGE = Query(
+    "product_range",
+    "SELECT SUM(sale_amount) FROM sale "
+    "WHERE product_id = 11 AND sale_date BETWEEN '2025-01-01' AND '2025-03-31'",
+)
+BY_REGION = Query("by_region", "SELECT * FROM v_sales_by_region_and_category")
+PRODUCT_TOTAL = Query("product_total", "SELECT SUM(sale_amount) FROM sale WHERE product_id = 10")
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    etl.create_schema(conn)
+    n = 400
+    customers = pd.DataFrame({"customer_id": [1, 2, 3], "country": ["east", "west", "east"]})
+    products = pd.DataFrame({"product_id": [10, 11], "category": ["office", "home"]})
+    sales = pd.DataFrame(
+        {
+            "transaction_id": range(1, n + 1),
+            "sale_date": pd.date_range("2024-11-01", periods=n, freq="D").strftime("%Y-%m-%d"),
+            "customer_id": [1, 2, 3, 1] * (n // 4),
+            "product_id": [10, 11] * (n // 2),
+            "sale_amount": [float(i % 50) for i in range(n)],
+            "state_code": ["TX", "KS", "CA", "TX"] * (n // 4),
+        }
+    )
+    etl.insert_all(conn, customers, products, sales)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _indexes(conn):
+    return sorted(r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'"))
+
+
+def _time_by_plan(monkeypatch, costs):
+    """Fake timings: ``costs[query]`` is (seconds without, with a proposed index in its plan)."""
+    by_sql = {q.sql: cost for q, cost in costs.items()}
+
+    def fake_time(conn, sql, repeat):
+        without, with_index = by_sql[sql]
+        return with_index if "_cov_" in " ".join(query_plan(conn, sql)) else without
+
+    monkeypatch.setattr(index_advisor, "_time", fake_time)
+
+
+def test_workload_files_split_into_named_statements(tmp_path, conn):
+    """Verify names, multi-line statements, comments and the shipped workload."""
+    path = tmp_path / "workload.sql"
+    path.write_text(
+        "-- tuning queries\n-- name: totals\nSELECT SUM(sale_amount)\nFROM sale;\n\n"
+        "SELECT COUNT(*) FROM customer;\n-- name: tail\nSELECT 1",
+        encoding="utf-8",
+    )
+
+    queries = read_workload(path)
+
+    assert [q.name for q in queries] == ["totals", "q2", "tail"]
+    assert queries[0].sql == "SELECT SUM(sale_amount)\nFROM sale"
+    shipped = read_workload(settings.OLAP_WORKLOAD)
+    assert len(shipped) >= 5
+    assert all(query_plan(conn, q.sql) for q in shipped)
+
+
+def test_proposals_lead_with_filters_and_cover_the_query(conn):
+    """Verify column order (equality, range, covered columns) and view expansion."""
+    proposals = propose(conn, [STATE_DAILY, PRODUCT_RANGE, BY_REGION], min_rows=0)
+    columns = {p.columns for p in proposals}
+
+    assert ("state_code", "sale_date", "sale_amount") in columns
+    assert ("product_id", "sale_date", "sale_amount") in columns
+    assert any(set(c) == {"product_id", "customer_id", "sale_amount"} for c in columns)
+    assert all(p.table == "sale" for p in proposals)
+    assert propose(conn, [STATE_DAILY], min_rows=10_000) == []
+
+
+def test_trial_rolls_back_and_apply_keeps_used_indexes(conn, monkeypatch):
+    """Verify a trial leaves the schema alone and apply creates indexes the plans use."""
+    queries = [STATE_DAILY, PRODUCT_RANGE]
+    _time_by_plan(monkeypatch, {STATE_DAILY: (1.0, 0.5), PRODUCT_RANGE: (1.0, 0.5)})
+    proposals = propose(conn, queries, min_rows=0)
+    before = _indexes(conn)
+
+    trial = evaluate(conn, queries, proposals, repeat=1)
+    assert _indexes(conn) == before
+    assert all("COVERING INDEX ix_sale_cov_" in " ".join(t.after_plan) for t in trial.queries)
+    assert not any("COVERING" in " ".join(t.before_plan) for t in trial.queries)
+
+    applied = evaluate(conn, queries, proposals, repeat=1, apply=True)
+    assert applied.applied and applied.kept == proposals
+    assert set(_indexes(conn)) - set(before) == {p.name() for p in proposals}
+    assert propose(conn, queries, min_rows=0) == []
+
+
+@pytest.mark.parametrize("product_total_after, product_kept", [(3.0, False), (1.05, True)])
+def test_index_that_slows_another_query_is_dropped(
+    conn, monkeypatch, product_total_after, product_kept
+):
+    """Verify an index is judged on every query using it, and only kept ones are timed."""
+    queries = [STATE_DAILY, PRODUCT_RANGE, PRODUCT_TOTAL]
+    _time_by_plan(
+        monkeypatch,
+        {
+            STATE_DAILY: (1.0, 0.5),
+            PRODUCT_RANGE: (1.0, 0.5),
+            PRODUCT_TOTAL: (1.0, product_total_after),  # the product index slows it down
+        },
+    )
+    proposals = propose(conn, [STATE_DAILY, PRODUCT_RANGE], min_rows=0)
+    product = next(p for p in proposals if p.columns[0] == "product_id")
+
+    report = evaluate(conn, queries, proposals, repeat=1, apply=True)
+
+    timings = {t.name: t for t in report.queries}
+    assert (product in report.kept) == product_kept
+    assert (product.name() in _indexes(conn)) == product_kept
+    assert [p.columns[0] for p in report.kept if p != product] == ["state_code"]
+    assert (product.name() in timings["product_total"].indexes) == product_kept
+    if not product_kept:
+        assert timings["product_total"].after_seconds == 1.0
+        assert timings["product_range"].after_seconds == 1.0
@@ -0,0 +1,187 @@
+"""Test the in-memory OLAP cube.
+
+Module Information:
+    - Filename: test_olap.py
+    - Module: test_olap
+    - Location: tests/
+
+These tests verify that:
+    - Rollups match a pandas groupby over the same facts
+    - Slice and dice share the fact frame and narrow every later query
+    - top_k ranks cells and drilldown adds one dimension
+    - from_warehouse joins the star schema written by etl_to_dw, time from date_dim
+    - from_sales_cube answers the same rollups from the ETL's sales_cube aggregate
+    - load memory-maps the Arrow fact cache and rebuilds it after an ETL load
+      or when the warehouse file is replaced
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics_project import etl_to_dw as etl
+from analytics_project.olap import Cube
+from analytics_project.olap.fact_cache import cached_version, warehouse_version
+from analytics_project.warehouse import close_pools
+
+
+def _facts(n: int = 400, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    facts = pd.DataFrame(
+        {
+            "category": rng.choice(["home", "toys", "food", None], n),
+            "state_code": rng.choice(["TX", "IL", "KS"], n),
+            "year": rng.choice([2024, 2025], n),
+            "month": rng.choice(["2025-01", "2025-02", "2025-03"], n),
+            "sale_amount": rng.uniform(1, 100, n).round(2),
+        }
+    )
+    facts.loc[::37, "sale_amount"] = np.nan
+    return facts
+
+
+def test_rollup_matches_groupby():
+    """Verify sum/count/mean rollups equal pandas groupby results."""
+    facts = _facts()
+    cube = Cube(facts)
+    by = ["category", "state_code"]
+    grouped = facts.groupby(by, as_index=False)["sale_amount"]
+
+    for agg in ("sum", "mean"):
+        got = cube.rollup(by, agg=agg)
+        want = grouped.agg(agg)
+        assert got[by].astype(str).values.tolist() == want[by].astype(str).values.tolist()
+        np.testing.assert_allclose(got["sale_amount"], want["sale_amount"])
+    counts = cube.rollup(by, agg="count")
+    assert counts["count"].tolist() == facts.dropna(subset=by).groupby(by).size().tolist()
+
+
+def test_slice_and_dice_narrow_queries_without_copying():
+    """Verify sub-cubes share facts and caches but aggregate only their rows."""
+    facts = _facts()
+    cube = Cube(facts)
+    sub = cube.slice(year=2025).dice(state_code=["TX", "KS"])
+
+    want = facts[(facts["year"] == 2025) & facts["state_code"].isin(["TX", "KS"])]
+    got = sub.rollup(["category"])
+    np.testing.assert_allclose(
+        got["sale_amount"], want.groupby("category")["sale_amount"].sum().to_numpy()
+    )
+    assert len(sub) == len(want)
+    assert sub.facts is cube.facts
+    assert ("category",) in cube._groups
+    assert len(cube.slice(state_code="NOPE")) == 0
+    assert cube.members("state_code") == ["IL", "KS", "TX"]
+    with pytest.raises(KeyError):
+        cube.slice(color="red")
+
+
+def test_top_k_and_drilldown():
+    """Verify top_k returns the largest cells first and drilldown adds a level."""
+    facts = _facts()
+    cube = Cube(facts)
+
+    top = cube.top_k(["state_code"], k=2)
+    totals = facts.groupby("state_code")["sale_amount"].sum().sort_values(ascending=False)
+    assert top["state_code"].tolist() == totals.index[:2].tolist()
+
+    drill = cube.drilldown(["year"], "month")
+    assert list(drill.columns) == ["year", "month", "sale_amount"]
+    assert len(drill) == 6
+
+
+def _warehouse(tmp_path, amount=100.0):
+    db = tmp_path / "dw.db"
+    conn = sqlite3.connect(db)
+    etl.create_schema(conn)
+    conn.execute("INSERT INTO customer (customer_id, country) VALUES (1, 'east')")
+    conn.execute("INSERT INTO product (product_id, category) VALUES (7, 'home')")
+    etl.ensure_date_dim(conn, [20250501, 20250601])
+    conn.executemany(
+        "INSERT INTO sale (transaction_id, sale_date, date_key, customer_id, product_id, "
+        "sale_amount, discount_pct) VALUES (?, ?, ?, 1, 7, ?, ?)",
+        [(1, "2025-05-01", 20250501, amount, 10.0), (2, "2025-06-01", 20250601, 50.0, None)],
+    )
+    etl.record_load(conn, "full", 2)
+    conn.commit()
+    conn.close()
+    return db
+
+
+def test_from_warehouse_reads_star_schema(tmp_path):
+    """Verify the cube joins sale with product/customer dimensions from the DW."""
+    cube = Cube.from_warehouse(_warehouse(tmp_path))
+
+    net = cube.rollup(["category", "region", "month"], "net_sales")
+    assert net["month"].tolist() == ["2025-05", "2025-06"]
+    assert net["net_sales"].tolist() == [90.0, 50.0]
+    assert cube.facts[["quarter", "week", "dow", "is_weekend"]].astype(int).values.tolist() == [
+        [2, 18, 4, 0],
+        [2, 22, 7, 1],
+    ]
+    with pytest.raises(FileNotFoundError):
+        Cube.from_warehouse(tmp_path / "missing.db")
+
+
+def test_from_sales_cube_matches_the_fact_cube(tmp_path):
+    """Verify rollups over the aggregate (weighted by sale_count) match the fact cube."""
+    db = _warehouse(tmp_path)
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "INSERT INTO sale (transaction_id, sale_date, date_key, customer_id, product_id, "
+        "sale_amount) VALUES (3, '2025-05-01', 20250501, 1, 7, 30.0)"
+    )
+    etl.refresh_sales_cube(conn)
+    conn.commit()
+    conn.close()
+
+    facts, cells = Cube.from_warehouse(db), Cube.from_sales_cube(db)
+
+    assert len(cells.facts) == 2
+    assert cells.dimensions == ["category", "region", "state_code", "year", "month"]
+    assert len(cells) == len(facts) == 3
+    for measure, agg in [("sale_amount", "sum"), ("net_sales", "mean"), ("net_sales", "count")]:
+        expected = facts.rollup(["category", "month"], measure, agg)
+        got = cells.rollup(["category", "month"], measure, agg)
+        pd.testing.assert_frame_equal(got, expected, check_categorical=False)
+    may = cells.slice(month="2025-05")
+    assert (len(may), may.top_k(["region"])["sale_amount"].tolist()) == (2, [130.0])
+
+
+def test_load_memory_maps_fact_cache_and_rebuilds_after_etl(tmp_path):
+    """Verify Cube.load builds the Arrow cache once and rebuilds it after a new load."""
+    pytest.importorskip("pyarrow")
+    db, cache = _warehouse(tmp_path), tmp_path / "facts.arrow"
+
+    cube = Cube.load(db, cache)
+    assert cached_version(cache) == warehouse_version(db)
+    assert isinstance(cube.facts["category"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(cube.facts, Cube.from_warehouse(db).facts)
+
+    built = cache.stat().st_mtime_ns
+    Cube.load(db, cache)
+    assert cache.stat().st_mtime_ns == built
+
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "INSERT INTO sale (transaction_id, sale_date, sale_amount) VALUES (3, '2025-07-01', 5)"
+    )
+    etl.record_load(conn, "incremental", 1)
+    conn.commit()
+    conn.close()
+    assert len(Cube.load(db, cache)) == 3
+
+
+def test_load_rebuilds_fact_cache_for_a_replaced_warehouse(tmp_path):
+    """Verify a rebuilt warehouse (load log back at 1) never reuses the old Arrow cache."""
+    pytest.importorskip("pyarrow")
+    db, cache = _warehouse(tmp_path), tmp_path / "facts.arrow"
+    assert Cube.load(db, cache).rollup(["month"])["sale_amount"].tolist() == [100.0, 50.0]
+
+    close_pools()  # no open handle on the old file, so its inode can be reused
+    db.unlink()
+    _warehouse(tmp_path, amount=7.0)
+
+    assert Cube.load(db, cache).rollup(["month"])["sale_amount"].tolist() == [7.0, 50.0]
@@ -0,0 +1,85 @@
+"""Test the dependency-aware pipeline runner.
+
+Module Information:
+    - Filename: test_pipeline.py
+    - Module: test_pipeline
+    - Location: tests/
+
+These tests verify that:
+    - The default DAG runs every prepare step before the ETL load
+    - Bad DAGs (cycles, unknown stages) are rejected
+    - Stages run in a process pool and report their wall time
+    - Cached stages are skipped until an input, config value or output changes
+"""
+
+import json
+
+import pytest
+
+from analytics_project import pipeline
+from analytics_project.stage_cache import StageCache
+
+
+def test_default_stage_order_runs_etl_after_prepare():
+    """Verify the ETL load comes after all three prepare stages and before the fact cache."""
+    order = pipeline.stage_order(pipeline.STAGES)
+    assert order[-2:] == ["etl_to_dw", "fact_cache"]
+    assert set(order[:3]) == {"prepare_customers", "prepare_products", "prepare_sales"}
+
+
+def test_stage_order_rejects_bad_dags():
+    """Verify cycles and unknown dependencies raise ValueError."""
+    with pytest.raises(ValueError, match="cycle"):
+        pipeline.stage_order({"a": ("m", ("b",)), "b": ("m", ("a",))})
+    with pytest.raises(ValueError, match="unknown"):
+        pipeline.stage_order({"a": ("m", ("missing",))})
+
+
+def test_run_pipeline_times_each_stage():
+    """Verify every stage runs and gets a wall time."""
+    stages = {
+        "first": ("platform:python_version", ()),
+        "second": ("platform:machine", ()),
+        "last": ("platform:system", ("first", "second")),
+    }
+    timings = pipeline.run_pipeline(stages, max_workers=2)
+    assert set(timings) == set(stages)
+    assert all(secs >= 0 for secs in timings.values())
+
+
+def test_run_pipeline_reports_failed_stage():
+    """Verify a failing stage stops its dependents and raises."""
+    stages = {
+        "broken": ("platform:no_such_function", ()),
+        "after": ("platform:system", ("broken",)),
+    }
+    with pytest.raises(RuntimeError, match="broken"):
+        pipeline.run_pipeline(stages, max_workers=1)
+
+
+def test_stage_cache_skips_unchanged_stages(tmp_path):
+    """Verify a rerun skips stages and changed inputs/config/outputs rerun them."""
+    raw, out = tmp_path / "raw.csv", tmp_path / "out.csv"
+    raw.write_text("a\n1\n")
+    out.write_text("done\n")
+    stages = {
+        "prep": ("platform:system", ()),
+        "load": ("platform:machine", ("prep",)),
+    }
+    files = {"prep": lambda: ([raw], [out], [])}
+    manifest = tmp_path / "manifest.json"
+
+    def run(**config):
+        cache = StageCache(manifest, files, config={"k": 1.5, **config})
+        pipeline.run_pipeline(stages, max_workers=1, cache=cache)
+        return json.loads(manifest.read_text())["last_run"]
+
+    assert run()["ran"] == ["prep", "load"]
+    second = run()
+    assert (second["ran"], second["skipped"]) == (["load"], ["prep"])
+    assert run(k=3.0)["ran"] == ["prep", "load"]
+
+    raw.write_text("a\n2\n")
+    assert "prep" in run(k=3.0)["ran"]
+    out.unlink()
+    assert "prep" in run(k=3.0)["ran"]
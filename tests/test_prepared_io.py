@@ -0,0 +1,63 @@
+"""Test reading and writing the prepared layer.
+
+Module Information:
+    - Filename: test_prepared_io.py
+    - Module: test_prepared_io
+    - Location: tests/
+
+These tests verify that:
+    - Parquet and Feather round-trip datetime, float and category dtypes
+    - Column projection loads only the requested columns that exist
+    - Readers fall back to the CSV when the columnar file is missing
+"""
+
+import pandas as pd
+import pytest
+
+from analytics_project.prepared_io import prepared_path, read_prepared, write_prepared
+
+pytest.importorskip("pyarrow")
+
+
+def _prepared() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "saledate": pd.to_datetime(["2025-05-04", "2025-05-05", None]),
+            "saleamount": [10.5, None, 3.0],
+            "statecode": pd.Categorical(["TX", "IL", "TX"]),
+        }
+    )
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_columnar_round_trip_keeps_dtypes(tmp_path, fmt):
+    """Verify typed columns come back without re-parsing."""
+    csv_path = tmp_path / "sales_data_prepared.csv"
+    written = write_prepared(_prepared(), csv_path, fmt=fmt)
+
+    assert written == prepared_path(csv_path, fmt)
+    assert written.suffix == f".{fmt}"
+    pd.testing.assert_frame_equal(read_prepared(csv_path, fmt=fmt), _prepared())
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "feather"])
+def test_read_prepared_projects_columns(tmp_path, fmt):
+    """Verify only requested columns are loaded and unknown names are ignored."""
+    csv_path = tmp_path / "sales_data_prepared.csv"
+    write_prepared(_prepared(), csv_path, fmt=fmt)
+
+    df = read_prepared(csv_path, columns=["statecode", "saleamount", "missing"], fmt=fmt)
+
+    assert list(df.columns) == ["saleamount", "statecode"]
+
+
+def test_read_prepared_falls_back_to_csv(tmp_path):
+    """Verify a CSV-only prepared layer still loads when parquet is configured."""
+    csv_path = tmp_path / "sales_data_prepared.csv"
+    write_prepared(_prepared(), csv_path, fmt="csv")
+
+    df = read_prepared(csv_path, fmt="parquet")
+
+    assert len(df) == 3
+    with pytest.raises(ValueError):
+        prepared_path(csv_path, "xlsx")
@@ -0,0 +1,93 @@
+"""Test the per-step profiling hook.
+
+Module Information:
+    - Filename: test_profiling.py
+    - Module: test_profiling
+    - Location: tests/
+
+These tests verify that:
+    - Nothing is recorded while profiling is off
+    - Scrubber methods record wall/self time and rows in/out as JSON lines
+    - Memory tracing adds a tracemalloc peak per step
+    - The summary has one row per step, sorted by self time
+"""
+
+import pandas as pd
+import pytest
+
+from analytics_project import profiling
+from analytics_project.data_scrubber import DataScrubber
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / "profile.jsonl"
+    yield path
+    profiling.disable()
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"amount": [1.0, 2.0, 3.0, 2.5, 1_000.0], "state": [" tx", "il"] * 2 + [None]}
+    )
+
+
+PLAN = [
+    {"step": "trim_whitespace"},
+    {"step": "remove_outliers_iqr", "columns": ["amount"], "factor": 1.5},
+]
+
+
+def test_disabled_profiler_records_nothing(log_path):
+    """Verify the hooks are inert until profiling is enabled."""
+    DataScrubber().run_plan(_frame(), PLAN)
+    with profiling.profile_step("block") as rec:
+        rec["rows_out"] = 1
+    assert not log_path.exists()
+    assert profiling.read_log(log_path) == []
+
+
+def test_scrubber_steps_are_recorded(log_path):
+    """Verify nested steps get their own records and the parent's self time excludes them."""
+    profiling.enable(log_path)
+
+    DataScrubber().run_plan(_frame(), PLAN)
+
+    records = {r["step"]: r for r in profiling.read_log(log_path)}
+    outliers = records["DataScrubber.remove_outliers_iqr"]
+    plan = records["DataScrubber.run_plan"]
+    assert (outliers["rows_in"], outliers["rows_out"]) == (5, 4)
+    assert (plan["rows_in"], plan["rows_out"], plan["depth"]) == (5, 4, 0)
+    assert outliers["depth"] == 1
+    assert records["DataScrubber.column_pass:state"]["ops"] == ["trim"]
+    assert plan["self_seconds"] <= plan["seconds"]
+    assert plan["seconds"] >= outliers["seconds"]
+
+
+def test_memory_mode_records_allocation_peak(log_path):
+    """Verify memory tracing reports how much a step allocated above its start."""
+    profiling.enable(log_path, memory=True)
+
+    with profiling.profile_step("alloc") as rec:
+        block = bytearray(4 * 2**20)
+        rec["rows_out"] = len(block)
+
+    (record,) = profiling.read_log(log_path)
+    assert record["mem_peak_mb"] >= 4
+
+
+def test_summary_sorted_by_self_time():
+    """Verify per-step totals, shares and the self-time ordering of the summary."""
+    records = [
+        {"step": "a", "seconds": 1.0, "self_seconds": 0.25, "rows_in": 10},
+        {"step": "b", "seconds": 0.75, "self_seconds": 0.75},
+        {"step": "a", "seconds": 1.0, "self_seconds": 0.0, "rows_in": 5},
+    ]
+
+    table = profiling.summarize(records)
+
+    assert list(table.index) == ["b", "a"]
+    assert table.loc["a", "calls"] == 2
+    assert table.loc["a", "rows_in"] == 15
+    assert pd.isna(table.loc["b", "rows_in"])
+    assert table["share"].sum() == pytest.approx(1.0)
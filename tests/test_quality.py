@@ -0,0 +1,108 @@
+"""Test the rule-based warehouse data-quality checks.
+
+Module Information:
+    - Filename: test_quality.py
+    - Module: test_quality
+    - Location: tests/
+
+These tests verify that:
+    - The default rules give the same counts as the original one-query-per-check SQL
+    - Row rules on a table share one statement and reference rules get their own
+    - Registered custom rules run alongside the defaults with per-rule timings
+    - Malformed rules are rejected before any SQL is built
+"""
+
+import sqlite3
+
+import pytest
+
+from analytics_project import etl_to_dw as etl
+from analytics_project import quality
+from analytics_project.quality import Rule, plan, register_rule, run_checks
+
+ORIGINAL_SQL = {
+    "customers": "SELECT COUNT(*) FROM customer",
+    "products": "SELECT COUNT(*) FROM product",
+    "sales": "SELECT COUNT(*) FROM sale",
+    "orphan_customers": "SELECT COUNT(*) FROM sale s LEFT JOIN customer c "
+    "ON c.customer_id=s.customer_id WHERE c.customer_id IS NULL",
+    "orphan_products": "SELECT COUNT(*) FROM sale s LEFT JOIN product p "
+    "ON p.product_id=s.product_id WHERE p.product_id IS NULL",
+    "bad_amounts": "SELECT COUNT(*) FROM sale WHERE sale_amount IS NULL OR sale_amount < 0",
+}
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    etl.create_schema(conn)
+    etl.create_indexes(conn)
+    conn.executemany(
+        "INSERT INTO customer (customer_id, name) VALUES (?, ?)", [(1, "Ana"), (2, "Wei")]
+    )
+    conn.executemany("INSERT INTO product (product_id, product_name) VALUES (?, ?)", [(10, "Desk")])
+    conn.executemany(
+        "INSERT INTO sale (transaction_id, sale_date, customer_id, product_id, sale_amount) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            (1, "2025-05-01", 1, 10, 10.0),
+            (2, "2025-05-02", 2, 10, -5.0),  # bad amount
+            (3, "2025-05-03", 9, 10, 7.5),  # orphan customer
+            (4, "2025-05-04", None, 11, None),  # NULL customer, orphan product, bad amount
+            (5, "2031-01-01", 1, 10, 3.0),
+        ],
+    )
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(quality, "RULES", dict(quality.RULES))
+
+
+def test_default_rules_match_the_original_checks(conn):
+    """Verify every default rule counts exactly what its old standalone query counted."""
+    expected = {name: conn.execute(sql).fetchone()[0] for name, sql in ORIGINAL_SQL.items()}
+
+    assert etl.quality_checks(conn) == expected
+    assert expected["orphan_customers"] == 2 and expected["bad_amounts"] == 2
+
+
+def test_row_rules_share_one_scan_per_table(conn):
+    """Verify the sale row rules are one statement and each FK check is an indexed anti-join."""
+    passes = {name: [r.name for r in rules] for name, rules, _ in plan(quality.RULES.values())}
+
+    assert passes["sale"] == ["sales", "bad_amounts"]
+    assert passes["orphan_customers"] == ["orphan_customers"]
+    sql = {name: statements[0] for name, _, statements in plan(quality.RULES.values())}
+    steps = " ".join(
+        row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql["orphan_customers"])
+    )
+    assert "COVERING INDEX ix_sale_customer_id" in steps
+    assert "INTEGER PRIMARY KEY" in steps
+
+
+def test_custom_rules_run_in_the_same_pass(conn, registry):
+    """Verify a registered rule joins the sale scan and every rule can be timed."""
+    register_rule(Rule("future_sales", "sale", "s.sale_date > '2030-12-31'"))
+    with pytest.raises(ValueError):
+        register_rule(Rule("future_sales", "sale", "1"))
+
+    report = run_checks(conn, time_rules=True)
+
+    assert report.results["future_sales"] == 1
+    assert list(report.results)[-1] == "future_sales"
+    assert len(report.pass_seconds) == 5  # customer, product, sale + two anti-joins
+    assert set(report.rule_seconds) == set(report.results)
+    assert all(s >= 0 for s in report.rule_seconds.values())
+
+
+def test_malformed_rules_are_rejected():
+    """Verify rule names, tables and references must be plain identifiers."""
+    with pytest.raises(ValueError):
+        Rule("bad name", "sale")
+    with pytest.raises(ValueError):
+        Rule("orphans", "sale", column="store_id", references="store")
+    with pytest.raises(ValueError):
+        Rule("orphans", "sale", "s.store_id > 0", references="store.store_id", column="store_id")
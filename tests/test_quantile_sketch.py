@@ -0,0 +1,58 @@
+"""Test the mergeable quantile summaries.
+
+Module Information:
+    - Filename: test_quantile_sketch.py
+    - Module: test_quantile_sketch
+    - Location: tests/
+
+These tests verify that:
+    - Sketch quartiles stay within the configured rank error
+    - Sketches built on separate shards merge (and pickle) cleanly
+    - Exact mode matches pandas
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from analytics_project.quantile_sketch import ExactQuantiles, QuantileSketch
+
+
+def test_sketch_rank_error_within_bound():
+    """Verify the estimated quartiles land within the requested rank error."""
+    values = np.random.default_rng(7).lognormal(size=200_000)
+    sketch = QuantileSketch(error=0.01, seed=1)
+    for chunk in np.array_split(values, 20):
+        sketch.update(chunk)
+
+    assert sketch.n == len(values)
+    for q in (0.25, 0.5, 0.75):
+        rank = (values < sketch.quantile(q)).mean()
+        assert abs(rank - q) < 0.01
+
+
+def test_sketches_merge_across_shards():
+    """Verify per-shard sketches merge to the same answer as one sketch."""
+    values = np.random.default_rng(3).normal(100, 15, size=100_000)
+    shards = [
+        pickle.loads(pickle.dumps(QuantileSketch(error=0.005, seed=i).update(part)))
+        for i, part in enumerate(np.array_split(values, 4))
+    ]
+    merged = shards[0]
+    for other in shards[1:]:
+        merged.merge(other)
+
+    assert merged.n == len(values)
+    assert abs((values < merged.quantile(0.75)).mean() - 0.75) < 0.005
+
+
+def test_exact_mode_matches_pandas():
+    """Verify ExactQuantiles (and a small sketch) match pandas quantiles."""
+    ser = pd.Series([4.0, None, 1.0, 9.5, 3.0, 7.0, "x"])
+    expected = pd.to_numeric(ser, errors="coerce").quantile(0.25)
+
+    assert ExactQuantiles().update(ser[:3]).merge(ExactQuantiles().update(ser[3:])).quantile(
+        0.25
+    ) == expected
+    assert QuantileSketch().update(ser).quantile(0.25) == expected
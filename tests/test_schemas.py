@@ -0,0 +1,87 @@
+"""Test the CSV schema registry.
+
+Module Information:
+    - Filename: test_schemas.py
+    - Module: test_schemas
+    - Location: tests/
+
+These tests verify that:
+    - Registered files are read with explicit dtypes and date formats
+    - Column projection reads only the requested columns
+    - Unregistered files still read with normal inference
+    - A blank ID reads as <NA> (with either engine) instead of failing the load
+"""
+
+import pandas as pd
+import pytest
+
+from analytics_project.schemas import date_format, read_csv, schema_for
+
+
+def _write_sales(tmp_path):
+    path = tmp_path / "sales_data.csv"
+    path.write_text(
+        "TransactionID,SaleDate,CustomerID,ProductID,StoreID,CampaignID,"
+        "SaleAmount,DiscountPct,StateCode\n"
+        "1,5/4/2025,1034,2059,402,0,2048.2,2,TX\n"
+        "2,12/14/2025,1066,2048,403,,?,5,\n"
+        "3,2025-05-06,1001,2001,404,1,12,0,IL\n"
+    )
+    return path
+
+
+def test_registered_file_uses_schema_dtypes_and_date_format(tmp_path):
+    """Verify dtypes come from the registry and dates use the explicit format."""
+    df = read_csv(_write_sales(tmp_path))
+
+    assert df["SaleDate"].tolist()[:2] == [pd.Timestamp("2025-05-04"), pd.Timestamp("2025-12-14")]
+    assert pd.isna(df.loc[2, "SaleDate"])  # not m/d/Y, same as format inference
+    assert df["SaleAmount"].tolist() == ["2048.2", "?", "12"]
+    assert isinstance(df["StateCode"].dtype, pd.CategoricalDtype)
+    assert df["CampaignID"].dtype == "float64"
+    assert date_format("data/raw/sales_data.csv", "SaleDate") == "%m/%d/%Y"
+
+
+def test_read_csv_projects_and_can_leave_dates_as_text(tmp_path):
+    """Verify only requested columns are read and parse_dates=False keeps text."""
+    df = read_csv(
+        _write_sales(tmp_path), columns=["SaleAmount", "SaleDate", "nope"], parse_dates=False
+    )
+
+    assert list(df.columns) == ["SaleDate", "SaleAmount"]
+    assert df["SaleDate"].iloc[0] == "5/4/2025"
+
+
+def test_unregistered_file_reads_with_inference(tmp_path):
+    """Verify files without a registry entry fall back to plain read_csv."""
+    path = tmp_path / "other.csv"
+    path.write_text("a,b\n1,x\n2,y\n")
+
+    df = read_csv(path)
+
+    assert schema_for(path) == {"dtype": {}, "dates": {}}
+    assert df["a"].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("engine", ["pyarrow", "c"])
+def test_blank_keys_read_as_missing(tmp_path, engine):
+    """Verify a raw or prepared file with an empty key loads, with <NA> in that row."""
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    raw = tmp_path / "sales_data.csv"
+    raw.write_text(
+        "TransactionID,SaleDate,CustomerID,ProductID,StoreID,CampaignID,"
+        "SaleAmount,DiscountPct,StateCode\n"
+        "1,5/4/2025,,2059,402,0,2048.2,2,TX\n"
+        "2,5/4/2025,1066,2048,,1,321.87,5,IL\n"
+    )
+    prepared = tmp_path / "customers_data_prepared.csv"
+    prepared.write_text("customer_id,name\n,Ann\n7,Bo\n")
+
+    sales = read_csv(raw, engine=engine)
+    customers = read_csv(prepared, engine=engine)
+
+    assert sales["CustomerID"].dtype == "Int64"
+    assert sales["CustomerID"].isna().tolist() == [True, False]
+    assert sales["StoreID"].tolist()[0] == 402 and pd.isna(sales["StoreID"].iloc[1])
+    assert customers["customer_id"].isna().tolist() == [True, False]
@@ -0,0 +1,168 @@
+"""Test the pooled read-only warehouse access layer.
+
+Module Information:
+    - Filename: test_warehouse.py
+    - Module: test_warehouse
+    - Location: tests/
+
+These tests verify that:
+    - Pooled connections are read-only and reused rather than reopened
+    - Cached results are served until a new ETL load changes the generation
+    - The LRU cache keeps at most the configured number of results
+    - Concurrent readers never open more than the pool size
+    - Replacing the warehouse file drops connections to the old one and its cached results
+    - Date-bounded reads only name the month partitions the range overlaps
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from analytics_project import etl_to_dw as etl
+from analytics_project.warehouse import ReadPool, sale_source
+
+
+def _warehouse(path, amounts=(10.0, 20.0)):
+    conn = sqlite3.connect(path)
+    etl.create_schema(conn)
+    conn.executemany(
+        "INSERT INTO sale (transaction_id, sale_date, sale_amount) VALUES (?, ?, ?)",
+        [(1, "2025-05-01", amounts[0]), (2, "2025-05-02", amounts[1])],
+    )
+    etl.record_load(conn, "full", 2)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _new_load(path, amount):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO sale (transaction_id, sale_date, sale_amount) VALUES (99, '2025-06-01', ?)",
+        (amount,),
+    )
+    etl.record_load(conn, "incremental", 1)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ReadPool(_warehouse(tmp_path / "dw.db"), size=2, cache_entries=2)
+    yield pool
+    pool.close()
+
+
+def test_connections_are_read_only_and_reused(pool):
+    """Verify writes are refused and the same connection serves consecutive reads."""
+    with pool.connection() as conn:
+        first = conn
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM sale")
+    with pool.connection() as conn:
+        assert conn is first
+    assert pool.cache_info()["connections"] == 1
+
+
+def test_cache_is_invalidated_by_a_new_load(pool):
+    """Verify repeated queries hit the cache until etl_load gets a new row."""
+    sql = "SELECT SUM(sale_amount) FROM sale WHERE sale_date >= ?"
+
+    assert pool.query(sql, ["2025-01-01"]) == [(30.0,)]
+    assert pool.query(sql, ["2025-01-01"]) == [(30.0,)]
+    assert (pool.hits, pool.misses) == (1, 1)
+    generation = pool.generation()
+
+    _new_load(pool.db_path, 5.0)
+
+    assert pool.query(sql, ["2025-01-01"]) == [(35.0,)]
+    assert pool.generation() != generation
+    frame = pool.read_frame("SELECT * FROM sale")
+    frame.loc[0, "sale_amount"] = -1  # callers get a copy
+    assert pool.read_frame("SELECT * FROM sale")["sale_amount"].tolist() == [10.0, 20.0, 5.0]
+
+
+def test_lru_keeps_the_most_recent_results(pool):
+    """Verify the least recently used result is evicted first."""
+    for n in (1, 2, 1, 3):
+        pool.query("SELECT ?", [n])
+
+    assert pool.cache_info()["entries"] == 2
+    pool.query("SELECT ?", [1])
+    pool.query("SELECT ?", [2])
+    assert (pool.hits, pool.misses) == (2, 4)
+
+
+def test_concurrent_readers_share_the_pool(pool):
+    """Verify many threads reading at once never open more than ``size`` connections."""
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        totals = list(
+            ex.map(
+                lambda i: pool.query("SELECT COUNT(*) + ? FROM sale", [i], cache=False), range(40)
+            )
+        )
+
+    assert totals == [[(2 + i,)] for i in range(40)]
+    assert pool.cache_info()["connections"] <= 2
+
+
+def test_replaced_file_reopens_connections(pool):
+    """Verify a rebuilt warehouse file is read instead of the deleted one."""
+    assert pool.query("SELECT COUNT(*) FROM sale", cache=False) == [(2,)]
+
+    pool.db_path.unlink()
+    _new_load(_warehouse(pool.db_path), 1.0)
+
+    assert pool.query("SELECT COUNT(*) FROM sale", cache=False) == [(3,)]
+
+
+def test_cache_is_invalidated_by_a_rebuilt_file(pool):
+    """Verify cached results don't survive a rebuild whose load log restarts at 1."""
+    sql = "SELECT SUM(sale_amount) FROM sale"
+    assert pool.query(sql) == [(30.0,)]
+    generation = pool.generation()
+
+    pool.db_path.unlink()
+    _warehouse(pool.db_path, amounts=(200.0, 300.0))  # load_id 1 again
+
+    assert pool.query(sql) == [(500.0,)]
+    assert pool.generation() != generation
+
+
+def test_sale_source_prunes_month_partitions(tmp_path):
+    """Verify a date range reads only overlapping partitions and matches the flat table."""
+    sales = pd.DataFrame(
+        {
+            "transaction_id": range(1, 7),
+            "sale_date": [
+                "2025-01-31",
+                "2025-02-01",
+                "2025-02-20",
+                "2025-03-05",
+                "2025-04-01",
+                None,
+            ],
+            "customer_id": 1,
+            "product_id": 10,
+            "sale_amount": [1.0, 2.0, 4.0, 8.0, 16.0, 32.0],
+        }
+    )
+    customers = pd.DataFrame({"customer_id": [1]})
+    products = pd.DataFrame({"product_id": [10]})
+    totals = {}
+    for partitioned in (False, True):
+        conn = sqlite3.connect(tmp_path / f"dw_{partitioned}.db")
+        etl.create_schema(conn, partition_by_month=partitioned)
+        etl.insert_all(conn, customers, products, sales)
+        source, params = sale_source(conn, "2025-02-01", 20250305)
+        totals[partitioned] = conn.execute(
+            f"SELECT SUM(sale_amount) FROM {source}", params
+        ).fetchone()
+        conn.close()
+
+    assert totals == {False: (14.0,), True: (14.0,)}
+    assert source.count("SELECT") == 2 and "sale_202502" in source and "sale_202503" in source
+    assert params == [20250201, 20250305]  # February is read whole, March up to the 5th